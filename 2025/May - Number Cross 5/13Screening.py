@@ -1,12 +1,20 @@
+import sys
+
+import clues
+import numpyScreening
+from clues import pattern_masks
+
+# --numpy screens by vectorized enumeration instead of digit DP
+backend = numpyScreening if "--numpy" in sys.argv else clues
+
 def find_multiples_of_13():
+    # 3- and 4-digit multiples of 13: first digit 4-6, second 3-9, ending in 3
     results = []
-    num = 104  # Start from the smallest 4-digit number
-    while num < 10**4:  # Limit to 7 digits; adjust as needed
-        if num % 13 == 0 and str(num)[0] in ('456') and str(num)[1] in ('3456789') and '0' not in str(num) and str(num).endswith('3'):
-            results.append(num)
-        num += 13
+    for length in (3, 4):
+        middle = [""] * (length - 3)
+        results += backend.multiples(13, pattern_masks('456', '3456789', *middle, '3'))
     return results
 
 # Run the function and print results
-multiples = find_multiples_of_13()
-print(multiples)
+multiples_of_13 = find_multiples_of_13()
+print(multiples_of_13)
@@ -1,12 +1,20 @@
+import sys
+
+import clues
+import numpyScreening
+from clues import pattern_masks
+
+# --numpy screens by vectorized enumeration instead of digit DP
+backend = numpyScreening if "--numpy" in sys.argv else clues
+
 def find_multiples_of_32():
+    # 3- to 5-digit multiples of 32 shaped like [3-9] 3 [3-6] ...
     results = []
-    num = 128  # Start from the smallest 4-digit number
-    while num < 10**5:  # Limit to 7 digits; adjust as needed
-            if num % 32 == 0 and str(num)[0] in ('3456789') and '0' not in str(num) and str(num)[1] in ('3') and str(num)[2] in ('3456'):
-                results.append(num)
-            num += 32
+    for length in (3, 4, 5):
+        rest = [""] * (length - 3)
+        results += backend.multiples(32, pattern_masks('3456789', '3', '3456', *rest))
     return results
 
 # Run the function and print results
-multiples = find_multiples_of_32()
-print(multiples)
+multiples_of_32 = find_multiples_of_32()
+print(multiples_of_32)
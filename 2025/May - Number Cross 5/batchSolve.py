@@ -0,0 +1,127 @@
+"""Solve many puzzle layouts headlessly across a process pool.
+
+    python batchSolve.py layouts/ "more/*.csv" --out results --workers 8 [--grids]
+
+Every layout found (directories are searched for *.csv and binary *.ncg
+grid files) is solved in its own worker process and gets one JSON file in
+the output directory with the solution grids, their total digit sum and
+timing. With --grids the solutions are also written as a binary grid file
+(see gridFile.py) that keeps tiles and increments.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gridFile import GRID_SUFFIX, read_layout, received_from_moves, write_grid_file
+from rules import is_solved
+from solver import Solver
+
+
+def find_layouts(patterns):
+    """Expand directories and glob patterns into a sorted list of CSV files"""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found.update(glob.glob(os.path.join(pattern, "*.csv")))
+            found.update(glob.glob(os.path.join(pattern, "*" + GRID_SUFFIX)))
+        else:
+            found.update(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(found)
+
+
+def solution_to_json(solution, layout):
+    return {
+        'grid': solution.values,
+        'tiles': sorted([r, c] for r, c in solution.tiles),
+        'total_sum': solution.total_sum(),
+        # Checked against the rules independently of the solver's own bookkeeping
+        'verified': is_solved(solution.to_grid(layout), layout.row_labels)
+    }
+
+
+def solve_file(path, limit=1, grid_file=None):
+    """Solve one layout file; runs inside a worker process"""
+    result = {'layout': os.path.abspath(path)}
+    start = time.perf_counter()
+    try:
+        layout = read_layout(path)
+        load_time = time.perf_counter() - start
+        solver = Solver(layout)
+        solutions = solver.solve(limit)
+        if grid_file and solutions:
+            write_grid_file(grid_file, ((s.to_grid(layout), received_from_moves(s.moves, layout.size))
+                                        for s in solutions), layout.row_labels)
+        result.update({
+            'solved': bool(solutions),
+            'solutions': [solution_to_json(s, layout) for s in solutions],
+            'nodes': solver.nodes,
+            'load_seconds': round(load_time, 6)
+        })
+    except Exception as e:
+        result.update({'solved': False, 'error': f"{type(e).__name__}: {e}"})
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def output_names(paths):
+    """One JSON name per layout, disambiguating layouts that share a file name"""
+    names = {}
+    used = set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = f"{stem}.json"
+        counter = 2
+        while name in used:
+            name = f"{stem}-{counter}.json"
+            counter += 1
+        used.add(name)
+        names[path] = name
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a batch of Number Cross 5 layouts in parallel")
+    parser.add_argument("inputs", nargs="+", help="layout CSV or grid files, directories or glob patterns")
+    parser.add_argument("--out", default="results", help="directory for the JSON results")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--limit", type=int, default=1, help="solutions to find per layout (0 for all)")
+    parser.add_argument("--grids", action="store_true", help="also write each layout's solutions as a grid file")
+    args = parser.parse_args(argv)
+
+    paths = find_layouts(args.inputs)
+    if not paths:
+        print("No layout files found", file=sys.stderr)
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+    names = output_names(paths)
+    limit = args.limit or None
+
+    start = time.perf_counter()
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {}
+        for path in paths:
+            grid_file = None
+            if args.grids:
+                grid_file = os.path.join(args.out, os.path.splitext(names[path])[0] + GRID_SUFFIX)
+            futures[pool.submit(solve_file, path, limit, grid_file)] = path
+        for future in as_completed(futures):
+            path = futures[future]
+            result = future.result()
+            with open(os.path.join(args.out, names[path]), 'w') as f:
+                json.dump(result, f, indent=2)
+            status = "error" if 'error' in result else f"{len(result['solutions'])} solution(s)"
+            if not result['solved']:
+                failures += 1
+            print(f"{path}: {status} in {result['seconds']:.2f}s")
+
+    print(f"{len(paths)} layout(s), {failures} unsolved, {time.perf_counter() - start:.2f}s wall time")
+    return 0 if failures == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Benchmarks for the clue enumerators, validation and the solver.
+
+    python benchmark.py [--out report.json]
+    python benchmark.py --save-baseline
+    python benchmark.py --baseline benchmarks/baseline.json --threshold 1.25
+
+Every run uses the same corpus (puzzle_layout.csv plus the layouts
+layoutGenerator.py makes for CORPUS_LAYOUTS) and the same random seeds, and
+a memory-only clue cache so results do not depend on what an earlier run
+left on disk. The
+JSON report has one entry per case with wall time (best of --repeat runs),
+nodes explored, candidates generated and, with --memory, the peak traced
+allocation. Without --baseline, runs compare against the committed
+benchmarks/baseline.json. Compared against a baseline, a case regresses when it is more
+than --threshold times slower (and slower by more than MIN_DELTA seconds);
+the exit status is then 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from clueCache import ClueCache
+from clues import ALL_DIGITS, parse_clue
+from gridGeometry import grid_geometry
+from layoutGenerator import generate_layout
+from rules import violations
+from solver import DEFAULT_ROW_LABELS, PuzzleLayout, Solver
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+SEEDS = (1, 2, 3)
+# Generated layouts, as (size, seed): the same pair always gives the same
+# layout. Their solver searches run to the end in a few seconds each
+CORPUS_LAYOUTS = ((6, 1), (7, 2), (8, 3), (9, 4))
+MASKS_PER_SEED = 40
+MAX_CLUE_LENGTH = 6
+QUICK_CLUE_LENGTH = 4
+
+# Validation is too quick to time once; each timed run repeats it this often
+VALIDATION_ROUNDS = 200
+
+# Differences below this are timer noise, whatever the ratio
+MIN_DELTA = 0.05
+
+# Generated layouts may have no solution or a very deep search; the solver
+# case stops after this long and reports how far it got
+SOLVER_SECONDS = 120
+
+
+def corpus():
+    """(name, layout) for the shipped puzzle and every generated layout"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    layouts = [("puzzle_layout.csv", PuzzleLayout.from_csv(os.path.join(here, "puzzle_layout.csv")))]
+    for size, seed in CORPUS_LAYOUTS:
+        layouts.append((f"layout-{size}x{size}-seed{seed}.csv", generate_layout(size, seed)))
+    return layouts
+
+
+def random_masks(seed, max_length):
+    """Reproducible per-position masks: half unrestricted, half random"""
+    rng = random.Random(seed)
+    masks = []
+    for _ in range(MASKS_PER_SEED):
+        length = rng.randint(2, max_length)
+        masks.append([ALL_DIGITS if rng.random() < 0.5 else rng.randrange(1, 512) for _ in range(length)])
+    return masks
+
+
+def bench_clue(label, max_length):
+    clue = parse_clue(label)
+    candidates = 0
+    for seed in SEEDS:
+        for masks in random_masks(seed, max_length):
+            candidates += len(clue.candidates(masks))
+    return {'candidates': candidates}
+
+
+def bench_regions(grid):
+    """Uniqueness and contiguity checks for every region, as the editor runs them"""
+    geometry = grid_geometry(grid.size)
+    for _ in range(VALIDATION_ROUNDS):
+        for region, cells in grid.region_index.cells.items():
+            grid.region_index.placement_error(region, cells)
+            geometry.is_contiguous(cells)
+    return {'checks': len(grid.region_index.cells)}
+
+
+def bench_rules(grid, row_labels):
+    for _ in range(VALIDATION_ROUNDS):
+        found = violations(grid, row_labels)
+    return {'violations': len(found)}
+
+
+def bench_solver(layout, state, seconds=SOLVER_SECONDS):
+    solver = Solver(layout, ClueCache(cache_dir=None))
+    deadline = time.perf_counter() + seconds
+    solver.stop_check = lambda: time.perf_counter() > deadline
+    solutions = solver.solve(1)
+    if solutions:
+        state['solved'] = solutions[0].to_grid(layout)
+    lookups = {id(lookup): lookup for lookup in solver.run_candidates}.values()
+    return {
+        'nodes': solver.nodes,
+        'solutions': len(solutions),
+        'stopped': solver.stopped,
+        'candidates': sum(len(found) for lookup in lookups for found in lookup.results.values())
+    }
+
+
+def run_case(name, func, repeat, memory):
+    """Best wall time of `repeat` runs, plus the metrics of the last one"""
+    best = None
+    for _ in range(repeat):
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        metrics = func()
+        elapsed = time.perf_counter() - start
+        if memory:
+            metrics['peak_kib'] = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    result = {'name': name, 'seconds': round(best, 6)}
+    result.update(metrics)
+    print(f"{name}: {best:.3f}s", file=sys.stderr)
+    return result
+
+
+def run_benchmarks(quick=False, repeat=3, memory=False, solver_seconds=SOLVER_SECONDS):
+    cases = []
+    max_length = QUICK_CLUE_LENGTH if quick else MAX_CLUE_LENGTH
+    for label in dict.fromkeys(DEFAULT_ROW_LABELS):
+        cases.append(run_case(f"clue:{label}", lambda label=label: bench_clue(label, max_length), repeat, memory))
+
+    for name, layout in corpus():
+        cases.append(run_case(f"regions:{name}", lambda: bench_regions(layout.grid), repeat, memory))
+        cases.append(run_case(f"rules:{name}", lambda: bench_rules(layout.grid, layout.row_labels), repeat, memory))
+        if quick:
+            continue
+        # The solver is slow enough that a single run is a stable measure
+        state = {}
+        cases.append(run_case(f"solver:{name}", lambda: bench_solver(layout, state, solver_seconds), 1, memory))
+        if 'solved' in state:
+            solved = state['solved']
+            cases.append(run_case(f"rules-solved:{name}",
+                                  lambda: bench_rules(solved, layout.row_labels), repeat, memory))
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'quick': quick,
+        'memory': memory,
+        'cases': cases
+    }
+
+
+def compare(report, baseline, threshold):
+    """Cases that got slower than threshold allows, and cases whose counts changed"""
+    before = {case['name']: case for case in baseline['cases']}
+    regressions = []
+    changed = []
+    for case in report['cases']:
+        old = before.get(case['name'])
+        if old is None:
+            continue
+        ratio = case['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        case['baseline_seconds'] = old['seconds']
+        case['ratio'] = round(ratio, 3)
+        if ratio > threshold and case['seconds'] - old['seconds'] > MIN_DELTA:
+            regressions.append(case['name'])
+        if case.get('stopped') or old.get('stopped'):
+            # A search cut off by the clock explores a timing-dependent amount
+            continue
+        for key in ('nodes', 'candidates', 'solutions', 'violations', 'checks'):
+            if key in case and key in old and case[key] != old[key]:
+                changed.append(f"{case['name']} {key}: {old[key]} -> {case[key]}")
+    return regressions, changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Number Cross 5 clue, validation and solver code")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="compare against this report")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store the report as {BASELINE}")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest counts")
+    parser.add_argument("--quick", action="store_true", help="shorter clue masks and no solver runs")
+    parser.add_argument("--memory", action="store_true", help="trace peak memory (slows every case)")
+    parser.add_argument("--solver-seconds", type=float, default=SOLVER_SECONDS,
+                        help="stop each solver case after this long")
+    args = parser.parse_args(argv)
+    if args.baseline and not os.path.exists(args.baseline):
+        # Checked up front so a missing file does not cost a full run
+        parser.error(f"baseline {args.baseline} not found; make one with --save-baseline")
+
+    report = run_benchmarks(args.quick, args.repeat, args.memory, args.solver_seconds)
+
+    status = 0
+    baseline_path = args.baseline or (BASELINE if not args.save_baseline and os.path.exists(BASELINE) else None)
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get('memory') != args.memory:
+            print("warning: baseline and this run differ in --memory, so timings are not comparable", file=sys.stderr)
+        regressions, changed = compare(report, baseline, args.threshold)
+        report['regressions'] = regressions
+        report['changed'] = changed
+        for line in changed:
+            print(f"changed: {line}", file=sys.stderr)
+        for name in regressions:
+            print(f"REGRESSION: {name}", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.save_baseline:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(BASELINE, 'w') as f:
+            f.write(text)
+        print(f"Baseline saved to {BASELINE}", file=sys.stderr)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    elif not args.save_baseline:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""Flat, array-backed grid model for the solver path.
+
+Every cell is an index row * size + col into parallel arrays:
+  domains     9-bit candidate mask, bit d-1 set if digit d is still possible
+              (a single bit means the cell holds that digit, 0 on tiles)
+  regions     region number, NO_REGION for none
+  flags       YELLOW / TILE bits
+  originals   digit a cell held before tile increments, 0 for none
+  increments  increments the cell has received
+Tile contributions are sparse, so they live in a dict of index -> set of
+tile indices, and region membership is kept in a RegionIndex. The model
+converts losslessly to and from GridCell objects (via their
+to_dict/from_dict form) and the puzzle_layout.csv format.
+"""
+import csv
+from array import array
+
+from clues import ALL_DIGITS
+
+YELLOW = 1
+TILE = 2
+NO_REGION = -1
+
+# SINGLE_DIGIT[mask] is the digit when exactly one bit is set, else 0
+SINGLE_DIGIT = [0] * 512
+for _d in range(1, 10):
+    SINGLE_DIGIT[1 << (_d - 1)] = _d
+
+# POPCOUNT[mask] is the number of candidate digits left
+POPCOUNT = [bin(_m).count("1") for _m in range(512)]
+
+
+class RegionIndex:
+    """Region -> cells plus per-row and per-column region counts.
+
+    Cells are (row, col) tuples. Kept up to date on every region change so
+    that membership and uniqueness checks cost work proportional to the
+    region, not the grid.
+    """
+
+    def __init__(self):
+        self.cells = {}
+        self.row_counts = {}
+        self.col_counts = {}
+
+    def add(self, cell, region):
+        if region is None:
+            return
+        self.cells.setdefault(region, set()).add(cell)
+        row_counts = self.row_counts.setdefault(cell[0], {})
+        row_counts[region] = row_counts.get(region, 0) + 1
+        col_counts = self.col_counts.setdefault(cell[1], {})
+        col_counts[region] = col_counts.get(region, 0) + 1
+
+    def remove(self, cell, region):
+        if region is None:
+            return
+        members = self.cells[region]
+        members.discard(cell)
+        if not members:
+            del self.cells[region]
+        for counts in (self.row_counts[cell[0]], self.col_counts[cell[1]]):
+            counts[region] -= 1
+            if not counts[region]:
+                del counts[region]
+
+    def move(self, cell, old_region, new_region):
+        if old_region != new_region:
+            self.remove(cell, old_region)
+            self.add(cell, new_region)
+
+    def region_cells(self, region):
+        return self.cells.get(region, set())
+
+    def count_in_row(self, row, region):
+        return self.row_counts.get(row, {}).get(region, 0)
+
+    def count_in_col(self, col, region):
+        return self.col_counts.get(col, {}).get(region, 0)
+
+    def placement_error(self, region, cells):
+        """Why giving `cells` this region number would repeat it in a row or
+        column, or "" if it would not"""
+        members = self.region_cells(region)
+        in_row = {}
+        in_col = {}
+        for cell in cells:
+            if cell in members:
+                in_row[cell[0]] = in_row.get(cell[0], 0) + 1
+                in_col[cell[1]] = in_col.get(cell[1], 0) + 1
+        for row in {cell[0] for cell in cells}:
+            if self.count_in_row(row, region) > in_row.get(row, 0):
+                return "Region number must be unique in each row"
+        for col in {cell[1] for cell in cells}:
+            if self.count_in_col(col, region) > in_col.get(col, 0):
+                return "Region number must be unique in each column"
+        return ""
+
+
+class Trail:
+    """Undo log for a flat list of small ints of search state.
+
+    set() pushes (slot, old value) onto one preallocated stack before
+    writing; undo(mark) pops back to an earlier mark(). Backtracking then
+    restores exactly what changed and allocates nothing per node.
+    """
+
+    def __init__(self, values, capacity):
+        self.values = values
+        self.slots = array('i', [0]) * capacity
+        self.olds = array('i', [0]) * capacity
+        self.top = 0
+
+    def mark(self):
+        return self.top
+
+    def set(self, slot, value):
+        values = self.values
+        top = self.top
+        if top == len(self.slots):
+            self.slots.extend(self.slots)
+            self.olds.extend(self.olds)
+        self.slots[top] = slot
+        self.olds[top] = values[slot]
+        self.top = top + 1
+        values[slot] = value
+
+    def undo(self, mark):
+        values = self.values
+        slots = self.slots
+        olds = self.olds
+        for top in range(self.top - 1, mark - 1, -1):
+            values[slots[top]] = olds[top]
+        self.top = mark
+
+
+class BitGrid:
+    def __init__(self, size):
+        self.size = size
+        count = size * size
+        self.domains = array('H', [ALL_DIGITS]) * count
+        self.regions = array('h', [NO_REGION]) * count
+        self.flags = array('B', bytes(count))
+        self.originals = array('B', bytes(count))
+        self.increments = array('B', bytes(count))
+        self.contributors = {}
+        self._region_index = None
+
+    @property
+    def region_index(self):
+        """Built from `regions` on first use, so grids that are only copied
+        or decoded never pay for it"""
+        if self._region_index is None:
+            index = RegionIndex()
+            size = self.size
+            for i, region in enumerate(self.regions):
+                if region != NO_REGION:
+                    index.add(divmod(i, size), region)
+            self._region_index = index
+        return self._region_index
+
+    def index(self, row, col):
+        return row * self.size + col
+
+    def coords(self, index):
+        return divmod(index, self.size)
+
+    def value(self, index):
+        """Digit held by a cell, 0 if it is still undecided"""
+        return SINGLE_DIGIT[self.domains[index]]
+
+    def set_value(self, index, digit):
+        self.domains[index] = 1 << (digit - 1)
+
+    def clear_value(self, index):
+        self.domains[index] = 0 if self.flags[index] & TILE else ALL_DIGITS
+
+    def is_yellow(self, index):
+        return bool(self.flags[index] & YELLOW)
+
+    def is_tile(self, index):
+        return bool(self.flags[index] & TILE)
+
+    def region(self, index):
+        region = self.regions[index]
+        return None if region == NO_REGION else region
+
+    def set_region(self, index, region):
+        """Change a cell's region, keeping the region index (if built) in step"""
+        if self._region_index is not None:
+            self._region_index.move(self.coords(index), self.region(index), region)
+        self.regions[index] = NO_REGION if region is None else region
+
+    def region_cells(self, region):
+        return [self.index(r, c) for r, c in sorted(self.region_index.region_cells(region))]
+
+    def cell_state(self, index):
+        """Everything stored for one cell, as a comparable tuple (see journal.py)"""
+        return (self.domains[index], self.regions[index], self.flags[index],
+                self.originals[index], self.increments[index],
+                frozenset(self.contributors.get(index, ())))
+
+    def restore_cell_state(self, index, state):
+        domain, region, flags, original, increments, contributors = state
+        self.set_region(index, None if region == NO_REGION else region)
+        self.domains[index] = domain
+        self.flags[index] = flags
+        self.originals[index] = original
+        self.increments[index] = increments
+        if contributors:
+            self.contributors[index] = set(contributors)
+        else:
+            self.contributors.pop(index, None)
+
+    def calculate_total_sum(self):
+        """Sum of all placed digits, as LogicPuzzleGrid.calculate_total_sum"""
+        single = SINGLE_DIGIT
+        return sum(single[m] for m in self.domains)
+
+    def copy(self):
+        grid = BitGrid(self.size)
+        grid.domains = array('H', self.domains)
+        grid.regions = array('h', self.regions)
+        grid.flags = array('B', self.flags)
+        grid.originals = array('B', self.originals)
+        grid.increments = array('B', self.increments)
+        grid.contributors = {i: set(tiles) for i, tiles in self.contributors.items()}
+        return grid
+
+    def __eq__(self, other):
+        return (isinstance(other, BitGrid) and self.size == other.size and
+                self.domains == other.domains and self.regions == other.regions and
+                self.flags == other.flags and self.originals == other.originals and
+                self.increments == other.increments and
+                {i: t for i, t in self.contributors.items() if t} ==
+                {i: t for i, t in other.contributors.items() if t})
+
+    # Conversion to and from the editor's GridCell objects
+
+    @classmethod
+    def from_cells(cls, grid_data):
+        """Build from LogicPuzzleGrid.grid_data (a square list of GridCells)"""
+        size = len(grid_data)
+        grid = cls(size)
+        for row in range(size):
+            for col in range(size):
+                grid.load_cell(row * size + col, grid_data[row][col])
+        return grid
+
+    def load_cell(self, i, cell):
+        """Overwrite cell i with the state of an editor GridCell"""
+        self.set_region(i, cell.region)
+        self.flags[i] = (YELLOW if cell.yellow else 0) | (TILE if cell.tile else 0)
+        if cell.value and cell.value.isdigit() and 1 <= int(cell.value) <= 9:
+            self.set_value(i, int(cell.value))
+        else:
+            self.domains[i] = 0 if cell.tile else ALL_DIGITS
+        if cell.original_value and cell.original_value.isdigit():
+            self.originals[i] = int(cell.original_value)
+        else:
+            self.originals[i] = 0
+        self.increments[i] = cell.increment_value
+        if cell.contributing_tiles:
+            self.contributors[i] = {r * self.size + c for r, c in cell.contributing_tiles}
+        else:
+            self.contributors.pop(i, None)
+
+    def to_dicts(self):
+        """Cells in GridCell.to_dict form, as a square list"""
+        size = self.size
+        rows = []
+        for row in range(size):
+            cells = []
+            for col in range(size):
+                i = row * size + col
+                digit = self.value(i)
+                original = self.originals[i]
+                cells.append({
+                    'value': str(digit) if digit else "",
+                    'region': self.region(i),
+                    'tile': self.is_tile(i),
+                    'yellow': self.is_yellow(i),
+                    'original_value': str(original) if original else "",
+                    'increment_value': self.increments[i],
+                    'contributing_tiles': [divmod(t, size) for t in sorted(self.contributors.get(i, ()))]
+                })
+            rows.append(cells)
+        return rows
+
+    def to_cells(self, cell_class):
+        """Rebuild grid_data using the editor's GridCell class"""
+        rows = self.to_dicts()
+        grid_data = [[cell_class.from_dict(d) for d in row] for row in rows]
+        for row in grid_data:
+            for cell in row:
+                # from_dict keeps lists; the editor stores (row, col) tuples
+                cell.contributing_tiles = {tuple(t) for t in cell.contributing_tiles}
+        return grid_data
+
+    # The puzzle_layout.csv format written by LogicPuzzleGrid.save_layout
+
+    @classmethod
+    def from_csv(cls, filename, size=None):
+        """Read a layout; size None takes it from the largest row/col listed"""
+        with open(filename, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)  # Skip header row
+            rows = [row for row in reader if len(row) >= 4]
+        if size is None:
+            size = max((max(int(row[0]), int(row[1])) + 1 for row in rows), default=11)
+        grid = cls(size)
+        for row in rows:
+            r, c = int(row[0]), int(row[1])
+            if 0 <= r < size and 0 <= c < size:
+                i = r * size + c
+                if row[2].isdigit() and 1 <= int(row[2]) <= 9:
+                    grid.set_value(i, int(row[2]))
+                if row[3] != "":
+                    grid.set_region(i, int(row[3]))
+                if len(row) > 4 and row[4] == "1":
+                    grid.flags[i] |= YELLOW
+        return grid
+
+    def to_csv(self, filename):
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Row', 'Col', 'Value', 'Region', 'Yellow'])
+            for row in range(self.size):
+                for col in range(self.size):
+                    i = row * self.size + col
+                    digit = self.value(i)
+                    region = self.region(i)
+                    writer.writerow([
+                        row,
+                        col,
+                        str(digit) if digit else "",
+                        "" if region is None else str(region),
+                        "1" if self.is_yellow(i) else "0"
+                    ])
@@ -0,0 +1,169 @@
+"""Memoized clue candidate lists, kept in memory and on disk.
+
+Results of Clue.candidates() are keyed by the clue (type and parameters),
+the per-position digit masks (which also fix the run length) and the
+result limit. Lookups try an in-memory LRU first, then a sqlite file in the
+cache directory; misses are computed and written back in batches. The
+store records CACHE_VERSION and is emptied when it does not match, so bump
+it whenever clue semantics or the enumeration change.
+
+The cache directory defaults to ~/.cache/number-cross-5 and can be moved
+with the NUMBER_CROSS_CACHE environment variable. A cache built with
+cache_dir=None never touches the disk.
+"""
+import atexit
+import os
+import sqlite3
+from array import array
+from collections import OrderedDict
+
+CACHE_VERSION = 1
+CACHE_FILE = "clue-candidates.sqlite"
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NUMBER_CROSS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "number-cross-5"))
+
+# Entries kept in memory, and new entries buffered before a disk write
+MEMORY_ENTRIES = 65536
+FLUSH_EVERY = 512
+
+# Candidates are stored as int64; longer runs are only cached in memory
+MAX_STORED_LENGTH = 18
+
+
+class ClueCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_entries=MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.pending = []
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+        self.pid = None
+
+    def candidates(self, clue, masks, limit=None):
+        """clue.candidates(masks, limit), computed at most once per key.
+
+        The returned list is shared between callers and must not be changed.
+        """
+        masks = tuple(masks)
+        clue_key = clue.cache_key()
+        if limit is not None:
+            # A full list already known answers any limit
+            full = self._lookup((clue_key, masks, 0))
+            if full is not None:
+                return full[:limit]
+        key = (clue_key, masks, limit or 0)
+        found = self._lookup(key)
+        if found is not None:
+            return found
+        self.misses += 1
+        found = clue.candidates(list(masks), limit)
+        self._remember(key, found)
+        if len(masks) <= MAX_STORED_LENGTH and self._connection() is not None:
+            self.pending.append(key + (found,))
+            if len(self.pending) >= FLUSH_EVERY:
+                self.flush()
+        return found
+
+    def _lookup(self, key):
+        found = self.memory.get(key)
+        if found is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return found
+        db = self._connection()
+        if db is None or len(key[1]) > MAX_STORED_LENGTH:
+            return None
+        row = db.execute(
+            "SELECT numbers FROM candidates WHERE clue = ? AND masks = ? AND lim = ?",
+            (key[0], array('H', key[1]).tobytes(), key[2])
+        ).fetchone()
+        if row is None:
+            return None
+        found = array('q', row[0]).tolist()
+        self.disk_hits += 1
+        self._remember(key, found)
+        return found
+
+    def _remember(self, key, found):
+        self.memory[key] = found
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _connection(self):
+        """The sqlite store, reopened after a fork, or None when running in memory"""
+        if self.cache_dir is None:
+            return None
+        if self.pid == os.getpid():
+            return self.db
+        # A connection inherited through fork must not be used by the child
+        self.db = None
+        self.pending = []
+        self.pid = os.getpid()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.cache_dir, CACHE_FILE), timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS candidates ("
+                "clue TEXT, masks BLOB, lim INTEGER, numbers BLOB, "
+                "PRIMARY KEY (clue, masks, lim))"
+            )
+            row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != str(CACHE_VERSION):
+                db.execute("DELETE FROM candidates")
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(CACHE_VERSION),))
+            db.commit()
+        except (OSError, sqlite3.Error):
+            # An unwritable cache directory only costs the persistence
+            return None
+        self.db = db
+        return db
+
+    def flush(self):
+        """Write buffered entries to disk"""
+        if not self.pending or self._connection() is None:
+            return
+        rows = [(clue, array('H', masks).tobytes(), lim, array('q', found).tobytes())
+                for clue, masks, lim, found in self.pending]
+        self.pending = []
+        try:
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO candidates VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Forget every entry, in memory and on disk"""
+        self.memory.clear()
+        self.pending = []
+        db = self._connection()
+        if db is not None:
+            with db:
+                db.execute("DELETE FROM candidates")
+
+    def close(self):
+        self.flush()
+        if self.db is not None and self.pid == os.getpid():
+            self.db.close()
+        self.db = None
+        self.pid = None
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The process-wide cache in DEFAULT_CACHE_DIR, flushed at exit"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ClueCache()
+        atexit.register(_default_cache.close)
+    return _default_cache
+
+
+def cached_candidates(clue, masks, limit=None):
+    return default_cache().candidates(clue, masks, limit)
@@ -0,0 +1,591 @@
+"""Row clues for the Number Cross 5 grid.
+
+Each row label from puzzle-grid.py is parsed into a Clue object that can
+test a single number and enumerate every number of a given length whose
+digits fit a per-position pattern. Patterns are lists of 9-bit masks where
+bit d-1 set means digit d is allowed in that position (digits are 1-9, the
+grid has no zeros).
+
+Enumeration is digit dynamic programming: a forward pass collects the
+states (remainder, product, ...) reachable at each position, a backward
+pass keeps only the states that can still end in an accepting one, and the
+numbers are then read off the surviving transitions. The work is bounded by
+the state space and the size of the answer, never by 10^length.
+"""
+from bisect import bisect_left
+from math import gcd, isqrt
+
+from clueCache import cached_candidates
+
+ALL_DIGITS = 0x1FF
+ODD_DIGITS = 0x155  # 1, 3, 5, 7, 9
+
+# Primes are screened by their remainder modulo 2*3*5*7 before testing
+PRIME_WHEEL = 210
+
+# Small primes for trial division ahead of Miller-Rabin; testing against
+# the first thirteen primes (2 to 41) as bases is exact for every
+# n < 3.3 * 10^24, and longer runs fall back to Baillie-PSW
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+MILLER_RABIN_BASES = SMALL_PRIMES[:13]
+MILLER_RABIN_LIMIT = 3317044064679887385961981
+
+# Fibonacci numbers are looked up in a table covering 11-digit runs
+FIBONACCI_LIMIT = 10 ** 11
+
+
+def digit_mask(digits):
+    """Build a 9-bit mask from an iterable of digits 1-9"""
+    mask = 0
+    for d in digits:
+        mask |= 1 << (int(d) - 1)
+    return mask
+
+
+def mask_digits(mask):
+    """List the digits allowed by a 9-bit mask in ascending order"""
+    return [d for d in range(1, 10) if mask >> (d - 1) & 1]
+
+
+def range_mask(low, high):
+    """Mask allowing every digit from low to high inclusive"""
+    if low > high:
+        return 0
+    return ((1 << (high - low + 1)) - 1) << (low - 1)
+
+
+def pattern_masks(*positions):
+    """Masks from per-position digit strings; an empty string allows 1-9"""
+    return [digit_mask(p) if p else ALL_DIGITS for p in positions]
+
+
+def fits(value, masks):
+    """Check that a number has len(masks) digits, each allowed by its mask"""
+    digits = str(value)
+    if len(digits) != len(masks):
+        return False
+    for ch, mask in zip(digits, masks):
+        if ch == '0' or not mask >> (ord(ch) - 49) & 1:
+            return False
+    return True
+
+
+def is_prime(n):
+    """Miller-Rabin to the bases 2 to 41, deterministic below
+    MILLER_RABIN_LIMIT; above it the Baillie-PSW test, which has no known
+    counterexample"""
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < 10000:
+        return True  # No factor below 100
+    if n < MILLER_RABIN_LIMIT:
+        return all(_strong_probable_prime(n, a) for a in MILLER_RABIN_BASES)
+    return _strong_probable_prime(n, 2) and _strong_lucas_probable_prime(n)
+
+
+def _strong_probable_prime(n, a):
+    """One Miller-Rabin round of odd n to base a"""
+    d = n - 1
+    shift = 0
+    while not d & 1:
+        d >>= 1
+        shift += 1
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(shift - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _jacobi(a, n):
+    """Jacobi symbol (a/n) for odd positive n"""
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas_probable_prime(n):
+    """Strong Lucas test of odd n > 97 with Selfridge's parameters: D is the
+    first of 5, -7, 9, -11, ... with (D/n) = -1, P = 1 and Q = (1 - D) / 4"""
+    root = isqrt(n)
+    if root * root == n:
+        return False  # No such D exists for a square
+    D = 5
+    while True:
+        jacobi = _jacobi(D, n)
+        if jacobi == -1:
+            break
+        if jacobi == 0:
+            return False  # D shares a factor with n, and n > |D|
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+    d = n + 1
+    shift = 0
+    while not d & 1:
+        d >>= 1
+        shift += 1
+
+    # U_k, V_k and Q^k for k running over the prefixes of d in binary
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U = U * V % n
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == '1':
+            U, V = U + V, D * U + V
+            # Halve modulo n: n is odd, so adding it makes the value even
+            U = (U + n if U & 1 else U) // 2 % n
+            V = (V + n if V & 1 else V) // 2 % n
+            Qk = Qk * Q % n
+    if U == 0 or V == 0:
+        return True
+    for _ in range(shift - 1):
+        V = (V * V - 2 * Qk) % n
+        if V == 0:
+            return True
+        Qk = Qk * Qk % n
+    return False
+
+
+def fibonacci_numbers(limit):
+    """All Fibonacci numbers below limit, in ascending order"""
+    if limit <= FIBONACCI_LIMIT:
+        return FIBONACCI_TABLE[:bisect_left(FIBONACCI_TABLE, limit)]
+    return _fibonacci_table(limit)
+
+
+def _fibonacci_table(limit):
+    fibs = []
+    a, b = 1, 2
+    while a < limit:
+        fibs.append(a)
+        a, b = b, a + b
+    return fibs
+
+
+FIBONACCI_TABLE = _fibonacci_table(FIBONACCI_LIMIT)
+FIBONACCI_SET = frozenset(FIBONACCI_TABLE)
+
+
+def is_fibonacci(n):
+    """Table lookup below FIBONACCI_LIMIT, the 5n^2 +- 4 square test above"""
+    if n < FIBONACCI_LIMIT:
+        return n in FIBONACCI_SET
+    for m in (5 * n * n + 4, 5 * n * n - 4):
+        root = isqrt(m)
+        if root * root == m:
+            return True
+    return False
+
+
+def fibonacci_between(low, high):
+    """Whether some Fibonacci number f has low <= f < high"""
+    if high <= FIBONACCI_LIMIT:
+        i = bisect_left(FIBONACCI_TABLE, low)
+        return i < len(FIBONACCI_TABLE) and FIBONACCI_TABLE[i] < high
+    return any(low <= f < high for f in fibonacci_numbers(high))
+
+
+class Clue:
+    """A row clue described as a digit automaton.
+
+    Subclasses implement start/step/accept_state. step returns None when no
+    number with the given prefix can satisfy the clue. accept gets the final
+    state and the number itself, so clues whose state only screens
+    candidates (primes) can run a last exact test.
+    """
+
+    def __init__(self, label):
+        self.label = label
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.label!r})"
+
+    def cache_key(self):
+        """Clue type and parameters, as used by clueCache"""
+        return self.__class__.__name__
+
+    def start(self, length):
+        return 0
+
+    def step(self, state, digit, position, length):
+        return state
+
+    def accept_state(self, state):
+        return True
+
+    def accept(self, state, value):
+        return self.accept_state(state)
+
+    def matches(self, value):
+        """Check whether a zero-free number satisfies the clue"""
+        digits = str(value)
+        if '0' in digits:
+            return False
+        length = len(digits)
+        state = self.start(length)
+        for position, ch in enumerate(digits):
+            state = self.step(state, int(ch), position, length)
+            if state is None:
+                return False
+        return self.accept(state, value)
+
+    def path_masks(self, masks, max_states=None):
+        """Per position, the digits on some path through the automaton that
+        fits the masks and ends in an accepting state, found without listing
+        numbers. These are the digits of candidates(), or a superset when
+        accept() runs a further exact test. None if some position has more
+        than max_states states"""
+        length = len(masks)
+        layers = []
+        frontier = {self.start(length)}
+        for position in range(length):
+            edges = []
+            reached = set()
+            allowed = mask_digits(masks[position])
+            for state in frontier:
+                for d in allowed:
+                    nxt = self.step(state, d, position, length)
+                    if nxt is not None:
+                        edges.append((state, d, nxt))
+                        reached.add(nxt)
+            if max_states is not None and len(reached) > max_states:
+                return None
+            layers.append(edges)
+            frontier = reached
+
+        digits = [0] * length
+        live = {state for state in frontier if self.accept_state(state)}
+        for position in range(length - 1, -1, -1):
+            alive = set()
+            for state, d, nxt in layers[position]:
+                if nxt in live:
+                    alive.add(state)
+                    digits[position] |= 1 << (d - 1)
+            live = alive
+        return digits
+
+    def candidates(self, masks, limit=None):
+        """Every number whose digits fit the per-position masks, ascending.
+
+        With a limit the search stops after that many numbers.
+        """
+        length = len(masks)
+        if length == 0:
+            return []
+        allowed = [mask_digits(m) for m in masks]
+
+        # Forward pass: reachable states and their transitions per position
+        layers = []
+        frontier = {self.start(length)}
+        for position in range(length):
+            edges = {}
+            reached = set()
+            for state in frontier:
+                out = []
+                for d in allowed[position]:
+                    nxt = self.step(state, d, position, length)
+                    if nxt is not None:
+                        out.append((d, nxt))
+                        reached.add(nxt)
+                edges[state] = out
+            layers.append(edges)
+            frontier = reached
+
+        # Backward pass: keep only transitions that can still be accepted
+        live = {state for state in frontier if self.accept_state(state)}
+        for position in range(length - 1, -1, -1):
+            edges = layers[position]
+            alive = set()
+            for state, out in edges.items():
+                kept = [(d, nxt) for d, nxt in out if nxt in live]
+                edges[state] = kept
+                if kept:
+                    alive.add(state)
+            live = alive
+        if not live:
+            return []
+
+        results = []
+
+        def emit(position, state, value):
+            if position == length:
+                if self.accept(state, value):
+                    results.append(value)
+                return
+            for d, nxt in layers[position][state]:
+                emit(position + 1, nxt, value * 10 + d)
+                if limit is not None and len(results) >= limit:
+                    return
+
+        emit(0, self.start(length), 0)
+        return results
+
+
+class SquareClue(Clue):
+    # State is the prefix value; prune when no square starts with it
+    def step(self, state, digit, position, length):
+        value = state * 10 + digit
+        scale = 10 ** (length - position - 1)
+        low = value * scale
+        high = low + scale - 1
+        root = isqrt(high)
+        if root * root < low:
+            return None
+        return value
+
+    def accept(self, state, value):
+        root = isqrt(value)
+        return root * root == value
+
+    def candidates(self, masks, limit=None):
+        """Squares fitting the masks via DP over the root's low digits.
+
+        The last j digits of n*n depend only on n mod 10^j, so root residues
+        are grown one digit at a time and dropped as soon as the square's
+        trailing digits leave the pattern.
+        """
+        length = len(masks)
+        if length == 0:
+            return []
+        low_root = isqrt(10 ** (length - 1) - 1) + 1
+        high_root = isqrt(10 ** length - 1)
+        fixed = length // 2
+
+        residues = [0]
+        scale = 1
+        for j in range(fixed):
+            mask = masks[length - 1 - j]
+            grown = []
+            for r in residues:
+                for d in range(10):
+                    root = r + d * scale
+                    digit = (root * root // scale) % 10
+                    if digit and mask >> (digit - 1) & 1:
+                        grown.append(root)
+            residues = grown
+            scale *= 10
+
+        results = []
+        for r in residues:
+            root = r + max(0, -(-(low_root - r) // scale)) * scale
+            while root <= high_root:
+                square = root * root
+                if fits(square, masks):
+                    results.append(square)
+                    if limit is not None and len(results) >= limit:
+                        return sorted(results)
+                root += scale
+        results.sort()
+        return results
+
+
+class ProductClue(Clue):
+    def __init__(self, label, product):
+        super().__init__(label)
+        self.product = product
+
+    def cache_key(self):
+        return f"{self.__class__.__name__}:{self.product}"
+
+    def start(self, length):
+        return 1
+
+    def step(self, state, digit, position, length):
+        state *= digit
+        if self.product % state:
+            return None
+        return state
+
+    def accept_state(self, state):
+        return state == self.product
+
+
+class MultipleClue(Clue):
+    def __init__(self, label, modulus):
+        super().__init__(label)
+        self.modulus = modulus
+
+    def cache_key(self):
+        return f"{self.__class__.__name__}:{self.modulus}"
+
+    def step(self, state, digit, position, length):
+        return (state * 10 + digit) % self.modulus
+
+    def accept_state(self, state):
+        return state == 0
+
+
+class DivisibleByDigitsClue(Clue):
+    # State is (value mod 2520, lcm of digits so far); 2520 = lcm(1..9)
+    def start(self, length):
+        return (0, 1)
+
+    def step(self, state, digit, position, length):
+        remainder, lcm = state
+        return ((remainder * 10 + digit) % 2520, lcm * digit // gcd(lcm, digit))
+
+    def accept_state(self, state):
+        remainder, lcm = state
+        return remainder % lcm == 0
+
+
+class OddPalindromeClue(Clue):
+    # State is the prefix value so mirrored positions can be compared
+    def step(self, state, digit, position, length):
+        mirror = length - 1 - position
+        if mirror < position:
+            if digit != (state // 10 ** (position - 1 - mirror)) % 10:
+                return None
+        if position == length - 1 and digit % 2 == 0:
+            return None
+        return state * 10 + digit
+
+    def path_masks(self, masks, max_states=None):
+        """Mirrored positions share their digits; the outer two are odd"""
+        length = len(masks)
+        digits = [masks[i] & masks[length - 1 - i] for i in range(length)]
+        if length:
+            digits[0] &= ODD_DIGITS
+            digits[-1] &= ODD_DIGITS
+        return digits if all(digits) else [0] * length
+
+    def candidates(self, masks, limit=None):
+        """Only the first half is free; each digit must fit both mirrored masks"""
+        length = len(masks)
+        if length == 0:
+            return []
+        half = (length + 1) // 2
+        allowed = []
+        for i in range(half):
+            mask = masks[i] & masks[length - 1 - i]
+            if i == 0:
+                mask &= ODD_DIGITS
+            if not mask:
+                return []
+            allowed.append(mask_digits(mask))
+
+        results = []
+
+        def emit(position, prefix):
+            if position == half:
+                tail = prefix[:length - half][::-1]
+                results.append(int(prefix + tail))
+                return
+            for d in allowed[position]:
+                emit(position + 1, prefix + str(d))
+                if limit is not None and len(results) >= limit:
+                    return
+
+        emit(0, "")
+        return results
+
+
+class FibonacciClue(Clue):
+    def step(self, state, digit, position, length):
+        value = state * 10 + digit
+        scale = 10 ** (length - position - 1)
+        low = value * scale
+        high = low + scale
+        if not fibonacci_between(low, high):
+            return None
+        return value
+
+    def accept(self, state, value):
+        return is_fibonacci(value)
+
+    def candidates(self, masks, limit=None):
+        """There are at most five Fibonacci numbers of any length"""
+        length = len(masks)
+        if length == 0:
+            return []
+        low = 10 ** (length - 1)
+        fibs = fibonacci_numbers(10 ** length)
+        results = [f for f in fibs[bisect_left(fibs, low):] if fits(f, masks)]
+        return results if limit is None else results[:limit]
+
+
+class PrimeClue(Clue):
+    # State is the value modulo the wheel; only units of the wheel survive
+    def step(self, state, digit, position, length):
+        return (state * 10 + digit) % PRIME_WHEEL
+
+    def accept_state(self, state):
+        return gcd(state, PRIME_WHEEL) == 1 or state in (2, 3, 5, 7)
+
+    def accept(self, state, value):
+        return self.accept_state(state) and is_prime(value)
+
+
+class AnyNumberClue(Clue):
+    """A blank row label: every number fits"""
+
+
+def parse_clue(label):
+    """Turn a row label such as 'Multiple of 13' into a Clue; a blank label
+    puts no constraint on the row"""
+    text = label.strip()
+    lowered = text.lower()
+    if not text:
+        return AnyNumberClue(text)
+    if lowered == "square":
+        return SquareClue(text)
+    if lowered.startswith("product of digits is "):
+        return ProductClue(text, int(text.rsplit(" ", 1)[1]))
+    if lowered.startswith("multiple of "):
+        return MultipleClue(text, int(text.rsplit(" ", 1)[1]))
+    if lowered == "divisible by each of its digits":
+        return DivisibleByDigitsClue(text)
+    if lowered == "odd and a palindrome":
+        return OddPalindromeClue(text)
+    if lowered == "fibonacci":
+        return FibonacciClue(text)
+    if lowered == "prime":
+        return PrimeClue(text)
+    raise ValueError(f"Unsupported row clue: {label}")
+
+
+# One generator per row label, for scripts that want a plain list; results
+# are memoized in the shared clue cache
+
+def squares(masks):
+    return cached_candidates(SquareClue("Square"), masks)
+
+
+def digit_products(product, masks):
+    return cached_candidates(ProductClue(f"Product of Digits is {product}", product), masks)
+
+
+def multiples(modulus, masks):
+    return cached_candidates(MultipleClue(f"Multiple of {modulus}", modulus), masks)
+
+
+def divisible_by_digits(masks):
+    return cached_candidates(DivisibleByDigitsClue("Divisible by Each of its Digits"), masks)
+
+
+def odd_palindromes(masks):
+    return cached_candidates(OddPalindromeClue("Odd and a Palindrome"), masks)
+
+
+def fibonaccis(masks):
+    return cached_candidates(FibonacciClue("Fibonacci"), masks)
+
+
+def primes(masks):
+    return cached_candidates(PrimeClue("Prime"), masks)
@@ -0,0 +1,180 @@
+"""Count the solutions of layouts, up to a cap, to check they are unique.
+
+    python countSolutions.py puzzle_layout.csv [more.csv layouts/] [--cap 2] [--seconds 600] [--json]
+
+A layout is unique when it has exactly one fill (digits and tiles; ways
+of spreading the same increments count once, as in Solver). Counting
+stops as soon as `cap` fills are known, so the default cap of 2 answers
+"none, one or many" without listing every solution. The exit status is 0
+when every layout is unique.
+
+The count runs the solver's row-by-row search, split at row boundaries:
+whatever the rows from `row` down can be depends on the rows above only
+through an interface of
+  * the carry between the two rows
+  * the tiles of rows row-1, row and row+1
+  * the digits of regions already chosen that still matter below: regions
+    with cells in the rows left, and regions next to one not chosen yet
+Different ways of filling the top part often meet at the same interface
+(fills that differ away from the boundary, or in how increments were
+spread), and the part below is then counted once and cached. Each cached
+entry keeps up to `cap` distinct completions rather than a number, so two
+paths that end in the same fill are not counted twice. SolutionCounter
+only wraps Solver._search with the cache; a fill found, or a cache hit,
+adds its rows to every search still running above it. The part below is
+not split any further: every pair of neighbouring rows is linked by tiles
+and by the rule that neighbouring regions differ, so the rows never fall
+apart into independent groups.
+"""
+import argparse
+import json
+import sys
+import time
+
+from batchSolve import find_layouts
+from gridFile import read_layout
+from solver import Solver
+
+DEFAULT_CAP = 2
+
+
+class SolutionCounter(Solver):
+    """Solver that counts distinct fills up to a cap, caching sub-searches"""
+
+    def __init__(self, layout, cache=None):
+        super().__init__(layout, cache)
+        n = self.size
+        first_row = {}
+        last_row = {}
+        for r in range(n):
+            for region in self.region_of[r]:
+                first_row.setdefault(region, r)
+                last_row[region] = r
+        # Chosen region digits the rows from r down still depend on
+        self.live_slots = []
+        for r in range(n):
+            live = []
+            for region, first in first_row.items():
+                if first > r:
+                    continue
+                if last_row[region] >= r or any(first_row[other] > r for other in self.region_neighbors[region]):
+                    live.append(self.region_slot[region])
+            self.live_slots.append(sorted(live))
+
+    def count(self, cap=DEFAULT_CAP):
+        """Number of distinct fills, counting stops at `cap`"""
+        self.cap = cap
+        self.memo = {}
+        self.hits = 0
+        self.fills = set()
+        # Searches still running, as (top row, fills of the rows from there)
+        self.open = [(0, self.fills)]
+        self.solve()
+        return min(len(self.fills), cap)
+
+    def _done(self):
+        return self.stopped or len(self.fills) >= self.cap
+
+    def _interface(self, row, carry):
+        tiles = self.tiles
+        state = self.state
+        above = tiles[row - 1] if row > 0 else 0
+        return (row, carry, above, tiles[row], tiles[row + 1],
+                tuple(state[slot] for slot in self.live_slots[row]))
+
+    def _search(self, row, carry):
+        """Solver._search, with the distinct fills of the rows from `row`
+        down cached by interface"""
+        key = self._interface(row, carry)
+        found = self.memo.get(key)
+        if found is not None:
+            self.hits += 1
+            self._found(row, found)
+            return
+        found = set()
+        self.open.append((row, found))
+        try:
+            super()._search(row, carry)
+        finally:
+            self.open.pop()
+        # A search cut short by the clock is not the whole answer; one cut
+        # short by the cap ends the whole count, so it does no harm
+        if not self.stopped:
+            self.memo[key] = found
+
+    def _record(self):
+        self._found(self.size, {()})
+
+    def _found(self, row, completions):
+        """Add fills of the rows from `row` down, each a tuple of (tile mask,
+        digits) per row, to every search still running above them"""
+        n = self.size
+        rows = tuple((self.tiles[r], tuple(self.state[r * n:r * n + n])) for r in range(row))
+        for top, found in self.open:
+            prefix = rows[top:]
+            found.update(prefix + rest for rest in completions)
+
+
+def uniqueness(count, cap, stopped):
+    if stopped:
+        return f"at least {count} solution(s), stopped early"
+    if count == 0:
+        return "no solution"
+    if count == 1:
+        return "unique"
+    if count >= cap:
+        return f"not unique (at least {cap} solutions)"
+    return f"not unique ({count} solutions)"
+
+
+def count_file(path, cap=DEFAULT_CAP, seconds=None):
+    layout = read_layout(path)
+    counter = SolutionCounter(layout)
+    start = time.perf_counter()
+    if seconds is not None:
+        deadline = start + seconds
+        counter.stop_check = lambda: time.perf_counter() > deadline
+    count = counter.count(cap)
+    return {
+        'layout': path,
+        'solutions': count,
+        'cap': cap,
+        'unique': count == 1 and not counter.stopped,
+        'stopped': counter.stopped,
+        'report': uniqueness(count, cap, counter.stopped),
+        'nodes': counter.nodes,
+        'cached_states': len(counter.memo),
+        'cache_hits': counter.hits,
+        'seconds': round(time.perf_counter() - start, 6)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count the solutions of Number Cross 5 layouts up to a cap")
+    parser.add_argument("inputs", nargs="*", default=["puzzle_layout.csv"],
+                        help="layout CSV or grid files, directories or glob patterns")
+    parser.add_argument("--cap", type=int, default=DEFAULT_CAP, help="stop counting at this many solutions")
+    parser.add_argument("--seconds", type=float, default=None, help="give up on a layout after this long")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    if args.cap < 1:
+        parser.error("--cap must be at least 1")
+
+    paths = find_layouts(args.inputs)
+    if not paths:
+        print("No layout files found", file=sys.stderr)
+        return 2
+    results = []
+    for path in paths:
+        result = count_file(path, args.cap, args.seconds)
+        results.append(result)
+        if not args.json:
+            print(f"{path}: {result['report']}; {result['nodes']} rows placed, "
+                  f"{result['cache_hits']} cache hits, {result['seconds']:.2f}s")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 0 if all(result['unique'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
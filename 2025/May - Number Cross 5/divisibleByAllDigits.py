@@ -1,8 +1,14 @@
-def divisible_by_all_digits(n):
-    digits = [int(d) for d in str(n)]
-    if 0 in digits:
-        return False
-    return all(n % d == 0 for d in digits)
+import sys
 
-results = [n for n in range(100, 10000) if divisible_by_all_digits(n) and str(n).startswith('78')]
+import clues
+import numpyScreening
+from clues import pattern_masks
+
+# --numpy screens by vectorized enumeration instead of digit DP
+backend = numpyScreening if "--numpy" in sys.argv else clues
+
+# 3- and 4-digit numbers starting with 78 that are divisible by each of their digits
+results = []
+for length in (3, 4):
+    results += backend.divisible_by_digits(pattern_masks('7', '8', *[""] * (length - 2)))
 print(results)
@@ -0,0 +1,236 @@
+"""Compact binary grid files, read through a memory map.
+
+    write_grid_file("states.ncg", [grid, (grid2, received2)], row_labels)
+    with GridFile("states.ncg") as states:
+        states.size, states.row_labels, len(states)
+        grid = states[k]                    # a BitGrid
+        grid, received = states.record(k)
+
+    python gridFile.py convert puzzle_layout.csv puzzle_layout.ncg
+    python gridFile.py info states.ncg
+
+A file is a HEADER, the row labels (UTF-8, one per line) and then any
+number of fixed-size records of size * size cells, each packed into
+CELL.size bytes:
+    region     int16, NO_REGION for none
+    value      digit 0-9 in the low nibble, YELLOW/TILE flags above it
+    original   digit before tile increments, 0 for none
+    received   four nibbles: increments from the tile above, below, left
+               and right of the cell
+Record k therefore starts at a fixed offset, and opening a file reads only
+the header and labels; records are decoded when asked for.
+
+BitGrid keeps only each cell's total increments and the set of tiles that
+gave them. The split between tiles, which the editor's tile_increments and
+a Solution's moves hold, travels alongside as `received`: cell index ->
+{tile index: increments}. Candidate masks are not stored; a cell either
+holds a digit or is undecided.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from bitGrid import BitGrid, TILE
+from solver import PuzzleLayout, clue_file, write_row_labels
+
+MAGIC = b"NC5G"
+VERSION = 1
+GRID_SUFFIX = ".ncg"
+
+HEADER = struct.Struct('<4sHHII')  # magic, version, size, label bytes, records
+CELL = struct.Struct('<hBBH')      # region, value | flags << 4, original, received
+
+# Where the tile of each `received` nibble sits, as (row, col) offsets
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def is_grid_file(filename):
+    return filename.lower().endswith(GRID_SUFFIX)
+
+
+def default_received(grid):
+    """`received` for a grid whose cells each have at most one contributing
+    tile, where the split is not in doubt"""
+    received = {}
+    for i, tiles in grid.contributors.items():
+        if len(tiles) > 1:
+            raise ValueError(f"Cell {grid.coords(i)} has increments from several tiles; pass their split")
+        if tiles:
+            received[i] = {next(iter(tiles)): grid.increments[i]}
+    return received
+
+
+def received_from_moves(moves, size):
+    """`received` for a Solution's moves"""
+    received = {}
+    for (tile_row, tile_col), (row, col), amount in moves:
+        given = received.setdefault(row * size + col, {})
+        tile = tile_row * size + tile_col
+        given[tile] = given.get(tile, 0) + amount
+    return received
+
+
+def pack_grid(grid, received=None):
+    """One record's bytes"""
+    if received is None:
+        received = default_received(grid)
+    size = grid.size
+    buffer = bytearray(CELL.size * size * size)
+    for i in range(size * size):
+        row, col = divmod(i, size)
+        nibbles = 0
+        for tile, amount in received.get(i, {}).items():
+            offset = (tile // size - row, tile % size - col)
+            if offset not in DIRECTIONS:
+                raise ValueError(f"Cell {(row, col)} received increments from {divmod(tile, size)}, which is not next to it")
+            if not 0 <= amount <= 15:
+                raise ValueError(f"Cell {(row, col)} received {amount} increments from one tile")
+            nibbles |= amount << (4 * DIRECTIONS.index(offset))
+        CELL.pack_into(buffer, i * CELL.size, grid.regions[i],
+                       grid.value(i) | grid.flags[i] << 4, grid.originals[i], nibbles)
+    return bytes(buffer)
+
+
+def unpack_grid(buffer, size):
+    """(grid, received) from one record's bytes"""
+    grid = BitGrid(size)
+    received = {}
+    offsets = [dr * size + dc for dr, dc in DIRECTIONS]
+    for i, (region, packed, original, nibbles) in enumerate(CELL.iter_unpack(buffer)):
+        grid.regions[i] = region
+        flags = packed >> 4
+        grid.flags[i] = flags
+        if packed & 15:
+            grid.set_value(i, packed & 15)
+        elif flags & TILE:
+            grid.domains[i] = 0
+        grid.originals[i] = original
+        if nibbles:
+            given = {}
+            for direction, offset in enumerate(offsets):
+                amount = nibbles >> (4 * direction) & 15
+                if amount:
+                    given[i + offset] = amount
+            received[i] = given
+            grid.increments[i] = sum(given.values())
+            grid.contributors[i] = set(given)
+    return grid, received
+
+
+def write_grid_file(filename, records, row_labels=None):
+    """Write grids, or (grid, received) pairs, all of one size; returns the
+    number written. Records are streamed, so any iterable will do"""
+    labels = "\n".join(row_labels).encode() if row_labels else b""
+    count = 0
+    size = None
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(labels), 0))
+        f.write(labels)
+        for record in records:
+            grid, received = record if isinstance(record, tuple) else (record, None)
+            if size is None:
+                size = grid.size
+            elif grid.size != size:
+                raise ValueError(f"Record {count} is {grid.size}x{grid.size}, not {size}x{size}")
+            f.write(pack_grid(grid, received))
+            count += 1
+        # Size and count are only known now
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, size or 0, len(labels), count))
+    return count
+
+
+class GridFile:
+    """Read-only, memory-mapped view of a grid file"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{filename} is too short to be a grid file")
+        magic, version, self.size, label_bytes, self.count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} is not a version {VERSION} grid file")
+        labels = self.map[HEADER.size:HEADER.size + label_bytes].decode()
+        self.row_labels = labels.split("\n") if labels else None
+        self.start = HEADER.size + label_bytes
+        self.record_size = CELL.size * self.size * self.size
+        if len(self.map) < self.start + self.count * self.record_size:
+            self.close()
+            raise ValueError(f"{filename} is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def record(self, k):
+        """(grid, received) of record k"""
+        if not 0 <= k < self.count:
+            raise IndexError(f"Record {k} out of range")
+        offset = self.start + k * self.record_size
+        with memoryview(self.map) as view:
+            return unpack_grid(view[offset:offset + self.record_size], self.size)
+
+    def __getitem__(self, k):
+        return self.record(k)[0]
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self[k]
+
+    def layout(self, k=0):
+        return PuzzleLayout(self[k], self.row_labels)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_layout(filename):
+    """A PuzzleLayout from a layout CSV or the first record of a grid file"""
+    if is_grid_file(filename):
+        with GridFile(filename) as grids:
+            return grids.layout()
+    return PuzzleLayout.from_csv(filename)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and inspect binary Number Cross 5 grid files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="layout CSV to grid file, or the first record back to CSV")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    info = commands.add_parser("info", help="describe a grid file")
+    info.add_argument("filename")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        with GridFile(args.filename) as grids:
+            print(f"{args.filename}: {len(grids)} record(s) of {grids.size}x{grids.size}, "
+                  f"{os.path.getsize(args.filename)} bytes")
+            for i, label in enumerate(grids.row_labels or []):
+                print(f"  row {i}: {label}")
+        return 0
+
+    layout = read_layout(args.source)
+    if is_grid_file(args.target):
+        write_grid_file(args.target, [layout.grid], layout.row_labels)
+    else:
+        # The CSV format has no tiles or increments
+        layout.grid.to_csv(args.target)
+        write_row_labels(clue_file(args.target), layout.row_labels)
+    print(f"Wrote {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
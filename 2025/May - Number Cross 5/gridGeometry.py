@@ -0,0 +1,68 @@
+"""Adjacency tables for a square grid, built once per size.
+
+Cells are addressed both ways the code base uses: flat indices
+row * size + col (BitGrid, solver) and (row, col) tuples (editor). Every
+table lists orthogonal neighbours in the order up, down, left, right, so
+callers no longer rebuild neighbour lists or repeat bounds checks.
+
+    geo = grid_geometry(11)
+    geo.neighbors[i]             flat indices next to cell i
+    geo.neighbor_cells[(r, c)]   the same as (row, col) tuples
+    geo.rows[r], geo.cols[c]     flat indices of a row / column
+    geo.edges                    every adjacent pair (i, j) once, i < j
+    geo.boundary_edges(regions)  the edges whose two cells differ in region
+"""
+
+
+class GridGeometry:
+    def __init__(self, size):
+        self.size = size
+        count = size * size
+        self.neighbors = []
+        self.neighbor_cells = {}
+        for i in range(count):
+            row, col = divmod(i, size)
+            cells = tuple((r, c) for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                          if 0 <= r < size and 0 <= c < size)
+            self.neighbor_cells[(row, col)] = cells
+            self.neighbors.append(tuple(r * size + c for r, c in cells))
+        self.rows = [list(range(r * size, r * size + size)) for r in range(size)]
+        self.cols = [list(range(c, count, size)) for c in range(size)]
+        self.edges = [(i, j) for i in range(count) for j in self.neighbors[i] if i < j]
+
+    def index(self, row, col):
+        return row * self.size + col
+
+    def coords(self, index):
+        return divmod(index, self.size)
+
+    def boundary_edges(self, regions):
+        """Adjacent pairs lying in different regions; regions is indexed by cell"""
+        return [(i, j) for i, j in self.edges if regions[i] != regions[j]]
+
+    def is_contiguous(self, cells):
+        """Whether a collection of (row, col) cells is orthogonally connected"""
+        cells = set(cells)
+        if not cells:
+            return True
+        neighbor_cells = self.neighbor_cells
+        start = next(iter(cells))
+        visited = {start}
+        to_visit = [start]
+        while to_visit:
+            for adj in neighbor_cells[to_visit.pop()]:
+                if adj in cells and adj not in visited:
+                    visited.add(adj)
+                    to_visit.append(adj)
+        return len(visited) == len(cells)
+
+
+_geometries = {}
+
+
+def grid_geometry(size):
+    """The shared GridGeometry for a grid size"""
+    geometry = _geometries.get(size)
+    if geometry is None:
+        geometry = _geometries[size] = GridGeometry(size)
+    return geometry
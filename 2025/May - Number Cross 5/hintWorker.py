@@ -0,0 +1,95 @@
+"""Hints for the editor, computed in a background process.
+
+    worker = HintWorker()
+    worker.submit(grid, row_labels, given)   # after every edit
+    hints = worker.poll()                    # from a root.after loop; None if nothing new
+    worker.close()
+
+The process keeps a hints.CandidateTracker of the grid being edited. Each
+submission is loaded into it (only the cells that differ from the last
+one are updated), the propagated masks are sent back through a result
+queue at once, and then every improvement probing finds
+(hints.probe_hints). The Tk main loop never waits on propagation: it only
+polls, and draws the pencil marks of the newest result. Each submission gets a number, and a shared
+value holds the newest one. The worker checks it between steps, drops a
+job as soon as a newer one exists and skips queued jobs that were already
+superseded, so editing quickly never piles up stale work. poll() likewise
+ignores results for anything but the last submission.
+
+The process is started with the spawn method, so it inherits nothing of
+Tk. A grid is pickled when submitted, so later edits cannot race with it.
+"""
+import multiprocessing
+import queue
+
+from hints import CandidateTracker, Hints, probe_hints
+
+
+def _serve(jobs, results, latest):
+    """Worker process loop; a None job ends it"""
+    tracker = None
+    labels = None
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        number, grid, row_labels, given = job
+        if number != latest.value:
+            continue  # Superseded while it was queued
+        cancelled = lambda: latest.value != number
+        try:
+            if tracker is None or tracker.size != grid.size or row_labels != labels:
+                tracker = CandidateTracker(grid, row_labels, given)
+                labels = row_labels
+                problem = tracker.problem
+            else:
+                problem = tracker.load(grid, given)
+            if cancelled():
+                continue
+            results.put((number, tracker.hints(problem)))
+            if problem:
+                continue
+            for hints in probe_hints(tracker.copy(), cancelled):
+                if cancelled():
+                    break
+                results.put((number, hints))
+        except Exception as e:
+            tracker = None  # Part way through an update, so start afresh next time
+            results.put((number, Hints([], {}, f"Hints failed: {type(e).__name__}: {e}")))
+
+
+class HintWorker:
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        self.latest = context.Value('i', 0)
+        self.number = 0
+        self.process = context.Process(target=_serve, args=(self.jobs, self.results, self.latest), daemon=True)
+        self.process.start()
+
+    def submit(self, grid, row_labels, given=None):
+        """Start on a new grid state; work on earlier ones stops"""
+        self.number += 1
+        self.latest.value = self.number
+        self.jobs.put((self.number, grid, list(row_labels), dict(given or {})))
+
+    def poll(self):
+        """The newest hints for the last submission, or None if none arrived
+        since the last poll"""
+        hints = None
+        while True:
+            try:
+                number, found = self.results.get_nowait()
+            except queue.Empty:
+                return hints
+            if number == self.number:
+                hints = found
+
+    def close(self):
+        if self.process.is_alive():
+            self.latest.value = -1
+            self.jobs.put(None)
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.terminate()
@@ -0,0 +1,464 @@
+"""Pencil-mark hints for a partly solved grid, found by constraint propagation.
+
+    hints = compute_hints(grid, row_labels, given)
+    hints.masks[i]     digits cell i can still end up with, should it hold
+                       a digit (9-bit mask, 0 on tiles)
+    hints.forced       {i: digit} for empty cells that cannot be a tile and
+                       have a single digit left
+    hints.problem      why no fill fits, or None
+
+`grid` is a BitGrid of the editor state (digits entered, tiles, increments
+received) and `given` maps each tile index to the increments it has handed
+out so far. Tiles are placed one by one and nothing says when the last one
+is down, so every cell that could still take a tile is treated as a
+possible tile, as the solver's relaxed row masks do: a cell with a region,
+not yellow, not next to a tile and not fed by one. A cell can receive what
+the tiles next to it have left plus up to 9 from each possible tile next
+to it.
+
+Every region has a mask of base digits and every cell a mask of final
+digits, final = base + increments received + up to what the tiles and
+possible tiles next to it can still give. Three rules narrow the masks
+until nothing changes:
+  * a cell's digits are its region's digits shifted by its increments, and
+    the other way round
+  * a region whose digit is known rules it out of the regions next to it
+  * the cells of a row keep only the digits that some way of placing
+    the row's possible tiles leaves them, with every run of the row a
+    number satisfying the row clue; possible tiles that no such way uses
+    are ruled out
+A row only narrows its regions through cells that cannot be tiles. Runs
+with more than MAX_RUN_CHOICES digit combinations, whose candidate lists
+could be huge, are narrowed through the clue's automaton alone, when it is
+small enough (RunCandidates.path_masks). Rows with more than
+MAX_TILE_PATTERNS ways of placing tiles are not narrowed by the clue at
+all until more tiles are down. Going through a row's patterns is the
+costly step, so each row remembers its last answer and only does it again
+when the masks it starts from have changed.
+
+CandidateTracker keeps the masks of a grid being edited up to date; the
+hint worker (hintWorker.py) holds one, so none of this runs in the
+editor's Tk thread. probe_hints goes further: it tries every digit of
+every undecided region and rules out those that propagate to a
+contradiction, yielding better hints each time one is ruled out.
+iter_hints does both for a single grid.
+"""
+import copy
+
+from bitGrid import NO_REGION, POPCOUNT, SINGLE_DIGIT
+from clueCache import default_cache
+from clues import ALL_DIGITS, mask_digits
+from gridGeometry import grid_geometry
+from rules import row_clues
+from runSegments import RunCandidates, row_runs, tile_masks
+
+MAX_RUN_CHOICES = 10 ** 5
+MAX_TILE_PATTERNS = 256
+
+
+def shift_up(mask, low, high):
+    """Digits d + k for every digit d in mask and low <= k <= high"""
+    shifted = 0
+    for k in range(low, min(high, 8) + 1):
+        shifted |= mask << k
+    return shifted & ALL_DIGITS
+
+
+def shift_down(mask, low, high):
+    """Digits d - k for every digit d in mask and low <= k <= high"""
+    shifted = 0
+    for k in range(low, min(high, 8) + 1):
+        shifted |= mask >> k
+    return shifted
+
+
+class Hints:
+    """What propagation found out about one grid state"""
+
+    def __init__(self, masks, forced, problem=None):
+        self.masks = masks
+        self.forced = forced
+        self.problem = problem
+
+
+class Propagator:
+    """Region and cell masks of one grid state, narrowed by propagate()"""
+
+    def __init__(self, grid, row_labels, given=None, cache=None):
+        self.grid = grid
+        self.size = n = grid.size
+        self.given = dict(given or {})
+        cache = cache if cache is not None else default_cache()
+
+        # Rows with the same clue share one candidate lookup
+        lookups = {}
+        self.lookups = []
+        for clue in row_clues(row_labels):
+            if clue is not None and clue.cache_key() not in lookups:
+                lookups[clue.cache_key()] = RunCandidates(clue, cache)
+            self.lookups.append(lookups[clue.cache_key()] if clue is not None else None)
+
+        self.neighbors = grid_geometry(n).neighbors
+        self.build_regions()
+        self.tiles = [grid.is_tile(i) for i in range(n * n)]
+        self.empty = [not self.tiles[i] and not grid.value(i) for i in range(n * n)]
+        # Increments received so far, and the most a cell can end up with
+        self.low = list(grid.increments)
+        self.open = [self.cell_open(i) for i in range(n * n)]
+        self.patterns = [self.row_patterns(row) for row in range(n)]
+        self.high = [self.cell_high(i) for i in range(n * n)]
+        self.fixed = [self.cell_fixed(i) for i in range(n * n)]
+        # Last row narrowing by tile patterns: (cell masks and possible
+        # tiles it started from, masks kept, columns tileable)
+        self.row_fits = [None] * n
+        self.reset()
+
+    def build_regions(self):
+        """Region of every cell and which regions touch; cells without a
+        region get a private pseudo-region"""
+        grid = self.grid
+        n = self.size
+        self.regions = [grid.regions[i] if grid.regions[i] != NO_REGION else -(i + 1) for i in range(n * n)]
+        self.region_neighbors = {region: set() for region in self.regions}
+        for i, j in grid_geometry(n).boundary_edges(self.regions):
+            self.region_neighbors[self.regions[i]].add(self.regions[j])
+            self.region_neighbors[self.regions[j]].add(self.regions[i])
+        self.region_rows = {region: set() for region in self.regions}
+        for i in range(n * n):
+            self.region_rows[self.regions[i]].add(i // n)
+
+    def cell_open(self, i):
+        """Whether cell i could still take a tile"""
+        grid = self.grid
+        return (not self.tiles[i] and not grid.is_yellow(i) and grid.regions[i] != NO_REGION
+                and not self.low[i] and not grid.contributors.get(i)
+                and not any(self.tiles[j] for j in self.neighbors[i]))
+
+    def row_patterns(self, row):
+        """(tile mask, runs) for every way of placing the row's possible
+        tiles, or None if there are too many to go through"""
+        n = self.size
+        cells = range(row * n, row * n + n)
+        required = sum(1 << c for c, i in enumerate(cells) if self.tiles[i])
+        allowed = required | sum(1 << c for c, i in enumerate(cells) if self.open[i])
+        patterns = tile_masks(required, allowed, n, MAX_TILE_PATTERNS)
+        if patterns is None:
+            return None
+        return [(mask, row_runs(mask, n)) for mask in patterns]
+
+    def cell_high(self, i):
+        """Increments cell i may end up with: what it has, what the tiles
+        next to it have left, and 9 from each possible tile next to it"""
+        grid = self.grid
+        if self.tiles[i] or grid.is_yellow(i):
+            return self.low[i]
+        return self.low[i] + sum(grid.originals[j] - self.given.get(j, 0) if self.tiles[j] else 9
+                                 for j in self.neighbors[i] if self.tiles[j] or self.open[j])
+
+    def cell_fixed(self, i):
+        """The base digit cell i pins its region to, 0 for none: a tile keeps
+        its region's digit, and a digit entered elsewhere is that digit plus
+        the increments already in it. -1 when that is no digit at all"""
+        grid = self.grid
+        if self.tiles[i]:
+            digit = grid.originals[i]
+        elif grid.value(i):
+            digit = grid.value(i) - self.low[i]
+        else:
+            return 0
+        return digit if 1 <= digit <= 9 else -1
+
+    def reset(self):
+        """Masks back to what the cells alone allow"""
+        self.region_masks = {region: ALL_DIGITS for region in self.region_neighbors}
+        for i, digit in enumerate(self.fixed):
+            if digit:
+                self.region_masks[self.regions[i]] &= 1 << (digit - 1) if digit > 0 else 0
+        self.cell_masks = [0 if tile else ALL_DIGITS for tile in self.tiles]
+        self.maybe_tile = list(self.open)
+
+    def copy(self):
+        """A propagator that shares the layout but narrows its own masks"""
+        other = copy.copy(self)
+        other.region_masks = dict(self.region_masks)
+        other.cell_masks = list(self.cell_masks)
+        other.maybe_tile = list(self.maybe_tile)
+        other.row_fits = list(self.row_fits)
+        return other
+
+    def propagate(self, regions=None, rows=None):
+        """Narrow the masks until nothing changes, starting from the given
+        regions and rows (default: all); returns why no fill fits, or None"""
+        region_masks = self.region_masks
+        regions = set(region_masks) if regions is None else set(regions)
+        rows = set(range(self.size)) if rows is None else set(rows)
+        while regions or rows:
+            while regions:
+                region = regions.pop()
+                mask = region_masks[region]
+                if not mask:
+                    return f"Region {region} has no digit left"
+                rows.update(self.region_rows[region])
+                if POPCOUNT[mask] > 1:
+                    continue
+                # A known digit cannot be used next door
+                for other in self.region_neighbors[region]:
+                    if region_masks[other] & mask:
+                        region_masks[other] &= ~mask
+                        regions.add(other)
+            if rows:
+                problem = self.narrow_row(rows.pop(), regions)
+                if problem:
+                    return problem
+        return None
+
+    def narrow_row(self, row, regions):
+        """Narrow the cells of one row from their regions and the row clue,
+        adding every region that changed to `regions`"""
+        n = self.size
+        region_masks = self.region_masks
+        cell_masks = self.cell_masks
+        maybe_tile = self.maybe_tile
+        cells = range(row * n, row * n + n)
+        masks = []
+        for i in cells:
+            if self.tiles[i]:
+                masks.append(0)
+                continue
+            mask = cell_masks[i] & shift_up(region_masks[self.regions[i]], self.low[i], self.high[i])
+            if not mask and not maybe_tile[i]:
+                return f"Cell {divmod(i, n)} has no digit left"
+            masks.append(mask)
+
+        patterns = self.patterns[row]
+        if patterns is not None:
+            possible = 0
+            for c, i in enumerate(cells):
+                if self.tiles[i] or maybe_tile[i]:
+                    possible |= 1 << c
+            # Going through the patterns is the costly part; a row asked
+            # again with the same masks gets the same answer
+            key = (tuple(masks), possible)
+            fit = self.row_fits[row]
+            if fit is None or fit[0] != key:
+                fit = self.row_fits[row] = (key,) + self.fit_patterns(row, patterns, masks, possible)
+            masks, tileable = fit[1:]
+            if masks is None:
+                return f"Row {row}: no numbers fit however the tiles go"
+            for c, i in enumerate(cells):
+                if maybe_tile[i] and not tileable >> c & 1:
+                    maybe_tile[i] = False
+
+        for i, mask in zip(cells, masks):
+            if self.tiles[i]:
+                continue
+            cell_masks[i] = mask
+            if maybe_tile[i]:
+                continue  # A tile would not show its region's digit here
+            region = self.regions[i]
+            narrowed = region_masks[region] & shift_down(mask, self.low[i], self.high[i])
+            if narrowed != region_masks[region]:
+                region_masks[region] = narrowed
+                regions.add(region)
+        return None
+
+    def fit_patterns(self, row, patterns, masks, possible):
+        """Digits every cell keeps over the tile patterns of the row, within
+        the `possible` tile columns, whose runs all have a number fitting
+        the clue, and the columns some such pattern puts a tile in; (None,
+        0) if no pattern works"""
+        n = self.size
+        lookup = self.lookups[row]
+        fitted = {}
+        kept = [0] * n
+        tileable = 0
+        works = False
+        for pattern, runs in patterns:
+            if pattern & ~possible:
+                continue
+            found = []
+            for start, end in runs:
+                run = fitted.get((start, end))
+                if run is None:
+                    run = fitted[(start, end)] = self.fit_run(lookup, masks[start:end])
+                if not run[0]:
+                    break
+                found.append((start, run))
+            else:
+                works = True
+                tileable |= pattern
+                for start, run in found:
+                    for k, mask in enumerate(run):
+                        kept[start + k] |= mask
+        if not works:
+            return None, 0
+        return kept, tileable
+
+    @staticmethod
+    def fit_run(lookup, masks):
+        """The run's masks narrowed by the clue; all zero when nothing fits"""
+        choices = 1
+        for mask in masks:
+            if not mask:
+                return (0,) * len(masks)
+            choices *= POPCOUNT[mask]
+        if lookup is None:
+            return tuple(masks)
+        if choices > MAX_RUN_CHOICES:
+            return lookup.path_masks(masks) or tuple(masks)
+        return lookup.digit_masks(masks)
+
+    def hints(self, problem=None):
+        forced = {}
+        for i, mask in enumerate(self.cell_masks):
+            if self.empty[i] and not self.maybe_tile[i] and SINGLE_DIGIT[mask]:
+                forced[i] = SINGLE_DIGIT[mask]
+        return Hints(list(self.cell_masks), forced, problem)
+
+    def probe(self, region):
+        """Rule out the digits of a region that lead to a contradiction;
+        returns whether any was"""
+        ruled_out = 0
+        for d in mask_digits(self.region_masks[region]):
+            trial = self.copy()
+            trial.region_masks[region] = 1 << (d - 1)
+            if trial.propagate([region], ()) is not None:
+                ruled_out |= 1 << (d - 1)
+        self.region_masks[region] &= ~ruled_out
+        return bool(ruled_out)
+
+
+class CandidateTracker(Propagator):
+    """Propagated masks of a grid that is being edited.
+
+    update(changed) brings them up to date after cells change. Entering a
+    digit only narrows what is known, so propagation carries on from the
+    current masks, starting at the touched regions. Anything else (a digit
+    cleared, a tile placed or taken away, increments moved) can widen
+    masks, which propagation cannot undo: the per-cell inputs (possible
+    tiles, tile patterns, increments) are updated for the cells around the
+    change only, then the masks are narrowed again from scratch. That pass
+    is mostly lookups: rows whose masks come out as before reuse their
+    last answer, and every run's clue answer is memoized. load(grid) does
+    the same for a fresh copy of the grid, as the hint worker receives.
+    """
+
+    def __init__(self, grid, row_labels, given=None, cache=None):
+        super().__init__(grid, row_labels, given, cache)
+        self.problem = self.propagate()
+
+    def update(self, changed, given=None):
+        """Recompute after the cells at these indices changed; `given` is the
+        tiles' increments handed out, if that may have changed too. Returns
+        why no fill fits, or None"""
+        grid = self.grid
+        n = self.size
+        changed = set(changed)
+        if given is not None:
+            # A tile that handed out more changes what its neighbours can get
+            given = dict(given)
+            changed.update(j for j in set(given) | set(self.given) if given.get(j, 0) != self.given.get(j, 0))
+            self.given = given
+        narrowing = True
+        if any(self.regions[i] != (grid.regions[i] if grid.regions[i] != NO_REGION else -(i + 1))
+               for i in changed):
+            self.build_regions()
+            narrowing = False
+        rows = set()
+        near = set(changed)
+        for i in changed:
+            tile = grid.is_tile(i)
+            if tile != self.tiles[i]:
+                self.tiles[i] = tile
+                rows.add(i // n)
+                narrowing = False
+            self.empty[i] = not tile and not grid.value(i)
+            if grid.increments[i] != self.low[i]:
+                self.low[i] = grid.increments[i]
+                narrowing = False
+            near.update(self.neighbors[i])
+        # Whether a cell could take a tile depends on the tiles next to it,
+        # and what a cell can receive on whether its neighbours could
+        reach = set(near)
+        for i in near:
+            is_open = self.cell_open(i)
+            if is_open != self.open[i]:
+                self.open[i] = is_open
+                rows.add(i // n)
+                reach.update(self.neighbors[i])
+                narrowing = False
+        for row in rows:
+            self.patterns[row] = self.row_patterns(row)
+            self.row_fits[row] = None
+        for i in reach:
+            high = self.cell_high(i)
+            if high != self.high[i]:
+                self.high[i] = high
+                narrowing = False
+        fixed = {}
+        for i in changed:
+            digit = self.cell_fixed(i)
+            if digit != self.fixed[i]:
+                if self.fixed[i]:
+                    narrowing = False
+                self.fixed[i] = digit
+                fixed[i] = digit
+
+        if not narrowing:
+            self.reset()
+            self.problem = self.propagate()
+        elif fixed and not self.problem:
+            for i, digit in fixed.items():
+                self.region_masks[self.regions[i]] &= 1 << (digit - 1) if digit > 0 else 0
+            self.problem = self.propagate({self.regions[i] for i in fixed}, ())
+        return self.problem
+
+
+    def load(self, grid, given=None):
+        """Catch up with another copy of the grid: the cells that differ are
+        copied over and updated. Returns why no fill fits, or None"""
+        mine = self.grid
+        changed = []
+        for i in range(self.size * self.size):
+            state = grid.cell_state(i)
+            if mine.cell_state(i) != state:
+                mine.restore_cell_state(i, state)
+                changed.append(i)
+        return self.update(changed, given)
+
+
+def compute_hints(grid, row_labels, given=None, cache=None):
+    """Hints from propagation alone"""
+    propagator = Propagator(grid, row_labels, given, cache)
+    return propagator.hints(propagator.propagate())
+
+
+def iter_hints(grid, row_labels, given=None, cancelled=None, cache=None):
+    """Hints from propagation, then better ones as probing rules digits out.
+    Stops early once cancelled() returns true"""
+    propagator = Propagator(grid, row_labels, given, cache)
+    problem = propagator.propagate()
+    yield propagator.hints(problem)
+    if not problem:
+        yield from probe_hints(propagator, cancelled)
+
+
+def probe_hints(propagator, cancelled=None):
+    """Better hints each time probing rules a digit out, from a propagator
+    already narrowed without a problem (and narrowed further here)"""
+    progress = True
+    while progress:
+        progress = False
+        # Regions with fewest digits left first: they are quickest to settle
+        undecided = [region for region, mask in propagator.region_masks.items() if POPCOUNT[mask] > 1]
+        undecided.sort(key=lambda region: POPCOUNT[propagator.region_masks[region]])
+        for region in undecided:
+            if cancelled is not None and cancelled():
+                return
+            if POPCOUNT[propagator.region_masks[region]] < 2 or not propagator.probe(region):
+                continue
+            progress = True
+            problem = propagator.propagate([region], ())
+            yield propagator.hints(problem)
+            if problem:
+                return
@@ -0,0 +1,104 @@
+"""Undo/redo history made of per-cell deltas.
+
+A Journal knows nothing about the grid it records. It is given two
+callables: capture(key) returns a comparable snapshot of one cell and
+restore(key, snapshot) puts it back. Code about to change a cell calls
+touch(key) first; the journal captures the cell once per entry, and when
+the outermost group ends it keeps (key, before, after) only for cells that
+really changed. Undo and redo then cost time proportional to the cells an
+entry changed, never the grid.
+
+Groups nest, so a multi-step action (a tile placement and every increment
+it hands out) becomes one entry however many events it spans. Only the
+newest max_entries entries are kept.
+
+Besides the editor, the same class fits a BitGrid:
+    Journal(grid.cell_state, grid.restore_cell_state)
+"""
+from collections import deque
+
+MAX_ENTRIES = 500
+
+
+class Journal:
+    def __init__(self, capture, restore, max_entries=MAX_ENTRIES):
+        self.capture = capture
+        self.restore = restore
+        self.undo_stack = deque(maxlen=max_entries)
+        self.redo_stack = []
+        self.depth = 0
+        self.label = None
+        self.before = None
+        self.replaying = False
+
+    def begin(self, label=""):
+        """Open a group; the outermost label names the entry"""
+        if self.depth == 0:
+            self.label = label
+            self.before = {}
+        self.depth += 1
+
+    def touch(self, key):
+        """Call before changing a cell; outside a group this does nothing"""
+        if self.depth and not self.replaying and key not in self.before:
+            self.before[key] = self.capture(key)
+
+    def end(self):
+        """Close a group, recording an entry when the outermost one closes"""
+        if not self.depth:
+            return None
+        self.depth -= 1
+        if self.depth:
+            return None
+        changes = []
+        for key, before in self.before.items():
+            after = self.capture(key)
+            if after != before:
+                changes.append((key, before, after))
+        self.before = None
+        if not changes:
+            return None
+        entry = (self.label, changes)
+        self.undo_stack.append(entry)
+        self.redo_stack.clear()
+        return entry
+
+    def recording(self):
+        return self.depth > 0
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """Revert the newest entry; returns the keys it changed"""
+        if not self.undo_stack:
+            return []
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(entry)
+        return self._apply(entry[1], 1)
+
+    def redo(self):
+        """Reapply the newest undone entry; returns the keys it changed"""
+        if not self.redo_stack:
+            return []
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(entry)
+        return self._apply(entry[1], 2)
+
+    def _apply(self, changes, side):
+        self.replaying = True
+        try:
+            for change in changes:
+                self.restore(change[0], change[side])
+        finally:
+            self.replaying = False
+        return [change[0] for change in changes]
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.depth = 0
+        self.before = None
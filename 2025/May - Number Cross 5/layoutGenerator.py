@@ -0,0 +1,175 @@
+"""Random Number Cross 5 layouts of any size, for stress tests and benchmarks.
+
+    python layoutGenerator.py --size 25 --seed 7 [--count 5] [--out layouts]
+
+Each layout is written as <name>.csv in the save_layout format, which the
+editor and every solver script read, plus <name>.clues with one row label
+per line (picked up by PuzzleLayout.from_csv).
+
+Regions are grown together from random seed cells, one unclaimed neighbour
+at a time, so every region is contiguous and the whole grid is covered.
+There are never more than MAX_REGIONS of them, the most the editor takes,
+so past about 36x36 the regions get larger instead of more numerous.
+Each region is then checked to be contiguous, as the editor requires of a
+region entered as one selection. Yellow cells come in small clusters and
+row clues are drawn from every clue type parse_clue understands. Nothing guarantees that a
+generated layout has a solution; it is meant to exercise the code, not to
+be a good puzzle. The same size and seed always give the same layout.
+"""
+import argparse
+import os
+import random
+import sys
+
+from bitGrid import BitGrid, YELLOW
+from clues import parse_clue
+from gridGeometry import grid_geometry
+from solver import PuzzleLayout, clue_file, write_row_labels
+
+# The hand-drawn 11x11 puzzle has about this many cells per region and
+# this share of yellow cells
+CELLS_PER_REGION = 13
+YELLOW_FRACTION = 0.12
+MAX_YELLOW_CLUSTER = 3
+# Region numbers the editor accepts run from 1 to 99
+MAX_REGIONS = 99
+
+FIXED_LABELS = [
+    "Square",
+    "Divisible by Each of its Digits",
+    "Odd and a Palindrome",
+    "Fibonacci",
+    "Prime"
+]
+
+
+def random_label(rng):
+    """A row clue of a random type; parameterised ones get random numbers"""
+    kind = rng.randrange(len(FIXED_LABELS) + 2)
+    if kind == len(FIXED_LABELS):
+        product = 1
+        for _ in range(rng.randint(2, 4)):
+            product *= rng.randint(2, 9)
+        return f"Product of Digits is {product}"
+    if kind == len(FIXED_LABELS) + 1:
+        return f"Multiple of {rng.randint(3, 99)}"
+    return FIXED_LABELS[kind]
+
+
+def grow_regions(size, count, rng):
+    """regions[i] for every cell: `count` contiguous regions numbered 1..count.
+
+    Each step picks a region uniformly (not a frontier cell, which would
+    favour regions that are already large) and claims one cell next to it."""
+    neighbors = grid_geometry(size).neighbors
+    regions = [0] * (size * size)
+    frontiers = {}
+    for region, i in enumerate(rng.sample(range(size * size), count), 1):
+        regions[i] = region
+        frontiers[region] = list(neighbors[i])
+    active = list(frontiers)
+    while active:
+        k = rng.randrange(len(active))
+        region = active[k]
+        frontier = frontiers[region]
+        i = None
+        while frontier and i is None:
+            j = rng.randrange(len(frontier))
+            frontier[j], frontier[-1] = frontier[-1], frontier[j]
+            if not regions[frontier[-1]]:
+                i = frontier[-1]
+            frontier.pop()
+        if i is None:
+            # Boxed in by other regions
+            active[k] = active[-1]
+            active.pop()
+            continue
+        regions[i] = region
+        frontier.extend(j for j in neighbors[i] if not regions[j])
+    return regions
+
+
+def yellow_cells(size, fraction, rng):
+    """About fraction * size^2 cells in clusters of up to MAX_YELLOW_CLUSTER"""
+    neighbors = grid_geometry(size).neighbors
+    target = int(round(fraction * size * size))
+    yellow = set()
+    while len(yellow) < target:
+        i = rng.randrange(size * size)
+        for _ in range(rng.randint(1, MAX_YELLOW_CLUSTER)):
+            yellow.add(i)
+            if len(yellow) >= target:
+                break
+            i = rng.choice(neighbors[i])
+    return yellow
+
+
+def check_regions(grid):
+    """Raise ValueError unless every cell has a region and each region could
+    have been entered in the editor as one selection: contiguous and
+    numbered 1 to MAX_REGIONS"""
+    geometry = grid_geometry(grid.size)
+    for i in range(grid.size * grid.size):
+        region = grid.region(i)
+        if region is None:
+            raise ValueError(f"Cell {grid.coords(i)} has no region")
+        if not 1 <= region <= MAX_REGIONS:
+            raise ValueError(f"Cell {grid.coords(i)} has region {region}, outside 1-{MAX_REGIONS}")
+    for region, cells in sorted(grid.region_index.cells.items()):
+        if not geometry.is_contiguous(cells):
+            raise ValueError(f"Region {region} is not contiguous")
+
+
+def generate_layout(size, seed=None, regions=None, yellow=YELLOW_FRACTION):
+    """A random PuzzleLayout; regions defaults to one per CELLS_PER_REGION
+    cells, up to MAX_REGIONS"""
+    rng = random.Random(seed)
+    if regions is None:
+        regions = min(MAX_REGIONS, max(2, round(size * size / CELLS_PER_REGION)))
+    if not 1 <= regions <= min(size * size, MAX_REGIONS):
+        raise ValueError(f"Cannot make {regions} regions in a {size}x{size} grid")
+
+    grid = BitGrid(size)
+    for i, region in enumerate(grow_regions(size, regions, rng)):
+        grid.set_region(i, region)
+    for i in yellow_cells(size, yellow, rng):
+        grid.flags[i] |= YELLOW
+    check_regions(grid)
+
+    row_labels = [random_label(rng) for _ in range(size)]
+    for label in row_labels:
+        parse_clue(label)
+    return PuzzleLayout(grid, row_labels)
+
+
+def write_layout(layout, filename):
+    """The layout CSV plus its .clues file"""
+    layout.grid.to_csv(filename)
+    write_row_labels(clue_file(filename), layout.row_labels)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate random Number Cross 5 layouts")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first layout; later ones count up")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--regions", type=int, default=None, help=f"default: one per {CELLS_PER_REGION} cells, at most {MAX_REGIONS}")
+    parser.add_argument("--yellow", type=float, default=YELLOW_FRACTION, help="share of yellow cells")
+    parser.add_argument("--out", default=".", help="output directory")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    for seed in range(args.seed, args.seed + args.count):
+        try:
+            layout = generate_layout(args.size, seed, args.regions, args.yellow)
+        except ValueError as e:
+            print(f"Seed {seed}: {e}", file=sys.stderr)
+            return 2
+        filename = os.path.join(args.out, f"layout-{args.size}x{args.size}-seed{seed}.csv")
+        write_layout(layout, filename)
+        print(filename)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
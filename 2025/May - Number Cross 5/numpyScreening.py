@@ -0,0 +1,188 @@
+"""Vectorized clue screening with NumPy.
+
+A brute-force alternative to the digit DP in clues.py for the cases where
+plain enumeration is cheaper: squares and multiples walk their arithmetic
+sequence, Fibonacci numbers come from their table, and the other clues
+walk every number the digit masks allow. All
+work on int64 arrays CHUNK numbers at a time, so memory stays bounded
+however large the space is. Digits are peeled off with vector divmod and
+the zero-digit, length, allowed-digit and clue tests are array operations.
+Primes are the exception: trial division by the small primes runs on the
+array, and only the numbers it leaves get the exact is_prime test.
+
+The generators mirror the ones at the bottom of clues.py and return plain
+ascending lists, so the screening scripts can switch backend module:
+
+    python squareScreening.py --numpy
+
+numpy is optional; it is only imported when this module is used.
+"""
+from math import isqrt, prod
+
+from clues import SMALL_PRIMES, fibonacci_numbers, is_prime, mask_digits
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Numbers handled per array operation
+CHUNK = 1 << 20
+
+# Numbers must fit in int64
+MAX_LENGTH = 18
+
+
+def _require_numpy(masks):
+    if np is None:
+        raise ImportError("numpyScreening needs numpy (pip install numpy)")
+    if len(masks) > MAX_LENGTH:
+        raise ValueError(f"Numbers longer than {MAX_LENGTH} digits do not fit in int64")
+
+
+def allowed_table(masks):
+    """table[position, digit] is True when the digit may stand there; 0 never may"""
+    table = np.zeros((len(masks), 10), dtype=bool)
+    for position, mask in enumerate(masks):
+        table[position, mask_digits(mask)] = True
+    return table
+
+
+def digit_columns(values, length):
+    """Digits of every value, most significant first, shape (length, len(values))"""
+    digits = np.empty((length, len(values)), dtype=np.int64)
+    rest = values
+    for position in range(length - 1, -1, -1):
+        rest, digits[position] = np.divmod(rest, 10)
+    return digits
+
+
+def fit_masks(values, masks, table=None):
+    """Boolean array marking values with len(masks) digits, each allowed"""
+    length = len(masks)
+    if table is None:
+        table = allowed_table(masks)
+    keep = (values >= 10 ** (length - 1)) & (values < 10 ** length)
+    rest = values
+    for position in range(length - 1, -1, -1):
+        rest, digit = np.divmod(rest, 10)
+        keep &= table[position][digit]
+    return keep
+
+
+def sequence_chunks(first, last, step=1, chunk=CHUNK):
+    """first, first + step, ... up to last inclusive, as int64 chunks"""
+    for start in range(first, last + 1, step * chunk):
+        stop = min(start + step * chunk, last + 1)
+        yield np.arange(start, stop, step, dtype=np.int64)
+
+
+def pattern_chunks(masks, chunk=CHUNK):
+    """Every number fitting the masks, ascending, as (values, digit columns) chunks.
+
+    The k-th such number is k written in the mixed radix given by the sizes
+    of the per-position digit sets.
+    """
+    allowed = [np.array(mask_digits(m), dtype=np.int64) for m in masks]
+    sizes = [len(a) for a in allowed]
+    length = len(masks)
+    total = prod(sizes)
+    for start in range(0, total, chunk):
+        index = np.arange(start, min(start + chunk, total), dtype=np.int64)
+        digits = np.empty((length, len(index)), dtype=np.int64)
+        for position in range(length - 1, -1, -1):
+            index, pick = np.divmod(index, sizes[position])
+            digits[position] = allowed[position][pick]
+        values = np.zeros(digits.shape[1], dtype=np.int64)
+        for position in range(length):
+            values = values * 10 + digits[position]
+        yield values, digits
+
+
+def _collect(parts):
+    return np.concatenate(parts).tolist() if parts else []
+
+
+def squares(masks, chunk=CHUNK):
+    """Squares fitting the masks, screened over their roots"""
+    _require_numpy(masks)
+    length = len(masks)
+    if length == 0:
+        return []
+    table = allowed_table(masks)
+    low_root = isqrt(10 ** (length - 1) - 1) + 1
+    high_root = isqrt(10 ** length - 1)
+    parts = []
+    for roots in sequence_chunks(low_root, high_root, 1, chunk):
+        values = roots * roots
+        parts.append(values[fit_masks(values, masks, table)])
+    return _collect(parts)
+
+
+def multiples(modulus, masks, chunk=CHUNK):
+    """Multiples of modulus fitting the masks, screened over the multiples"""
+    _require_numpy(masks)
+    length = len(masks)
+    if length == 0:
+        return []
+    table = allowed_table(masks)
+    low = 10 ** (length - 1)
+    first = -(-low // modulus) * modulus
+    parts = []
+    for values in sequence_chunks(first, 10 ** length - 1, modulus, chunk):
+        parts.append(values[fit_masks(values, masks, table)])
+    return _collect(parts)
+
+
+def divisible_by_digits(masks, chunk=CHUNK):
+    """Numbers fitting the masks that each of their digits divides"""
+    _require_numpy(masks)
+    if not masks:
+        return []
+    parts = []
+    for values, digits in pattern_chunks(masks, chunk):
+        keep = np.ones(len(values), dtype=bool)
+        for column in digits:
+            keep &= values % column == 0
+        parts.append(values[keep])
+    return _collect(parts)
+
+
+def digit_products(product, masks, chunk=CHUNK):
+    """Numbers fitting the masks whose digits multiply to product"""
+    _require_numpy(masks)
+    if not masks:
+        return []
+    parts = []
+    for values, digits in pattern_chunks(masks, chunk):
+        parts.append(values[digits.prod(axis=0) == product])
+    return _collect(parts)
+
+
+def primes_among(values):
+    """The primes in an int64 array, as an array in the same order"""
+    values = np.asarray(values, dtype=np.int64)
+    keep = values >= 2
+    for p in SMALL_PRIMES:
+        keep &= (values % p != 0) | (values == p)
+    survivors = values[keep]
+    exact = np.fromiter((is_prime(v) for v in survivors.tolist()), dtype=bool, count=len(survivors))
+    return survivors[exact]
+
+
+def primes(masks, chunk=CHUNK):
+    """Primes fitting the masks"""
+    _require_numpy(masks)
+    if not masks:
+        return []
+    return _collect([primes_among(values) for values, _ in pattern_chunks(masks, chunk)])
+
+
+def fibonaccis(masks):
+    """Fibonacci numbers fitting the masks, screened over the table"""
+    _require_numpy(masks)
+    length = len(masks)
+    if length == 0:
+        return []
+    values = np.array(fibonacci_numbers(10 ** length), dtype=np.int64)
+    return values[fit_masks(values, masks)].tolist()
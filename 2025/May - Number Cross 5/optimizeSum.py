@@ -0,0 +1,223 @@
+"""Find the fill with the largest (or smallest) total digit sum.
+
+    python optimizeSum.py [puzzle_layout.csv] [--minimize] [--seconds 600]
+
+The total sum is what calculate_total_sum shows in the editor: every digit
+left in the grid once tiles are placed. Rather than listing every solution
+and taking the best, SumOptimizer runs the solver's search with branch and
+bound, through the solver's _cut and _record hooks: before descending into
+the next row it works out the best total any fill can still reach from
+there and drops the branch if that cannot beat the best fill found so far. Two bounds are used, and the tighter one wins:
+  * by rows: the exact sum of the rows filled so far plus, for every row
+    left, the best digit sum its clue allows (row_bounds)
+  * by regions: a tile's digit is handed out in full to its neighbours, so
+    the total always equals the sum over regions of digit * region size;
+    chosen regions count their digit, the rest 9 (or 1 when minimizing)
+Both are admissible, so the answer is exact when the search is not
+stopped. Region digits are tried from 9 down when maximizing, which finds
+a good fill, and so a strong bound, early.
+
+A row's bound is the best over its tile patterns of the bounds of its runs,
+found by a pass over the columns, so wide rows need not list their
+patterns.
+A run's bound comes from the clue's digit automaton: the lowest and highest
+digit sum over the paths through it that fit the cells' digit masks. When
+the automaton has more than MAX_SUM_STATES states at a position, the masks'
+own smallest and largest digits are used instead.
+"""
+import argparse
+import sys
+import time
+
+from clues import mask_digits
+from runSegments import MIN_RUN_LENGTH
+from solver import PuzzleLayout, Solver
+
+MAX_SUM_STATES = 20000
+
+
+def digit_range(masks):
+    """(lowest, highest) digit sum allowed by the masks alone"""
+    return (sum(mask_digits(m)[0] for m in masks if m),
+            sum(mask_digits(m)[-1] for m in masks if m))
+
+
+def automaton_sum_range(clue, masks, max_states=MAX_SUM_STATES):
+    """(lowest, highest) digit sum of a number that fits the masks and gets
+    through the clue's automaton, None if none does, or False if the
+    automaton needs more than max_states states at a position"""
+    length = len(masks)
+    layer = {clue.start(length): (0, 0)}
+    for position, mask in enumerate(masks):
+        digits = mask_digits(mask)
+        reached = {}
+        for state, (low, high) in layer.items():
+            for d in digits:
+                nxt = clue.step(state, d, position, length)
+                if nxt is None:
+                    continue
+                old = reached.get(nxt)
+                if old is None:
+                    reached[nxt] = (low + d, high + d)
+                else:
+                    reached[nxt] = (min(old[0], low + d), max(old[1], high + d))
+            if len(reached) > max_states:
+                return False
+        layer = reached
+    ends = [bounds for state, bounds in layer.items() if clue.accept_state(state)]
+    if not ends:
+        return None
+    return min(low for low, _ in ends), max(high for _, high in ends)
+
+
+def digit_sum_range(clue, masks, max_states=MAX_SUM_STATES):
+    """(lowest, highest) digit sum of a number that fits the masks and gets
+    through the clue's automaton, or None if none does"""
+    bounds = automaton_sum_range(clue, masks, max_states)
+    if bounds is False:
+        # Too many states to follow: fall back to the digits alone
+        return digit_range(masks)
+    return bounds
+
+
+class SumOptimizer(Solver):
+    """Solver that keeps only the best fill, cutting branches by bounds"""
+
+    def __init__(self, layout, cache=None):
+        super().__init__(layout, cache)
+        n = self.size
+        # Run bounds by clue and cell masks, shared by rows with the same clue
+        self.run_sums = {}
+        self.row_bounds = [self._row_bounds(r) for r in range(n)]
+        self.region_sizes = {}
+        for r in range(n):
+            for slot in self.slot_of[r]:
+                self.region_sizes[slot] = self.region_sizes.get(slot, 0) + 1
+
+    def _row_bounds(self, row):
+        """(lowest, highest) digit sum of any fill of the row, worked out
+        column by column rather than tile pattern by tile pattern"""
+        n = self.size
+        clue = self.clues[row]
+        domains = self.domains[row]
+        allowed = self.allowed_tiles[row]
+        required = self.forced_tiles[row]
+        # best[s]: bounds of the columns from s on when a run may start at s
+        # (s is 0 or just after a tile), None if they cannot be filled
+        best = [None] * (n + 1)
+        best[n] = (0, 0)
+        for start in range(n - 1, -1, -1):
+            options = []
+            # Once a run from here is too much for the automaton, longer ones
+            # go straight to the masks' digits, which still bound them
+            follow = True
+            if start == 0 and allowed & 1 and best[1] is not None:
+                options.append(best[1])  # The row starts with a tile
+            for end in range(start + 1, n + 1):
+                if required >> (end - 1) & 1:
+                    break  # A tile the run cannot cover
+                if end - start < MIN_RUN_LENGTH:
+                    continue
+                if end == n:
+                    rest = (0, 0)
+                elif allowed >> end & 1:
+                    rest = best[end + 1]
+                else:
+                    continue
+                if rest is None:
+                    continue
+                cells = domains[start:end]
+                bounds = False
+                if follow:
+                    key = (clue.cache_key(), tuple(cells))
+                    if key not in self.run_sums:
+                        self.run_sums[key] = automaton_sum_range(clue, cells)
+                    bounds = self.run_sums[key]
+                if bounds is False:
+                    follow = False
+                    bounds = digit_range(cells)
+                if bounds is not None:
+                    options.append((bounds[0] + rest[0], bounds[1] + rest[1]))
+            if options:
+                best[start] = (min(low for low, _ in options), max(high for _, high in options))
+        # No tile pattern works: the search finds nothing in this row anyway
+        return best[0] or (0, 0)
+
+    def optimize(self, maximize=True):
+        """The fill with the best total sum, or None if there is no fill"""
+        self.maximize = maximize
+        self.best = None
+        self.best_total = None
+        self.pruned = 0
+        n = self.size
+        # Bounds of rows r and below, by rows
+        self.rest = [0] * (n + 1)
+        for r in range(n - 1, -1, -1):
+            self.rest[r] = self.rest[r + 1] + self.row_bounds[r][1 if maximize else 0]
+        self.unchosen_digit = 9 if maximize else 1
+        order = range(9, 0, -1) if maximize else range(1, 10)
+        self.digit_choices = {slot: order for slot in self.neighbor_slots}
+        self.solve()
+        return self.best
+
+    def bound(self, row, done):
+        """Best total a fill can reach with rows above `row` summing to `done`"""
+        by_rows = done + self.rest[row]
+        state = self.state
+        by_regions = sum((state[slot] or self.unchosen_digit) * size for slot, size in self.region_sizes.items())
+        return min(by_rows, by_regions) if self.maximize else max(by_rows, by_regions)
+
+    def _cut(self, row):
+        """Whether no fill from here can beat the best one found"""
+        if self.best_total is None:
+            return False
+        # Cells of the rows not filled yet are still 0
+        bound = self.bound(row, sum(self.state[:row * self.size]))
+        if (bound <= self.best_total) if self.maximize else (bound >= self.best_total):
+            self.pruned += 1
+            return True
+        return False
+
+    def _record(self):
+        """Keep the fill only if it beats the best so far"""
+        total = sum(self.state[:self.size * self.size])
+        if self.best_total is not None:
+            better = total > self.best_total if self.maximize else total < self.best_total
+            if not better:
+                return
+        self.solutions = []
+        self.seen_fills = set()
+        super()._record()
+        self.best = self.solutions[0]
+        self.best_total = total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the Number Cross 5 fill with the best total digit sum")
+    parser.add_argument("layout", nargs="?", default="puzzle_layout.csv")
+    parser.add_argument("--minimize", action="store_true", help="find the smallest total instead of the largest")
+    parser.add_argument("--seconds", type=float, default=None, help="stop after this long with the best so far")
+    args = parser.parse_args(argv)
+
+    layout = PuzzleLayout.from_csv(args.layout)
+    optimizer = SumOptimizer(layout)
+    start = time.perf_counter()
+    if args.seconds is not None:
+        deadline = start + args.seconds
+        optimizer.stop_check = lambda: time.perf_counter() > deadline
+    best = optimizer.optimize(not args.minimize)
+    elapsed = time.perf_counter() - start
+
+    if best is None:
+        print("No solution" + (" found before the time ran out" if optimizer.stopped else ""))
+        return 1
+    kind = "Smallest" if args.minimize else "Largest"
+    proven = "best found so far, search stopped" if optimizer.stopped else "optimal"
+    print(f"{kind} total sum {best.total_sum()} ({proven}):")
+    print(best.format_grid())
+    print(f"{optimizer.nodes} rows placed, {optimizer.pruned} branches cut, {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Solve one layout on every core by splitting the search tree.
+
+    python parallelSolve.py puzzle_layout.csv --limit 1 --workers 16
+
+The solver is run down to a frontier, grown a row at a time from the top,
+and every search state on it becomes an independent subtree (shared nothing: each snapshot
+carries its own digits, tiles, values and carry). Subtrees go through one
+shared queue, so a worker that finishes a cheap subtree immediately takes
+the next one while others are still busy with heavy ones. Only a few
+subtrees per worker are in flight at a time, so once enough solutions are
+in, the stop event and cancelling what is still queued end the run
+quickly.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from solver import PuzzleLayout, Solver
+
+# Subtrees wanted per worker when the frontier is picked automatically
+SUBTREES_PER_WORKER = 16
+# Most time the parent spends growing the frontier before handing it out
+FRONTIER_SECONDS = 2.0
+
+_worker_solver = None
+_stop_event = None
+
+
+def _init_worker(layout, stop_event):
+    global _worker_solver, _stop_event
+    _worker_solver = Solver(layout)
+    _worker_solver.stop_check = stop_event.is_set
+    _stop_event = stop_event
+
+
+def _solve_subtree(snapshot, limit):
+    if _stop_event.is_set():
+        return [], 0
+    solutions = _worker_solver.solve_subtree(snapshot, limit)
+    return solutions, _worker_solver.nodes
+
+
+def choose_frontier(solver, workers, seconds=FRONTIER_SECONDS):
+    """A frontier with enough subtrees to keep every worker busy.
+
+    It is grown from the previous one, shallowest snapshot first, so no row
+    is searched twice. Growing stops once there are enough subtrees, after
+    `seconds`, or when the next snapshot sits halfway down the grid: past
+    that the parent would be doing the search itself. Snapshots may then
+    sit on two neighbouring rows, which solve_subtree does not mind.
+    Returns the deepest row reached and the snapshots.
+    """
+    wanted = workers * SUBTREES_PER_WORKER
+    deadline = time.perf_counter() + seconds
+    max_row = (solver.size - 1) // 2
+    snapshots = deque(solver.frontier(0))
+    while snapshots and len(snapshots) < wanted and time.perf_counter() < deadline:
+        if snapshots[0]['row'] >= max_row:
+            break
+        snapshots.extend(solver.expand(snapshots.popleft()))
+    split_row = max((snapshot['row'] for snapshot in snapshots), default=0)
+    return split_row, list(snapshots)
+
+
+def solve_parallel(layout, limit=None, workers=None, split_row=None):
+    """Return (solutions, stats) for a layout using a process pool"""
+    workers = workers or os.cpu_count() or 1
+    solver = Solver(layout)
+    start = time.perf_counter()
+    if split_row is None:
+        split_row, snapshots = choose_frontier(solver, workers)
+    else:
+        snapshots = solver.frontier(split_row)
+    stats = {
+        'split_row': split_row,
+        'subtrees': len(snapshots),
+        'subtrees_searched': 0,
+        'nodes': 0,
+        'frontier_seconds': round(time.perf_counter() - start, 6)
+    }
+
+    solutions = []
+    seen = set()
+    context = multiprocessing.get_context()
+    stop_event = context.Event()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(layout, stop_event)) as pool:
+        queue = iter(snapshots)
+        pending = set()
+
+        def top_up():
+            while len(pending) < workers * 2:
+                snapshot = next(queue, None)
+                if snapshot is None:
+                    return
+                wanted = None if limit is None else limit - len(solutions)
+                pending.add(pool.submit(_solve_subtree, snapshot, wanted))
+
+        top_up()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                found, nodes = future.result()
+                stats['subtrees_searched'] += 1
+                stats['nodes'] += nodes
+                for solution in found:
+                    # The same fill can be reached from more than one subtree
+                    key = (frozenset(solution.tiles), tuple(map(tuple, solution.values)))
+                    if key not in seen:
+                        seen.add(key)
+                        solutions.append(solution)
+            if limit is not None and len(solutions) >= limit:
+                stop_event.set()
+                for future in pending:
+                    future.cancel()
+                break
+            top_up()
+
+    stats['seconds'] = round(time.perf_counter() - start, 6)
+    return (solutions if limit is None else solutions[:limit]), stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a Number Cross 5 layout across worker processes")
+    parser.add_argument("layout", nargs="?", default="puzzle_layout.csv")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many solutions")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--split-row", type=int, default=None, help="row at which to split the search tree")
+    args = parser.parse_args(argv)
+
+    layout = PuzzleLayout.from_csv(args.layout)
+    solutions, stats = solve_parallel(layout, args.limit, args.workers, args.split_row)
+    for i, solution in enumerate(solutions, 1):
+        print(f"Solution {i} (total sum {solution.total_sum()}):")
+        print(solution.format_grid())
+        print()
+    print(f"{len(solutions)} solution(s); split at row {stats['split_row']} into {stats['subtrees']} subtrees, "
+          f"searched {stats['subtrees_searched']}, {stats['nodes']} rows placed, {stats['seconds']:.2f}s")
+    return 0 if solutions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,37 @@ import random
 import json
 import csv
 import os
+import sys
+
+from bitGrid import BitGrid, RegionIndex
+from gridFile import GridFile, is_grid_file, write_grid_file
+from gridGeometry import grid_geometry
+from hintWorker import HintWorker
+from journal import Journal
+from rules import RuleChecker
+from solver import DEFAULT_ROW_LABELS, clue_file, read_row_labels, write_row_labels
+
+# The canvas is a fixed viewport; grids larger than it scroll inside it.
+# Cells start at VIEWPORT_SIZE // grid size pixels, but no smaller than
+# START_CELL_SIZE, and zoom between MIN_CELL_SIZE and MAX_CELL_SIZE. Fonts
+# are sized for BASE_CELL_SIZE, the cell size of the 11x11 puzzle.
+VIEWPORT_SIZE = 550
+START_CELL_SIZE = 24
+MIN_CELL_SIZE = 12
+MAX_CELL_SIZE = 80
+BASE_CELL_SIZE = 50
+ZOOM_STEP = 1.25
+
+# Violations highlighted in solve mode; empty cells are only counted
+HIGHLIGHTED_RULES = ("tile", "region", "adjacent", "row", "increments")
+FLAGGED_FILLS = {'yellow': 'orange', 'black': '#8b0000'}
+FLAGGED_FILL = '#ffc8c8'
+
+# How often the hint worker's results are picked up: about 60 times a second
+HINT_POLL_MS = 16
+
+# Pencil marks are only drawn in cells at least this large
+PENCIL_MIN_CELL_SIZE = 30
 
 class GridCell:
     def __init__(self):
@@ -64,30 +95,24 @@ class GridCell:
         return cell
 
 class LogicPuzzleGrid:
-    def __init__(self, root):
+    def __init__(self, root, layout_file="puzzle_layout.csv"):
         self.root = root
         self.root.title("Jane Street Puzzle")
+        
+        # Save/Load use this file, plus the .clues file next to it
+        self.layout_file = layout_file
 
-        # Grid size
-        self.grid_size = 11
+        # Grid size; load_layout takes it from the layout file
+        self.grid_size = len(DEFAULT_ROW_LABELS)
+        
+        # Neighbour tables shared with the solver
+        self.geometry = grid_geometry(self.grid_size)
         
         # Initialize the grid data structure
         self.grid_data = [[GridCell() for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         
-        # Fixed row labels
-        self.row_labels = [
-            "Square",
-            "Product of Digits is 20",
-            "Multiple of 13",
-            "Multiple of 32",
-            "Divisible by Each of its Digits",
-            "Product of Digits is 25",
-            "Divisible by Each of its Digits",
-            "Odd and a Palindrome",
-            "Fibonacci",
-            "Product of Digits is 2025",
-            "Prime"
-        ]
+        # Row clues, one per row; load_layout reads them from the .clues file
+        self.row_labels = list(DEFAULT_ROW_LABELS)
         
         # Track selected cells and mode
         self.selected_cells = set()  # Store multiple selected cells
@@ -105,11 +130,35 @@ class LogicPuzzleGrid:
         self.remaining_increments = 0
         self.increment_buttons = [] 
         
+        # Reverse index kept in step with GridCell.contributing_tiles:
+        # tile (row, col) -> {cell (row, col): increments from that tile}
+        self.tile_increments = {}
+        
+        # Region -> cells and per-row/column region counts, kept in step
+        # with GridCell.region
+        self.region_index = RegionIndex()
+        
+        # Undo/redo history of per-cell changes
+        self.journal = Journal(self.cell_snapshot, self.restore_cell_snapshot)
+        
+        # Whole-grid rule check on a BitGrid copy of grid_data, brought up to
+        # date at each draw from the cells touched since the last one
+        self.dirty_cells = set()
+        self.reset_rule_checker()
+        
+        # Pencil marks and hints come from a background process that keeps
+        # the candidates up to date: draw_grid hands it every new grid
+        # state and poll_hints picks up what it found
+        self.hint_worker = HintWorker()
+        self.hints = None
+        
         # Store region colors for consistent visualization
         self.region_colors = {}
         
         self.setup_ui()
         self.bind_events()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_hints()
         
     def setup_ui(self):
         # Main container
@@ -145,58 +194,81 @@ class LogicPuzzleGrid:
                                     command=self.load_layout)
         self.load_button.pack(side=tk.LEFT, padx=5)
         
+        # Undo/redo buttons
+        self.undo_button = ttk.Button(self.control_panel, text="Undo",
+                                    command=self.undo)
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+        self.redo_button = ttk.Button(self.control_panel, text="Redo",
+                                    command=self.redo)
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+        
+        # Zoom buttons
+        self.zoom_in_button = ttk.Button(self.control_panel, text="Zoom In",
+                                       command=lambda: self.zoom(ZOOM_STEP))
+        self.zoom_in_button.pack(side=tk.LEFT, padx=5)
+        self.zoom_out_button = ttk.Button(self.control_panel, text="Zoom Out",
+                                        command=lambda: self.zoom(1 / ZOOM_STEP))
+        self.zoom_out_button.pack(side=tk.LEFT, padx=5)
+        
         # Total sum label
         self.total_sum_var = tk.StringVar(value="Total Sum: 0")
         self.total_sum_label = ttk.Label(self.control_panel, textvariable=self.total_sum_var,
                                        font=('Arial', 12, 'bold'))
         self.total_sum_label.pack(side=tk.RIGHT, padx=20)
         
+        # Rule check status label
+        self.rules_var = tk.StringVar(value="")
+        self.rules_label = ttk.Label(self.control_panel, textvariable=self.rules_var)
+        self.rules_label.pack(side=tk.RIGHT, padx=5)
+        
+        # Hint worker status label
+        self.hints_var = tk.StringVar(value="")
+        self.hints_label = ttk.Label(self.control_panel, textvariable=self.hints_var)
+        self.hints_label.pack(side=tk.RIGHT, padx=5)
+        
         # Instructions label
         self.editor_instructions = "Editor Mode: Click/Drag to select, Numbers=Region, Y=Yellow, R=Remove Region, Backspace=Clear"
         self.solve_instructions = "Solve Mode: Select cells and type 1-9 to enter numbers, T=Place/Remove Tile, Backspace=Clear"
         self.instructions = ttk.Label(self.control_panel, text=self.solve_instructions)  # Show solve mode instructions
         self.instructions.pack(side=tk.LEFT, padx=20)
         
-        # Canvas for drawing the grid
-        self.canvas_size = 550
-        self.cell_size = self.canvas_size // self.grid_size
+        # Canvas for drawing the grid: a fixed viewport onto the whole grid
+        self.canvas_size = VIEWPORT_SIZE
+        self.cell_size = self.start_cell_size()
         
         # Add padding for the grid
         self.grid_padding = 10  # Pixels of padding around the grid
         canvas_with_padding = self.canvas_size + (2 * self.grid_padding)
         
-        # Row labels container (left)
-        label_container = tk.Frame(self.main_container, bg=bg_color)
-        label_container.grid(row=1, column=0, padx=(0, 5))
-        
-        # Row labels
-        for i in range(self.grid_size):
-            label = tk.Label(
-                label_container,
-                text=self.row_labels[i],
-                font=('Arial', 10),
-                fg='#444444',
-                bg=bg_color,
-                anchor='w',
-                width=25
-            )
-            # Position label to align with grid cells
-            y_position = (i * self.cell_size) + (self.cell_size // 2) + self.grid_padding
-            label.place(x=0, y=y_position, anchor='w')
-        
-        # Set the container size to match the grid
-        label_container.configure(width=200, height=canvas_with_padding)
+        # Row labels (left) on their own canvas, scrolled together with the grid
+        self.label_canvas = tk.Canvas(
+            self.main_container,
+            width=200,
+            height=canvas_with_padding,
+            background=bg_color,
+            highlightthickness=0
+        )
+        self.label_canvas.grid(row=1, column=0, padx=(0, 5))
         
         # Canvas (right of labels)
         self.canvas = tk.Canvas(
             self.main_container,
             width=canvas_with_padding,
             height=canvas_with_padding,
-            background=bg_color
+            background=bg_color,
+            xscrollcommand=self.on_canvas_xscroll,
+            yscrollcommand=self.on_canvas_yscroll
         )
         self.canvas.grid(row=1, column=1)
         
-        # Draw initial grid
+        # Scrollbars for grids larger than the viewport
+        self.y_scrollbar = ttk.Scrollbar(self.main_container, orient=tk.VERTICAL, command=self.scroll_y)
+        self.y_scrollbar.grid(row=1, column=2, sticky=(tk.N, tk.S))
+        self.x_scrollbar = ttk.Scrollbar(self.main_container, orient=tk.HORIZONTAL, command=self.scroll_x)
+        self.x_scrollbar.grid(row=2, column=1, sticky=(tk.W, tk.E))
+        
+        # Create the canvas items once, then draw the initial grid
+        self.create_canvas_items()
         self.draw_grid()
     
     def toggle_mode(self):
@@ -219,6 +291,13 @@ class LogicPuzzleGrid:
         self.root.bind('<Key>', self.on_key)
         self.root.bind('<BackSpace>', self.on_backspace)
         self.root.bind('<Return>', self.on_enter)
+        self.root.bind('<Control-z>', self.on_undo)
+        self.root.bind('<Control-y>', self.on_redo)
+        self.root.bind('<Control-Z>', self.on_redo)
+        # Wheel scrolls (Shift: sideways, Control: zoom); X11 sends buttons 4/5
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.canvas.bind(sequence, self.on_mouse_wheel)
+            self.label_canvas.bind(sequence, self.on_mouse_wheel)
     
     def get_cell_coords(self, event):
         # Ensure we're getting coordinates relative to the canvas
@@ -243,25 +322,8 @@ class LogicPuzzleGrid:
         return True
     
     def is_contiguous(self, cells):
-        if not cells:
-            return True
-            
         # Check if cells are connected
-        cells = set(cells)
-        visited = set()
-        to_visit = {next(iter(cells))}
-        
-        while to_visit:
-            current = to_visit.pop()
-            visited.add(current)
-            row, col = current
-            
-            # Check adjacent cells (up, down, left, right)
-            for adj in [(row-1, col), (row+1, col), (row, col-1), (row, col+1)]:
-                if adj in cells and adj not in visited:
-                    to_visit.add(adj)
-        
-        return len(visited) == len(cells)
+        return self.geometry.is_contiguous(cells)
     
     def validate_region_placement(self, region_num, cells):
         # Check for tiles
@@ -274,23 +336,155 @@ class LogicPuzzleGrid:
             return False, "Region must be contiguous (all cells must be connected)"
         
         # Check for uniqueness in rows and columns
-        rows = {cell[0] for cell in cells}
-        cols = {cell[1] for cell in cells}
-        
-        for row in rows:
-            for col in range(self.grid_size):
-                cell = self.grid_data[row][col]
-                if (row, col) not in cells and cell.region == region_num:
-                    return False, "Region number must be unique in each row"
-                    
-        for col in cols:
-            for row in range(self.grid_size):
-                cell = self.grid_data[row][col]
-                if (row, col) not in cells and cell.region == region_num:
-                    return False, "Region number must be unique in each column"
+        message = self.region_index.placement_error(region_num, cells)
+        if message:
+            return False, message
         
         return True, ""
     
+    def set_cell_region(self, row, col, region_num):
+        """Change a cell's region, keeping the region index in step"""
+        self.touch_cell(row, col)
+        cell = self.grid_data[row][col]
+        self.region_index.move((row, col), cell.region, region_num)
+        cell.region = region_num
+    
+    def touch_cell(self, row, col):
+        """Let the journal capture a cell before it changes, and the rule
+        checker recheck it at the next draw"""
+        self.journal.touch((row, col))
+        self.dirty_cells.add((row, col))
+    
+    def cell_snapshot(self, coords):
+        """One cell as a comparable tuple, including the increments it gave as a tile"""
+        cell = self.grid_data[coords[0]][coords[1]]
+        return (
+            cell.value, cell.region, cell.tile, cell.yellow,
+            cell.original_value, cell.increment_value,
+            frozenset(cell.contributing_tiles),
+            tuple(sorted(self.tile_increments.get(coords, {}).items()))
+        )
+    
+    def restore_cell_snapshot(self, coords, snapshot):
+        value, region, tile, yellow, original_value, increment_value, contributing, given = snapshot
+        cell = self.grid_data[coords[0]][coords[1]]
+        self.set_cell_region(coords[0], coords[1], region)
+        cell.value = value
+        cell.tile = tile
+        cell.yellow = yellow
+        cell.original_value = original_value
+        cell.increment_value = increment_value
+        cell.contributing_tiles = set(contributing)
+        if given:
+            self.tile_increments[coords] = dict(given)
+        else:
+            self.tile_increments.pop(coords, None)
+    
+    def undo(self):
+        # An unfinished tile placement is closed first so it can be undone too
+        if self.placing_tile:
+            self.cleanup_tile_placement()
+        changed = self.journal.undo()
+        if changed:
+            self.dirty_cells.update(changed)
+            self.draw_grid()
+    
+    def redo(self):
+        if self.placing_tile:
+            self.cleanup_tile_placement()
+        changed = self.journal.redo()
+        if changed:
+            self.dirty_cells.update(changed)
+            self.draw_grid()
+    
+    def on_undo(self, event):
+        self.undo()
+    
+    def on_redo(self, event):
+        self.redo()
+    
+    def reset_rule_checker(self):
+        """Rebuild the rule checker's copy of the grid from scratch"""
+        self.dirty_cells.clear()
+        self.rule_grid = BitGrid.from_cells(self.grid_data)
+        self.rule_checker = RuleChecker(self.rule_grid, self.row_labels)
+        self.flagged_cells = None  # Worked out at the next draw
+    
+    def refresh_violations(self):
+        """Copy the touched cells into the rule checker's grid and recheck
+        just the rows, regions and tiles around them; returns whether
+        anything needed rechecking"""
+        if not self.dirty_cells and self.flagged_cells is not None:
+            return False
+        size = self.grid_size
+        changed = []
+        for row, col in self.dirty_cells:
+            i = row * size + col
+            self.rule_grid.load_cell(i, self.grid_data[row][col])
+            changed.append(i)
+        self.dirty_cells.clear()
+        checker = self.rule_checker
+        checker.update(changed)
+        self.flagged_cells = {divmod(i, size) for i in checker.flagged_cells(HIGHLIGHTED_RULES)}
+        
+        if checker.is_solved():
+            self.rules_var.set("Solved!")
+        else:
+            broken = checker.count(HIGHLIGHTED_RULES)
+            empty = checker.count(("cell",))
+            self.rules_var.set(f"Rule violations: {broken}, empty cells: {empty}")
+        return True
+    
+    def tile_given(self):
+        """Increments each tile has handed out, by flat index"""
+        size = self.grid_size
+        return {row * size + col: sum(cells.values()) for (row, col), cells in self.tile_increments.items()}
+    
+    def submit_hints(self):
+        """Send the current grid to the hint worker; hints for the previous
+        state are dropped, as they may no longer hold"""
+        self.hint_worker.submit(self.rule_grid.copy(), self.row_labels, self.tile_given())
+        self.hints = None
+        self.update_hint_status()
+    
+    def poll_hints(self):
+        """Pick up new hints, if any, and look again in HINT_POLL_MS"""
+        hints = self.hint_worker.poll()
+        if hints is not None:
+            self.hints = hints
+            self.update_hint_status()
+            self.render_viewport()
+        self.hint_timer = self.root.after(HINT_POLL_MS, self.poll_hints)
+    
+    def update_hint_status(self):
+        if self.hints is None:
+            self.hints_var.set("Hints: working...")
+        elif self.hints.problem:
+            self.hints_var.set(f"Hints: no fill fits ({self.hints.problem})")
+        else:
+            self.hints_var.set(f"Hints: {len(self.hints.forced)} forced")
+    
+    def candidate_mask(self, row, col):
+        """Digits a cell can still take, from the hint worker's newest
+        result for the current grid"""
+        return self.hints.masks[row * self.grid_size + col]
+    
+    def show_pencil_marks(self):
+        """Whether the hint worker has candidates for the current grid"""
+        return self.hints is not None and bool(self.hints.masks) and not self.hints.problem
+    
+    def pencil_marks(self, mask):
+        """Candidate digits laid out 3 x 3 like a keypad, gaps for the rest"""
+        lines = []
+        for first in (1, 4, 7):
+            lines.append(" ".join(str(d) if mask >> (d - 1) & 1 else " " for d in range(first, first + 3)))
+        return "\n".join(lines)
+    
+    def on_close(self):
+        self.root.after_cancel(self.hint_timer)
+        self.hint_worker.close()
+        self.root.destroy()
+    
     def get_region_color(self, region_num):
         if region_num not in self.region_colors:
             # Generate a light pastel color
@@ -313,123 +507,255 @@ class LogicPuzzleGrid:
         total = self.calculate_total_sum()
         self.total_sum_var.set(f"Total Sum: {total}")
 
-    def draw_grid(self):
+    def start_cell_size(self):
+        """Cell size for a newly loaded grid: fill the viewport if that is
+        not too small, otherwise scroll"""
+        return max(START_CELL_SIZE, min(MAX_CELL_SIZE, self.canvas_size // self.grid_size))
+    
+    def grid_extent(self):
+        """Width and height of the whole grid on the canvas, padding included"""
+        return self.grid_size * self.cell_size + 2 * self.grid_padding
+    
+    def create_canvas_items(self):
+        """Set up the canvas for the current grid size and zoom. Cell items are
+        created on demand by render_viewport as cells scroll into view"""
         self.canvas.delete('all')
+        self.cell_items = {}
+        self.cell_render_state = {}
         
-        # Draw cells first
-        for row in range(self.grid_size):
-            for col in range(self.grid_size):
-                # Add padding to all coordinates
-                x1 = col * self.cell_size + self.grid_padding
-                y1 = row * self.cell_size + self.grid_padding
-                x2 = x1 + self.cell_size
-                y2 = y1 + self.cell_size
-                
-                cell = self.grid_data[row][col]
-                
-                # Draw base white background for all cells
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill='white', outline='')
-                
-                # Draw selection overlay if cell is selected
-                if (row, col) in self.selected_cells:
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill='#e0e8ff', outline='')
-                
-                # Draw yellow background for yellow cells
-                if cell.yellow:
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill='yellow', outline='')
-                
-                # Draw black tiles last
-                if cell.tile:
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill='black', outline='')
-                    # Show original value (displaced value) in white text
-                    if cell.original_value:
-                        # Calculate used increments for this tile
-                        used_increments = 0
-                        for r in range(self.grid_size):
-                            for c in range(self.grid_size):
-                                adj_cell = self.grid_data[r][c]
-                                if (row, col) in adj_cell.contributing_tiles:
-                                    current_value = int(adj_cell.value) if adj_cell.value else 0
-                                    orig_value = int(adj_cell.original_value) if adj_cell.original_value else 0
-                                    used_increments += (current_value - orig_value)
-                        
-                        remaining = int(cell.original_value) - used_increments
-                        if remaining > 0:
-                            self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2,
-                                                text=f"{remaining}",
-                                                font=('Arial', 12, 'bold'),
-                                                fill='white')
-                else:
-                    # Draw value (only in solve mode)
-                    if not self.editor_mode and cell.value:
-                        # Determine if cell has been incremented
-                        is_incremented = bool(cell.contributing_tiles)
-                        
-                        # Center the value in the cell
-                        self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2,
-                                            text=str(cell.value),
-                                            font=('Arial', 16, 'bold'),
-                                            fill='red' if is_incremented else 'blue')
-        
-        # Draw all grid lines first (thin lines)
-        for i in range(self.grid_size + 1):
-            # Vertical lines
-            x = i * self.cell_size + self.grid_padding
-            self.canvas.create_line(
-                x, self.grid_padding,
-                x, self.grid_size * self.cell_size + self.grid_padding,
-                fill='#e0e0e0', width=1
-            )
-            # Horizontal lines
-            y = i * self.cell_size + self.grid_padding
-            self.canvas.create_line(
-                self.grid_padding, y,
-                self.grid_size * self.cell_size + self.grid_padding, y,
-                fill='#e0e0e0', width=1
-            )
-        
-        # Draw region borders on top
-        for row in range(self.grid_size):
-            for col in range(self.grid_size):
-                x1 = col * self.cell_size + self.grid_padding
-                y1 = row * self.cell_size + self.grid_padding
-                x2 = x1 + self.cell_size
-                y2 = y1 + self.cell_size
-                
-                cell = self.grid_data[row][col]
-                
-                if cell.region is not None:
-                    # Top edge
-                    if row == 0 or self.grid_data[row-1][col].region != cell.region:
-                        self.canvas.create_line(x1, y1, x2, y1, fill='black', width=2)
-                    
-                    # Bottom edge
-                    if row == self.grid_size-1 or self.grid_data[row+1][col].region != cell.region:
-                        self.canvas.create_line(x1, y2, x2, y2, fill='black', width=2)
-                    
-                    # Left edge
-                    if col == 0 or self.grid_data[row][col-1].region != cell.region:
-                        self.canvas.create_line(x1, y1, x1, y2, fill='black', width=2)
-                    
-                    # Right edge
-                    if col == self.grid_size-1 or self.grid_data[row][col+1].region != cell.region:
-                        self.canvas.create_line(x2, y1, x2, y2, fill='black', width=2)
+        extent = self.grid_extent()
+        self.canvas.configure(scrollregion=(0, 0, extent, extent),
+                              xscrollincrement=self.cell_size,
+                              yscrollincrement=self.cell_size)
         
-        # Draw outer grid border last
+        # Outer grid border, kept above the cells
         self.canvas.create_rectangle(
             self.grid_padding, self.grid_padding,
             self.grid_size * self.cell_size + self.grid_padding,
             self.grid_size * self.cell_size + self.grid_padding,
-            outline='black', width=2
+            outline='black', width=2, tags='outer'
         )
         
-        # If in tile placement mode, show increment buttons
-        if self.placing_tile:
-            self.show_increment_buttons()
+        # Row labels, aligned with the middle of their rows
+        self.label_canvas.delete('all')
+        self.label_canvas.configure(scrollregion=(0, 0, 200, extent), yscrollincrement=self.cell_size)
+        for i, label in enumerate(self.row_labels):
+            y_position = (i * self.cell_size) + (self.cell_size // 2) + self.grid_padding
+            self.label_canvas.create_text(0, y_position, text=label, anchor='w',
+                                          font=('Arial', 10), fill='#444444')
+    
+    def create_cell_items(self, row, col):
+        """Background, text and the four region border lines of one cell"""
+        x1, y1, x2, y2 = self.cell_bounds(row, col)
+        self.cell_items[(row, col)] = {
+            'rect': self.canvas.create_rectangle(x1, y1, x2, y2, fill='white', outline='#e0e0e0'),
+            'text': self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text=''),
+            'borders': (
+                self.canvas.create_line(x1, y1, x2, y1, fill='black', width=2, state='hidden', tags='border'),  # Top
+                self.canvas.create_line(x1, y2, x2, y2, fill='black', width=2, state='hidden', tags='border'),  # Bottom
+                self.canvas.create_line(x1, y1, x1, y2, fill='black', width=2, state='hidden', tags='border'),  # Left
+                self.canvas.create_line(x2, y1, x2, y2, fill='black', width=2, state='hidden', tags='border')   # Right
+            )
+        }
+    
+    def delete_cell_items(self, coords):
+        items = self.cell_items.pop(coords)
+        self.canvas.delete(items['rect'], items['text'], *items['borders'])
+        self.cell_render_state.pop(coords, None)
+    
+    def visible_cells(self):
+        """Row and column ranges of the cells at least partly in the viewport"""
+        span = self.canvas_size + 2 * self.grid_padding
+        left = self.canvas.canvasx(0) - self.grid_padding
+        top = self.canvas.canvasy(0) - self.grid_padding
+        last = self.grid_size - 1
+        rows = range(max(0, int(top // self.cell_size)), min(last, int((top + span) // self.cell_size)) + 1)
+        cols = range(max(0, int(left // self.cell_size)), min(last, int((left + span) // self.cell_size)) + 1)
+        return rows, cols
+    
+    def cell_bounds(self, row, col):
+        x1 = col * self.cell_size + self.grid_padding
+        y1 = row * self.cell_size + self.grid_padding
+        return x1, y1, x1 + self.cell_size, y1 + self.cell_size
+    
+    def cell_font(self, size):
+        """A bold font scaled with the zoom; size is for BASE_CELL_SIZE cells"""
+        return ('Arial', max(6, size * self.cell_size // BASE_CELL_SIZE), 'bold')
+    
+    def scroll_x(self, *args):
+        self.canvas.xview(*args)
+        self.render_viewport()
+    
+    def scroll_y(self, *args):
+        self.canvas.yview(*args)
+        self.render_viewport()
+    
+    def on_canvas_xscroll(self, first, last):
+        self.x_scrollbar.set(first, last)
+    
+    def on_canvas_yscroll(self, first, last):
+        self.y_scrollbar.set(first, last)
+        self.label_canvas.yview_moveto(first)
+    
+    def on_mouse_wheel(self, event):
+        step = -1 if event.num == 4 or event.delta > 0 else 1
+        if event.state & 0x4:  # Control
+            self.zoom(ZOOM_STEP if step < 0 else 1 / ZOOM_STEP)
+        elif event.state & 0x1:  # Shift
+            self.scroll_x('scroll', step, 'units')
+        else:
+            self.scroll_y('scroll', step, 'units')
+    
+    def zoom(self, factor):
+        """Change the cell size, keeping the top-left visible cell in place"""
+        size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, int(round(self.cell_size * factor))))
+        if size == self.cell_size:
+            return
+        left = (self.canvas.canvasx(0) - self.grid_padding) / self.cell_size
+        top = (self.canvas.canvasy(0) - self.grid_padding) / self.cell_size
+        self.cell_size = size
+        self.create_canvas_items()
+        extent = self.grid_extent()
+        self.canvas.xview_moveto(max(0, left * size) / extent)
+        self.canvas.yview_moveto(max(0, top * size) / extent)
+        self.render_viewport()
+    
+    def tile_used_increments(self, tile):
+        """Increments a tile has handed out so far"""
+        return sum(self.tile_increments.get(tile, {}).values())
+    
+    def tile_increments_to(self, tile, cell):
+        """Increments one cell has received from one tile"""
+        return self.tile_increments.get(tile, {}).get(cell, 0)
+    
+    def add_increment(self, tile, cell_coords, amount):
+        """Move `amount` increments from a tile to a cell (negative to take back)"""
+        self.touch_cell(*tile)
+        self.touch_cell(*cell_coords)
+        cell = self.grid_data[cell_coords[0]][cell_coords[1]]
+        if not cell.original_value:
+            cell.original_value = cell.value
+        if cell.value:
+            cell.value = str(int(cell.value) + amount)
+        cell.increment_value += amount
+        
+        given = self.tile_increments.setdefault(tile, {})
+        count = given.get(cell_coords, 0) + amount
+        if count > 0:
+            given[cell_coords] = count
+            cell.contributing_tiles.add(tile)
+        else:
+            given.pop(cell_coords, None)
+            cell.contributing_tiles.discard(tile)
+            if not given:
+                del self.tile_increments[tile]
+        
+        # If no more contributing tiles, restore original value
+        if not cell.contributing_tiles:
+            cell.value = cell.original_value
+            cell.original_value = ""
+            cell.increment_value = 0
+    
+    def clear_tile_increments_to(self, tile, cell_coords):
+        """Take back the increments one cell received from one tile"""
+        count = self.tile_increments_to(tile, cell_coords)
+        if count:
+            self.add_increment(tile, cell_coords, -count)
+    
+    def clear_tile_increments(self, tile):
+        """Take back every increment a tile has handed out"""
+        for cell_coords, count in list(self.tile_increments.get(tile, {}).items()):
+            self.add_increment(tile, cell_coords, -count)
+    
+    def cell_visual_state(self, row, col):
+        """Everything draw_grid shows for one cell, as a comparable tuple"""
+        cell = self.grid_data[row][col]
+        
+        fill = 'white'
+        if (row, col) in self.selected_cells:
+            fill = '#e0e8ff'
+        if cell.yellow:
+            fill = 'yellow'
+        
+        text, font, text_fill = '', self.cell_font(16), 'blue'
+        if cell.tile:
+            fill = 'black'
+            # Show the displaced value still to be handed out in white text
+            if cell.original_value:
+                remaining = int(cell.original_value) - self.tile_used_increments((row, col))
+                if remaining > 0:
+                    text, font, text_fill = f"{remaining}", self.cell_font(12), 'white'
+        elif not self.editor_mode and cell.value:
+            # Incremented cells are shown in red
+            text = str(cell.value)
+            text_fill = 'red' if cell.contributing_tiles else 'blue'
+        elif not self.editor_mode and self.cell_size >= PENCIL_MIN_CELL_SIZE and self.show_pencil_marks():
+            # Candidates of an empty cell as small grey pencil marks
+            text = self.pencil_marks(self.candidate_mask(row, col))
+            font = ('Courier', max(6, 9 * self.cell_size // BASE_CELL_SIZE))
+            text_fill = 'grey'
+        
+        # Cells that break a rule are shaded red in solve mode
+        if not self.editor_mode and (row, col) in self.flagged_cells:
+            fill = FLAGGED_FILLS.get(fill, FLAGGED_FILL)
+        
+        borders = (False, False, False, False)
+        if cell.region is not None:
+            borders = (
+                row == 0 or self.grid_data[row-1][col].region != cell.region,
+                row == self.grid_size-1 or self.grid_data[row+1][col].region != cell.region,
+                col == 0 or self.grid_data[row][col-1].region != cell.region,
+                col == self.grid_size-1 or self.grid_data[row][col+1].region != cell.region
+            )
+        return fill, text, font, text_fill, borders
+    
+    def draw_grid(self):
+        """Bring the canvas up to date after the grid changed"""
+        if self.refresh_violations():
+            self.submit_hints()
+        self.render_viewport()
             
         # Update the total sum display
         self.update_total_sum()
     
+    def render_viewport(self):
+        """Redraw the visible cells whose look changed. Only cells in the
+        viewport have canvas items, so a frame costs the visible cells, not
+        the whole grid"""
+        rows, cols = self.visible_cells()
+        visible = {(row, col) for row in rows for col in cols}
+        for coords in [coords for coords in self.cell_items if coords not in visible]:
+            self.delete_cell_items(coords)
+        new_cells = [coords for coords in visible if coords not in self.cell_items]
+        for coords in new_cells:
+            self.create_cell_items(*coords)
+        if new_cells:
+            # Borders drawn before a neighbour's background must stay on top
+            self.canvas.tag_raise('border')
+            self.canvas.tag_raise('outer')
+        
+        for row in rows:
+            for col in cols:
+                state = self.cell_visual_state(row, col)
+                previous = self.cell_render_state.get((row, col))
+                if state == previous:
+                    continue
+                
+                fill, text, font, text_fill, borders = state
+                items = self.cell_items[(row, col)]
+                if previous is None or previous[0] != fill:
+                    self.canvas.itemconfig(items['rect'], fill=fill)
+                if previous is None or previous[1:4] != state[1:4]:
+                    self.canvas.itemconfig(items['text'], text=text, font=font, fill=text_fill)
+                for i, shown in enumerate(borders):
+                    if previous is None or previous[4][i] != shown:
+                        self.canvas.itemconfig(items['borders'][i], state='normal' if shown else 'hidden')
+                self.cell_render_state[(row, col)] = state
+        
+        # If in tile placement mode, show increment buttons
+        if self.placing_tile:
+            self.show_increment_buttons()
+    
     def on_mouse_down(self, event):
         coords = self.get_cell_coords(event)
         if not coords:
@@ -508,6 +834,7 @@ class LogicPuzzleGrid:
             self.draw_grid()
     
     def process_region_input(self):
+        self.journal.begin("region")
         if self.selected_cells and self.current_region_input:
             if self.current_region_input.isdigit():
                 region_num = int(self.current_region_input)
@@ -517,38 +844,27 @@ class LogicPuzzleGrid:
                         for row, col in self.selected_cells:
                             cell = self.grid_data[row][col]
                             if not cell.tile:
-                                cell.region = region_num
+                                self.set_cell_region(row, col, region_num)
                     else:
                         messagebox.showerror("Invalid Region", message)
+        self.journal.end()
         
         self.current_region_input = ""
         self.draw_grid()
     
     def get_cells_in_region(self, region_num):
-        cells = []
-        for row in range(self.grid_size):
-            for col in range(self.grid_size):
-                if self.grid_data[row][col].region == region_num:
-                    cells.append((row, col))
-        return cells
+        return sorted(self.region_index.region_cells(region_num))
 
     def get_orthogonal_neighbors(self, row, col):
         """Get orthogonally adjacent cells (up, down, left, right)"""
-        neighbors = []
-        for r, c in [(row-1, col), (row+1, col), (row, col-1), (row, col+1)]:
-            if 0 <= r < self.grid_size and 0 <= c < self.grid_size:
-                neighbors.append((r, c))
-        return neighbors
+        return list(self.geometry.neighbor_cells[(row, col)])
     
     def is_valid_number_placement(self, row, col, value, ignore_region=None):
         """Check if a number can be placed in a cell according to the rules"""
         cell = self.grid_data[row][col]
         
-        # Get all orthogonally adjacent cells
-        neighbors = self.get_orthogonal_neighbors(row, col)
-        
-        # Check each neighbor
-        for n_row, n_col in neighbors:
+        # Check each orthogonally adjacent cell
+        for n_row, n_col in self.geometry.neighbor_cells[(row, col)]:
             neighbor = self.grid_data[n_row][n_col]
             
             # Skip if neighbor is in the same region or is the region we're ignoring
@@ -566,6 +882,14 @@ class LogicPuzzleGrid:
         return True
     
     def on_key(self, event):
+        # One keypress is one undo entry, however many cells it changes
+        self.journal.begin("key")
+        try:
+            self.apply_key(event)
+        finally:
+            self.journal.end()
+    
+    def apply_key(self, event):
         # Early return only if no cells are selected
         if not self.selected_cells:
             return
@@ -583,6 +907,7 @@ class LogicPuzzleGrid:
             
             elif event.char == 'y':
                 for row, col in self.selected_cells:
+                    self.touch_cell(row, col)
                     cell = self.grid_data[row][col]
                     cell.yellow = not cell.yellow
             
@@ -626,6 +951,7 @@ class LogicPuzzleGrid:
                         # If the cell has a tile, remove it first
                         if cell.tile:
                             self.remove_tile(row, col)
+                        self.touch_cell(row, col)
                         cell.value = event.char
                 else:
                     # If not part of a region, validate and update just the selected cell
@@ -639,6 +965,7 @@ class LogicPuzzleGrid:
                         # If the cell has a tile, remove it first
                         if cell.tile:
                             self.remove_tile(row, col)
+                        self.touch_cell(row, col)
                         cell.value = event.char
             
             elif event.char == 't':  # Toggle tile in solve mode
@@ -658,14 +985,21 @@ class LogicPuzzleGrid:
         
         # Always redraw the grid after any changes
         self.draw_grid()
-        # Force an immediate update of the canvas
-        self.canvas.update()
+        # Redraw straight away, without handling further events in here
+        self.canvas.update_idletasks()
     
     def on_enter(self, event):
         if self.editor_mode and self.current_region_input:
             self.process_region_input()
     
     def on_backspace(self, event):
+        self.journal.begin("clear")
+        try:
+            self.clear_selected_cells()
+        finally:
+            self.journal.end()
+    
+    def clear_selected_cells(self):
         if not self.selected_cells:
             return
             
@@ -676,6 +1010,7 @@ class LogicPuzzleGrid:
             if self.editor_mode:
                 if cell.region is not None:
                     regions_to_remove.add(cell.region)
+                self.touch_cell(row, col)
                 cell.yellow = False
                 cell.value = ""
                 # Remove tile if present
@@ -689,11 +1024,13 @@ class LogicPuzzleGrid:
                         # Remove any tiles first
                         if self.grid_data[r][c].tile:
                             self.remove_tile(r, c)
+                        self.touch_cell(r, c)
                         self.grid_data[r][c].value = ""
                 else:
                     # Remove any tiles first
                     if cell.tile:
                         self.remove_tile(row, col)
+                    self.touch_cell(row, col)
                     cell.value = ""
         
         # Remove any regions found
@@ -705,18 +1042,15 @@ class LogicPuzzleGrid:
     def get_adjacent_cells(self, row, col):
         """Get valid adjacent cells (non-yellow, non-tile)"""
         adjacent = []
-        for r, c in [(row-1, col), (row+1, col), (row, col-1), (row, col+1)]:
-            if (0 <= r < self.grid_size and 0 <= c < self.grid_size and
-                not self.grid_data[r][c].yellow and
-                not self.grid_data[r][c].tile):
+        for r, c in self.geometry.neighbor_cells[(row, col)]:
+            if not self.grid_data[r][c].yellow and not self.grid_data[r][c].tile:
                 adjacent.append((r, c))
         return adjacent
     
     def has_adjacent_tiles(self, row, col):
         """Check if any adjacent cell has a tile"""
-        for r, c in [(row-1, col), (row+1, col), (row, col-1), (row, col+1)]:
-            if (0 <= r < self.grid_size and 0 <= c < self.grid_size and
-                self.grid_data[r][c].tile):
+        for r, c in self.geometry.neighbor_cells[(row, col)]:
+            if self.grid_data[r][c].tile:
                 return True
         return False
     
@@ -746,6 +1080,14 @@ class LogicPuzzleGrid:
         if not self.can_place_tile(row, col):
             return False
             
+        if self.placing_tile:
+            self.cleanup_tile_placement()
+        
+        # The tile and every increment it hands out form one undo entry,
+        # closed again in cleanup_tile_placement
+        self.journal.begin("tile")
+        self.touch_cell(row, col)
+        
         cell = self.grid_data[row][col]
         self.displaced_value = int(cell.value)
         self.remaining_increments = self.displaced_value
@@ -789,19 +1131,12 @@ class LogicPuzzleGrid:
             if not adj_cell.value or not adj_cell.value.isdigit():
                 continue
                 
-            current_increments = 0
+            # Current increments from this tile
+            current_increments = self.tile_increments_to(self.tile_position, (adj_row, adj_col))
             
-            # Calculate current increments from this tile
-            if self.tile_position in adj_cell.contributing_tiles:
-                base_value = int(adj_cell.original_value) if adj_cell.original_value else 0
-                current_value = int(adj_cell.value)
-                # Calculate increments only from this tile
-                other_tiles_increments = sum(1 for tile in adj_cell.contributing_tiles if tile != self.tile_position)
-                current_increments = current_value - base_value - other_tiles_increments
-            
-            # Calculate button positions
-            x_base = adj_col * self.cell_size + self.grid_padding
-            y_base = adj_row * self.cell_size + self.grid_padding
+            # Calculate button positions, relative to the scrolled viewport
+            x_base = adj_col * self.cell_size + self.grid_padding - self.canvas.canvasx(0)
+            y_base = adj_row * self.cell_size + self.grid_padding - self.canvas.canvasy(0)
             cell_right_edge = x_base + self.cell_size
             
             # Add + button if we have remaining increments and current value is less than 9
@@ -844,15 +1179,8 @@ class LogicPuzzleGrid:
                                  "Cannot increment above 9")
             return
             
-        # Store original value if not already stored
-        if not cell.original_value:
-            cell.original_value = cell.value
-            
         # Increment the cell
-        new_value = current_value + 1
-        cell.value = str(new_value)
-        cell.increment_value += 1
-        cell.contributing_tiles.add(self.tile_position)
+        self.add_increment(self.tile_position, (row, col), 1)
         
         # Update remaining increments
         self.remaining_increments -= 1
@@ -868,36 +1196,16 @@ class LogicPuzzleGrid:
         if not self.placing_tile:
             return
             
-        cell = self.grid_data[row][col]
-        if not cell.value or self.tile_position not in cell.contributing_tiles:
-            return
-            
-        current_value = int(cell.value)
-        base_value = int(cell.original_value) if cell.original_value else 0
-        
-        # Calculate increments only from this tile
-        other_tiles_increments = sum(1 for tile in cell.contributing_tiles if tile != self.tile_position)
-        current_increments = current_value - base_value - other_tiles_increments
-        
-        if current_increments <= 0:
+        # Increments only from this tile
+        if self.tile_increments_to(self.tile_position, (row, col)) <= 0:
             return
             
         # Remove one increment
-        new_value = current_value - 1
-        cell.value = str(new_value)
+        self.add_increment(self.tile_position, (row, col), -1)
         
         # Update remaining increments
         self.remaining_increments += 1
         
-        # If this was the last increment from this tile, remove it from contributing_tiles
-        if current_increments == 1:
-            cell.contributing_tiles.remove(self.tile_position)
-            # If no more contributing tiles, restore original value
-            if not cell.contributing_tiles:
-                cell.value = cell.original_value
-                cell.original_value = ""
-                cell.increment_value = 0
-        
         self.show_increment_buttons()
         self.draw_grid()
     
@@ -905,21 +1213,14 @@ class LogicPuzzleGrid:
         """Cancel tile placement and revert changes"""
         if self.tile_position:
             row, col = self.tile_position
+            self.touch_cell(row, col)
             cell = self.grid_data[row][col]
             cell.tile = False
             cell.value = cell.original_value
             cell.original_value = ""
             
             # Revert any increments made
-            for r in range(self.grid_size):
-                for c in range(self.grid_size):
-                    adj_cell = self.grid_data[r][c]
-                    if self.tile_position in adj_cell.contributing_tiles:
-                        adj_cell.contributing_tiles.remove(self.tile_position)
-                        if not adj_cell.contributing_tiles:
-                            adj_cell.value = adj_cell.original_value
-                            adj_cell.original_value = ""
-                            adj_cell.increment_value = 0
+            self.clear_tile_increments(self.tile_position)
         
         self.cleanup_tile_placement()
         self.draw_grid()
@@ -931,6 +1232,10 @@ class LogicPuzzleGrid:
     
     def cleanup_tile_placement(self):
         """Clean up after tile placement"""
+        # Close the undo entry opened when the placement started
+        if self.placing_tile:
+            self.journal.end()
+        
         # Remove increment buttons
         for btn in self.increment_buttons:
             btn.destroy()
@@ -948,22 +1253,11 @@ class LogicPuzzleGrid:
         if not cell.tile:
             return False
             
-        # Get all cells affected by this tile
-        for r in range(self.grid_size):
-            for c in range(self.grid_size):
-                adj_cell = self.grid_data[r][c]
-                if (row, col) in adj_cell.contributing_tiles:
-                    # Remove this tile's contribution
-                    current_value = int(adj_cell.value)
-                    adj_cell.contributing_tiles.remove((row, col))
-                    
-                    # If no more contributing tiles, restore original value
-                    if not adj_cell.contributing_tiles:
-                        adj_cell.value = adj_cell.original_value
-                        adj_cell.original_value = ""
-                        adj_cell.increment_value = 0
+        # Remove this tile's contribution from every cell it fed
+        self.clear_tile_increments((row, col))
         
         # Restore the tile cell
+        self.touch_cell(row, col)
         cell.tile = False
         cell.value = cell.original_value
         cell.original_value = ""
@@ -977,11 +1271,7 @@ class LogicPuzzleGrid:
     def remove_region(self, region_num):
         """Remove a region and any tiles within it"""
         # First, get all cells in the region
-        region_cells = []
-        for row in range(self.grid_size):
-            for col in range(self.grid_size):
-                if self.grid_data[row][col].region == region_num:
-                    region_cells.append((row, col))
+        region_cells = self.get_cells_in_region(region_num)
         
         # First pass: Remove all tiles and their contributions
         for row, col in region_cells:
@@ -989,46 +1279,35 @@ class LogicPuzzleGrid:
             if cell.tile:
                 self.remove_tile(row, col)
         
-        # Second pass: Reset all cells in the region completely
+        # Second pass: Take back increments other tiles gave to these cells
+        for row, col in region_cells:
+            for tile in list(self.grid_data[row][col].contributing_tiles):
+                self.clear_tile_increments_to(tile, (row, col))
+        
+        # Third pass: Reset all cells in the region completely
         for row, col in region_cells:
+            self.touch_cell(row, col)
             cell = self.grid_data[row][col]
             # Reset all cell properties
             cell.value = ""
-            cell.region = None
+            self.set_cell_region(row, col, None)
             cell.tile = False
             cell.yellow = False
             cell.original_value = ""
             cell.increment_value = 0
             cell.contributing_tiles = set()
-        
-        # Third pass: Clean up any remaining increment contributions to/from these cells
-        for r in range(self.grid_size):
-            for c in range(self.grid_size):
-                cell = self.grid_data[r][c]
-                # Remove any contributions from cells that were in this region
-                for row, col in region_cells:
-                    if (row, col) in cell.contributing_tiles:
-                        cell.contributing_tiles.remove((row, col))
-                        if not cell.contributing_tiles:
-                            cell.value = cell.original_value
-                            cell.original_value = ""
-                            cell.increment_value = 0
-                
-                # If this cell was contributing to any cells in the region, remove those contributions
-                if any((row, col) in region_cells for row, col in cell.contributing_tiles):
-                    cell.contributing_tiles = {pos for pos in cell.contributing_tiles 
-                                            if pos not in region_cells}
-                    if not cell.contributing_tiles:
-                        cell.value = cell.original_value
-                        cell.original_value = ""
-                        cell.increment_value = 0
+            self.tile_increments.pop((row, col), None)
         
         # Clean up any ongoing tile placement
         self.cleanup_tile_placement()
 
     def save_layout(self):
         try:
-            filename = "puzzle_layout.csv"
+            filename = self.layout_file
+            if is_grid_file(filename):
+                self.save_grid_file(filename)
+                messagebox.showinfo("Success", f"Layout and solve state saved to {filename}")
+                return
             with open(filename, 'w', newline='') as f:
                 writer = csv.writer(f)
                 # Write header - remove tile-related columns
@@ -1048,46 +1327,99 @@ class LogicPuzzleGrid:
                             "1" if cell.yellow else "0"
                         ]
                         writer.writerow(cell_data)
+            write_row_labels(clue_file(filename), self.row_labels)
             messagebox.showinfo("Success", f"Layout saved to {filename}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save layout: {str(e)}")
 
+    def save_grid_file(self, filename):
+        """Save everything, tiles and increments included, as a binary grid file"""
+        size = self.grid_size
+        received = {}
+        for (tile_row, tile_col), given in self.tile_increments.items():
+            for (row, col), count in given.items():
+                received.setdefault(row * size + col, {})[tile_row * size + tile_col] = count
+        write_grid_file(filename, [(BitGrid.from_cells(self.grid_data), received)], self.row_labels)
+    
+    def load_grid_file(self, filename):
+        """Restore the state save_grid_file wrote (its first record)"""
+        with GridFile(filename) as grids:
+            grid, received = grids.record(0)
+            self.reset_grid(grids.size, grids.row_labels)
+        for row, cells in enumerate(grid.to_cells(GridCell)):
+            for col, loaded in enumerate(cells):
+                region = loaded.region
+                loaded.region = None
+                self.grid_data[row][col] = loaded
+                self.set_cell_region(row, col, region)
+        size = grid.size
+        for i, given in received.items():
+            for tile, count in given.items():
+                self.tile_increments.setdefault(divmod(tile, size), {})[divmod(i, size)] = count
+    
+    def reset_grid(self, size, row_labels=None):
+        """Start over with an empty size x size grid. Without row labels a
+        grid of the original size gets the original clues, others none"""
+        if row_labels is None:
+            row_labels = DEFAULT_ROW_LABELS if size == len(DEFAULT_ROW_LABELS) else [""] * size
+        if len(row_labels) != size:
+            raise ValueError(f"Expected {size} row labels, got {len(row_labels)}")
+        self.cleanup_tile_placement()
+        self.grid_size = size
+        self.row_labels = list(row_labels)
+        self.geometry = grid_geometry(size)
+        self.grid_data = [[GridCell() for _ in range(size)] for _ in range(size)]
+        self.tile_increments = {}
+        self.region_index = RegionIndex()
+        self.journal.clear()
+        self.selected_cells.clear()
+        self.reset_rule_checker()
+        self.cell_size = self.start_cell_size()
+        self.create_canvas_items()
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+    
     def load_layout(self):
         try:
-            filename = "puzzle_layout.csv"
+            filename = self.layout_file
             if not os.path.exists(filename):
                 messagebox.showwarning("Warning", "No saved layout found.")
                 return
+            if is_grid_file(filename):
+                self.load_grid_file(filename)
+                self.draw_grid()
+                messagebox.showinfo("Success", "Layout loaded successfully!")
+                return
                 
             with open(filename, 'r', newline='') as f:
                 reader = csv.reader(f)
-                header = next(reader)  # Read header row
-                
-                # Reset grid to empty state
-                self.grid_data = [[GridCell() for _ in range(self.grid_size)] 
-                                for _ in range(self.grid_size)]
-                
-                # Load cell data
-                for row in reader:
-                    if len(row) >= 4:  # Minimum required columns
-                        r, c = int(row[0]), int(row[1])
-                        if 0 <= r < self.grid_size and 0 <= c < self.grid_size:
-                            cell = self.grid_data[r][c]
-                            
-                            # Load only basic cell data
-                            cell.value = row[2]
-                            cell.region = None if row[3] == "" else int(row[3])
-                            cell.yellow = row[4] == "1" if len(row) > 4 else False
-                            
-                            # Ensure tile-related properties are reset
-                            cell.tile = False
-                            cell.original_value = ""
-                            cell.increment_value = 0
-                            cell.contributing_tiles = set()
-                
-                self.selected_cells.clear()
-                self.draw_grid()
-                messagebox.showinfo("Success", "Layout loaded successfully!")
+                next(reader)  # Read header row
+                rows = [row for row in reader if len(row) >= 4]  # Minimum required columns
+            
+            # The grid is as large as the cells the file lists
+            size = max((max(int(row[0]), int(row[1])) + 1 for row in rows), default=self.grid_size)
+            self.reset_grid(size, read_row_labels(clue_file(filename)))
+            
+            # Load cell data
+            for row in rows:
+                r, c = int(row[0]), int(row[1])
+                if 0 <= r < self.grid_size and 0 <= c < self.grid_size:
+                    cell = self.grid_data[r][c]
+                    
+                    # Load only basic cell data
+                    cell.value = row[2]
+                    self.set_cell_region(r, c, None if row[3] == "" else int(row[3]))
+                    cell.yellow = row[4] == "1" if len(row) > 4 else False
+                    
+                    # Ensure tile-related properties are reset
+                    cell.tile = False
+                    cell.original_value = ""
+                    cell.increment_value = 0
+                    cell.contributing_tiles = set()
+            
+            self.selected_cells.clear()
+            self.draw_grid()
+            messagebox.showinfo("Success", "Layout loaded successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load layout: {str(e)}")
 
@@ -1097,20 +1429,15 @@ class LogicPuzzleGrid:
         if not cell.tile or not cell.original_value:
             return False
             
-        # Calculate used increments and track which cells have increments
-        used_increments = 0
-        has_distributed_increments = False
-        for r in range(self.grid_size):
-            for c in range(self.grid_size):
-                adj_cell = self.grid_data[r][c]
-                if (row, col) in adj_cell.contributing_tiles:
-                    has_distributed_increments = True
-                    current_value = int(adj_cell.value) if adj_cell.value else 0
-                    orig_value = int(adj_cell.original_value) if adj_cell.original_value else 0
-                    used_increments += (current_value - orig_value)
+        # Used increments and whether any cells have increments from this tile
+        used_increments = self.tile_used_increments((row, col))
+        has_distributed_increments = (row, col) in self.tile_increments
         
         # Allow editing if there are remaining increments OR if the tile has distributed any increments
         if used_increments < int(cell.original_value) or has_distributed_increments:
+            if self.placing_tile:
+                self.cleanup_tile_placement()
+            self.journal.begin("tile")
             self.displaced_value = int(cell.original_value)
             self.remaining_increments = int(cell.original_value) - used_increments
             self.placing_tile = True
@@ -1121,8 +1448,13 @@ class LogicPuzzleGrid:
         return False
 
 def main():
+    # python puzzle-grid.py [layout.csv] opens that layout straight away
     root = tk.Tk()
-    app = LogicPuzzleGrid(root)
+    if len(sys.argv) > 1:
+        app = LogicPuzzleGrid(root, sys.argv[1])
+        app.load_layout()
+    else:
+        app = LogicPuzzleGrid(root)
     root.mainloop()
 
 if __name__ == "__main__":
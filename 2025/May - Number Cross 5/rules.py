@@ -0,0 +1,382 @@
+"""Whole-grid rule check for a BitGrid, as produced by Solution.to_grid.
+
+violations(grid, row_labels) lists every broken rule as (kind, where,
+message) with kind one of KINDS. An empty list means the grid is a
+finished solution; is_solved stops at the first violation. A blank row
+label means the row has no clue to satisfy.
+
+RuleChecker keeps the same violations current while a grid is edited:
+after cells change, update(changed) rechecks only the parts those cells
+belong to (their rows, old and new regions, edges, and the tiles next to
+them) rather than the whole grid.
+
+A cell's base digit is the digit it held before tiles: originals[i] on
+tiles and incremented cells, its value otherwise.
+
+Increments are balanced per tile group: tiles linked through the cells
+they fed (by contributors). The grid keeps only each cell's total and the
+tiles it came from, not how a shared cell's increments were split, so a
+group balances when some split lets every tile hand out exactly its digit
+and every cell receive exactly its increments.
+"""
+from bitGrid import NO_REGION
+from clues import parse_clue
+from gridGeometry import grid_geometry
+from runSegments import MIN_RUN_LENGTH, row_runs
+
+KINDS = ("cell", "tile", "region", "adjacent", "row", "increments")
+
+
+
+def base_digit(grid, i):
+    return grid.originals[i] or grid.value(i)
+
+
+def row_clues(row_labels):
+    """The Clue of every row, None for rows without a label"""
+    return [parse_clue(label) if label.strip() else None for label in row_labels]
+
+
+def row_tile_mask(grid, row):
+    mask = 0
+    for c in range(grid.size):
+        if grid.is_tile(row * grid.size + c):
+            mask |= 1 << c
+    return mask
+
+
+def row_numbers(grid, row):
+    """(start, end, number) for every untiled run of a row; number is None
+    while a cell of the run is empty"""
+    n = grid.size
+    numbers = []
+    for start, end in row_runs(row_tile_mask(grid, row), n):
+        digits = [grid.value(row * n + c) for c in range(start, end)]
+        number = int("".join(map(str, digits))) if all(digits) else None
+        numbers.append((start, end, number))
+    return numbers
+
+
+def cell_violations(grid, i):
+    if not grid.is_tile(i) and not grid.value(i):
+        return [("cell", grid.coords(i), "Cell has no digit")]
+    return []
+
+
+def tile_violations(grid, i):
+    """Placement rules for the tile at i"""
+    if not grid.is_tile(i):
+        return []
+    where = grid.coords(i)
+    found = []
+    if grid.is_yellow(i):
+        found.append(("tile", where, "Tile on a yellow cell"))
+    if grid.regions[i] == NO_REGION:
+        found.append(("tile", where, "Tile outside any region"))
+    if any(grid.is_tile(j) for j in grid_geometry(grid.size).neighbors[i]):
+        found.append(("tile", where, "Tiles touch"))
+    return found
+
+
+def region_violations(grid, region):
+    digits = {base_digit(grid, i) for i in grid.region_cells(region)} - {0}
+    if len(digits) > 1:
+        return [("region", region, f"Region holds digits {sorted(digits)}")]
+    return []
+
+
+def adjacent_violations(grid, i, j):
+    """Cells in different regions must not share a base digit"""
+    if grid.regions[i] == grid.regions[j] and grid.regions[i] != NO_REGION:
+        return []
+    d = base_digit(grid, i)
+    if d and d == base_digit(grid, j):
+        return [("adjacent", (grid.coords(i), grid.coords(j)), f"Neighbouring regions both hold {d}")]
+    return []
+
+
+def run_violations(row, start, end, number, clue):
+    if end - start < MIN_RUN_LENGTH:
+        return [("row", row, f"Run at columns {start}-{end - 1} is shorter than {MIN_RUN_LENGTH}")]
+    if clue is not None and number is not None and not clue.matches(number):
+        return [("row", row, f"{number} is not '{clue.label}'")]
+    return []
+
+
+def row_violations(grid, row, clue):
+    found = []
+    for start, end, number in row_numbers(grid, row):
+        found += run_violations(row, start, end, number, clue)
+    return found
+
+
+def cell_increment_violations(grid, i):
+    """Increments at i came from tiles next to it and not onto a yellow cell"""
+    if grid.is_tile(i):
+        return []
+    found = []
+    tiles = grid.contributors.get(i, ())
+    if grid.increments[i] and not tiles:
+        found.append(("increments", grid.coords(i), "Increments without a tile"))
+    neighbors = grid_geometry(grid.size).neighbors[i]
+    for t in tiles:
+        if t not in neighbors or not grid.is_tile(t):
+            found.append(("increments", grid.coords(i), f"Fed by {grid.coords(t)}, which is not a neighbouring tile"))
+    if grid.increments[i] and grid.is_yellow(i):
+        found.append(("increments", grid.coords(i), "Yellow cell received increments"))
+    return found
+
+
+def fed_cells(grid, tile):
+    """Cells next to a tile that list it as a contributor"""
+    return [j for j in grid_geometry(grid.size).neighbors[tile]
+            if not grid.is_tile(j) and tile in grid.contributors.get(j, ())]
+
+
+def feeding_tiles(grid, i):
+    """Tiles next to cell i among its contributors"""
+    neighbors = grid_geometry(grid.size).neighbors[i]
+    return [t for t in grid.contributors.get(i, ()) if t in neighbors and grid.is_tile(t)]
+
+
+def tile_group(grid, tile):
+    """(tiles, cells) of the group of a tile: the tiles linked to it
+    through cells they both fed, and those cells"""
+    tiles = {tile}
+    cells = set()
+    todo = [tile]
+    while todo:
+        for j in fed_cells(grid, todo.pop()):
+            if j in cells:
+                continue
+            cells.add(j)
+            for other in feeding_tiles(grid, j):
+                if other not in tiles:
+                    tiles.add(other)
+                    todo.append(other)
+    return sorted(tiles), sorted(cells)
+
+
+def balance_key(tile):
+    """Key of the balance of the group whose first tile this is, among the
+    per-cell increment keys: negative, so it never clashes with a cell"""
+    return -1 - tile
+
+
+def can_split(grid, tiles, cells):
+    """Whether the tiles' digits can be split over the cells they fed so
+    that every cell gets exactly its increments. One increment at a time,
+    a tile with some left is found through tiles that move one of theirs
+    to another cell (augmenting paths of a bipartite flow)"""
+    left = {t: grid.originals[t] for t in tiles}
+    flow = {}
+    for j in cells:
+        for _ in range(grid.increments[j]):
+            came_from = {j: None}
+            queue = [j]
+            end = None
+            for cell in queue:
+                for t in feeding_tiles(grid, cell):
+                    if t in came_from:
+                        continue
+                    came_from[t] = cell
+                    if left[t]:
+                        end = t
+                        break
+                    for k in fed_cells(grid, t):
+                        if flow.get((t, k)) and k not in came_from:
+                            came_from[k] = t
+                            queue.append(k)
+                if end is not None:
+                    break
+            if end is None:
+                return False
+            left[end] -= 1
+            t = end
+            while True:
+                cell = came_from[t]
+                flow[(t, cell)] = flow.get((t, cell), 0) + 1
+                t = came_from[cell]
+                if t is None:
+                    break
+                flow[(t, cell)] -= 1
+    return True
+
+
+def balance_violations(grid, tiles, cells):
+    """Every tile of a group hands out its digit in full, and no more"""
+    given = sum(grid.originals[t] for t in tiles)
+    received = sum(grid.increments[j] for j in cells)
+    if len(tiles) == 1:
+        if given != received:
+            return [("increments", grid.coords(tiles[0]), f"Tile displaced {given} but its cells received {received}")]
+        return []
+    where = [grid.coords(t) for t in tiles]
+    if given != received:
+        return [("increments", where, f"Tiles displaced {given} but the cells they feed received {received}")]
+    if not can_split(grid, tiles, cells):
+        return [("increments", where, "Tiles cannot give each cell they feed its increments")]
+    return []
+
+
+def increment_violations(grid):
+    """Every tile's digit is handed out in full to cells next to it"""
+    found = []
+    for i in range(grid.size * grid.size):
+        found += cell_increment_violations(grid, i)
+    grouped = set()
+    for i in range(grid.size * grid.size):
+        if grid.is_tile(i) and i not in grouped:
+            tiles, cells = tile_group(grid, i)
+            grouped.update(tiles)
+            found += balance_violations(grid, tiles, cells)
+    return found
+
+
+def iter_violations(grid, clues):
+    """Every broken rule, one kind after another, found lazily"""
+    n = grid.size
+    for i in range(n * n):
+        yield from cell_violations(grid, i)
+    for i in range(n * n):
+        yield from tile_violations(grid, i)
+    for region in sorted(grid.region_index.cells):
+        yield from region_violations(grid, region)
+    for i, j in grid_geometry(n).edges:
+        yield from adjacent_violations(grid, i, j)
+    for row in range(n):
+        yield from row_violations(grid, row, clues[row])
+    yield from increment_violations(grid)
+
+
+def violations(grid, row_labels):
+    """Every broken rule in the grid"""
+    return list(iter_violations(grid, row_clues(row_labels)))
+
+
+def is_solved(grid, row_labels):
+    return next(iter_violations(grid, row_clues(row_labels)), None) is None
+
+
+class RuleChecker:
+    """Violations of a BitGrid kept current through per-cell updates.
+
+    found[kind][key] holds (violations, cells) for one part of the grid:
+    a cell or tile index, a region, an edge (i, j), a row, or the
+    balance_key of a tile group. `cells` are the flat indices to highlight.
+    """
+
+    def __init__(self, grid, row_labels):
+        self.grid = grid
+        self.clues = row_clues(row_labels)
+        n = grid.size
+        geometry = grid_geometry(n)
+        self.neighbors = geometry.neighbors
+        self.cell_edges = [[(min(i, j), max(i, j)) for j in geometry.neighbors[i]] for i in range(n * n)]
+        self.found = {kind: {} for kind in KINDS}
+        # Last seen region of every cell, to know which region a cell left,
+        # and the tile groups as last seen: balance key -> tiles, and back
+        self.regions = list(grid.regions)
+        self.groups = {}
+        self.group_of = {}
+        self.update(range(n * n))
+
+    def _set(self, kind, key, found, cells):
+        if found:
+            self.found[kind][key] = (found, cells)
+        else:
+            self.found[kind].pop(key, None)
+
+    def update(self, changed):
+        """Recheck every part that depends on the changed cell indices"""
+        grid = self.grid
+        n = grid.size
+        changed = set(changed)
+        near = set(changed)
+        regions = set()
+        edges = set()
+        rows = set()
+        for i in changed:
+            near.update(self.neighbors[i])
+            regions.add(self.regions[i])
+            regions.add(grid.regions[i])
+            self.regions[i] = grid.regions[i]
+            edges.update(self.cell_edges[i])
+            rows.add(i // n)
+            self._set("cell", i, cell_violations(grid, i), (i,))
+        regions.discard(NO_REGION)
+
+        # Tile contact and increment sources depend on the neighbours too
+        for i in near:
+            self._set("tile", i, tile_violations(grid, i), (i,))
+            self._set("increments", i, cell_increment_violations(grid, i), (i,))
+        self._update_groups(near)
+        for region in regions:
+            self._set("region", region, region_violations(grid, region), tuple(grid.region_cells(region)))
+        for i, j in edges:
+            self._set("adjacent", (i, j), adjacent_violations(grid, i, j), (i, j))
+        for row in rows:
+            found = []
+            cells = []
+            for start, end, number in row_numbers(grid, row):
+                run = run_violations(row, start, end, number, self.clues[row])
+                if run:
+                    found += run
+                    cells.extend(range(row * n + start, row * n + end))
+            self._set("row", row, found, tuple(cells))
+
+    def _update_groups(self, near):
+        """Redo the balance of every tile group, old or new, that has a tile
+        among the cells in `near`; a change elsewhere cannot touch them"""
+        grid = self.grid
+        tiles = set()
+        for i in near:
+            self._drop_group(i, tiles)
+            if grid.is_tile(i):
+                tiles.add(i)
+        while tiles:
+            t = tiles.pop()
+            if t in self.group_of or not grid.is_tile(t):
+                continue
+            group, cells = tile_group(grid, t)
+            # Tiles far from the change can join from a group of their own
+            for tile in group:
+                self._drop_group(tile, tiles)
+            key = balance_key(group[0])
+            self.groups[key] = group
+            for tile in group:
+                self.group_of[tile] = key
+            self._set("increments", key, balance_violations(grid, group, cells), tuple(group) + tuple(cells))
+
+    def _drop_group(self, tile, tiles):
+        """Forget the group a tile was in, adding its tiles to `tiles`"""
+        key = self.group_of.get(tile)
+        if key is None:
+            return
+        for t in self.groups.pop(key):
+            del self.group_of[t]
+            tiles.add(t)
+        self.found["increments"].pop(key, None)
+
+    def violations(self, kinds=KINDS):
+        """Current violations, grouped by kind as violations() lists them"""
+        found = []
+        for kind in kinds:
+            parts = self.found[kind]
+            for key in sorted(parts):
+                found += parts[key][0]
+        return found
+
+    def count(self, kinds=KINDS):
+        return sum(len(found) for kind in kinds for found, _ in self.found[kind].values())
+
+    def flagged_cells(self, kinds=KINDS):
+        """Indices of the cells involved in any violation of these kinds"""
+        flagged = set()
+        for kind in kinds:
+            for _, cells in self.found[kind].values():
+                flagged.update(cells)
+        return flagged
+
+    def is_solved(self):
+        return not any(self.found[kind] for kind in KINDS)
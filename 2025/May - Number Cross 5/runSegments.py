@@ -0,0 +1,266 @@
+"""Split a row into runs at its tiles and list each run's clue candidates.
+
+    lookup = RunCandidates(parse_clue("Multiple of 13"))
+    segment_row(lookup, tile_mask, masks)
+        -> [(start, end, candidates), ...] or None
+
+tile_mask has bit c set for a tile in column c and masks holds the 9-bit
+digit mask of every cell. Each maximal untiled run start..end-1 gets the
+clue's numbers whose digits fit masks[start:end]; None means some run is
+too short or has nothing left, so the row cannot be filled.
+
+RunCandidates answers a run from one of two places. For short runs (up to
+INDEX_MAX_LENGTH digits) where the clue has few numbers overall (at most
+INDEX_LIMIT), the full list is indexed once as bitsets: bit k of
+bits[position][digit] says number k has that digit there, so filtering by
+masks is an AND of ORs over big ints. Longer runs go to the digit DP
+through the shared clue cache. Results are memoized per mask tuple, so a
+search asking the same question again pays one dict lookup.
+
+digit_masks(masks) answers the question propagation asks: which digits
+some fitting number has in each position. On indexed runs that is one AND
+per position and digit, without listing the numbers. path_masks(masks)
+answers it for masks too wide to list the numbers of, from the clue's
+automaton alone: it may keep a few digits the exact answer would not.
+"""
+from clueCache import default_cache
+from clues import ALL_DIGITS, mask_digits
+
+# Longest run, and largest full candidate list, indexed as bitsets; past
+# that, enumerating the full list costs more than the DP on narrow masks
+INDEX_MAX_LENGTH = 6
+INDEX_LIMIT = 1 << 16
+
+# Shortest run of untiled cells that counts as a number
+MIN_RUN_LENGTH = 2
+
+# Most automaton states per position path_masks follows
+MAX_PATH_STATES = 5000
+
+_runs = {}
+
+
+def row_runs(tile_mask, size):
+    """Maximal (start, end) column ranges not covered by tiles"""
+    key = (tile_mask, size)
+    runs = _runs.get(key)
+    if runs is not None:
+        return runs
+    runs = []
+    start = None
+    for c in range(size + 1):
+        if c == size or tile_mask >> c & 1:
+            if start is not None:
+                runs.append((start, c))
+                start = None
+        elif start is None:
+            start = c
+    _runs[key] = runs
+    return runs
+
+
+def _tile_mask_counts(required, allowed, size):
+    """ways[k][run]: tile masks of the k lowest columns, with `run` cells
+    since the last tile above them (counted up to MIN_RUN_LENGTH)"""
+    ways = [[1 if run == 0 or run >= MIN_RUN_LENGTH else 0 for run in range(MIN_RUN_LENGTH + 1)]]
+    for k in range(1, size + 1):
+        bit = 1 << (k - 1)
+        below = ways[-1]
+        counts = []
+        for run in range(MIN_RUN_LENGTH + 1):
+            total = 0
+            if not required & bit:
+                total += below[min(run + 1, MIN_RUN_LENGTH)]
+            if allowed & bit and (k == size or run >= MIN_RUN_LENGTH):
+                total += below[0]
+            counts.append(total)
+        ways.append(counts)
+    return ways
+
+
+def iter_tile_masks(required, allowed, size):
+    """Tile masks of a row in ascending order: every tile of `required`,
+    the others from `allowed`, no two side by side and every run at least
+    MIN_RUN_LENGTH long. Columns are decided from the highest down, and
+    branches with nothing to yield are never entered"""
+    ways = _tile_mask_counts(required, allowed, size)
+
+    def extend(k, mask, run):
+        if not ways[k][run]:
+            return
+        if k == 0:
+            yield mask
+            return
+        bit = 1 << (k - 1)
+        if not required & bit:
+            yield from extend(k - 1, mask, min(run + 1, MIN_RUN_LENGTH))
+        if allowed & bit and (k == size or run >= MIN_RUN_LENGTH):
+            yield from extend(k - 1, mask | bit, 0)
+
+    return extend(size, 0, 0)
+
+
+def tile_masks(required, allowed, size, limit=None):
+    """iter_tile_masks as a list, or None when there are more than `limit`"""
+    ways = _tile_mask_counts(required, allowed, size)
+    if limit is not None and ways[size][0] > limit:
+        return None
+    # Built from the lowest column up, one list per run length; masks
+    # without the new column's tile all come before those with it
+    lists = [[0] if count else [] for count in ways[0]]
+    for k in range(1, size + 1):
+        bit = 1 << (k - 1)
+        below = lists
+        lists = []
+        for run in range(MIN_RUN_LENGTH + 1):
+            masks = []
+            if not required & bit:
+                masks.extend(below[min(run + 1, MIN_RUN_LENGTH)])
+            if allowed & bit and (k == size or run >= MIN_RUN_LENGTH):
+                masks.extend([mask | bit for mask in below[0]])
+            lists.append(masks)
+    return lists[0]
+
+
+class RunCandidates:
+    """Mask-filtered candidate lists for one clue"""
+
+    def __init__(self, clue, cache=None, index_limit=INDEX_LIMIT):
+        self.clue = clue
+        self.cache = cache if cache is not None else default_cache()
+        self.index_limit = index_limit
+        self.indexes = {}  # length -> (numbers, bits) or None if too many numbers
+        self.results = {}
+        self.exists_results = {}
+        self.digit_results = {}
+        self.path_results = {}
+
+    def _index(self, length):
+        if length in self.indexes:
+            return self.indexes[length]
+        if length > INDEX_MAX_LENGTH:
+            self.indexes[length] = None
+            return None
+        numbers = self.cache.candidates(self.clue, (ALL_DIGITS,) * length, limit=self.index_limit + 1)
+        index = None
+        if len(numbers) <= self.index_limit:
+            size = (len(numbers) + 7) // 8
+            maps = [[bytearray(size) for _ in range(10)] for _ in range(length)]
+            for k, value in enumerate(numbers):
+                byte, bit = k >> 3, 1 << (k & 7)
+                for position, ch in enumerate(str(value)):
+                    maps[position][ord(ch) - 48][byte] |= bit
+            bits = [[int.from_bytes(m, 'little') for m in position] for position in maps]
+            index = (numbers, bits)
+        self.indexes[length] = index
+        return index
+
+    def _selection(self, index, masks):
+        """Bitset of indexed numbers that fit the masks"""
+        numbers, bits = index
+        selected = (1 << len(numbers)) - 1
+        for position, mask in enumerate(masks):
+            if mask == ALL_DIGITS:
+                continue
+            allowed = 0
+            digit_bits = bits[position]
+            for d in mask_digits(mask):
+                allowed |= digit_bits[d]
+            selected &= allowed
+            if not selected:
+                break
+        return selected
+
+    def candidates(self, masks):
+        """Numbers of len(masks) digits that fit the masks and the clue, ascending"""
+        masks = tuple(masks)
+        found = self.results.get(masks)
+        if found is not None:
+            return found
+        index = self._index(len(masks))
+        if index is None:
+            found = self.cache.candidates(self.clue, masks)
+        else:
+            numbers = index[0]
+            selected = self._selection(index, masks)
+            found = []
+            while selected:
+                low = selected & -selected
+                found.append(numbers[low.bit_length() - 1])
+                selected ^= low
+        self.results[masks] = found
+        return found
+
+    def digit_masks(self, masks):
+        """Per position, the digits some fitting number has there; all zero
+        when nothing fits"""
+        masks = tuple(masks)
+        found = self.digit_results.get(masks)
+        if found is not None:
+            return found
+        index = self._index(len(masks))
+        if index is None:
+            digits = [0] * len(masks)
+            for value in self.candidates(masks):
+                for position, ch in enumerate(str(value)):
+                    digits[position] |= 1 << (ord(ch) - 49)
+        else:
+            selected = self._selection(index, masks)
+            bits = index[1]
+            digits = [0] * len(masks)
+            if selected:
+                for position, mask in enumerate(masks):
+                    for d in mask_digits(mask):
+                        if selected & bits[position][d]:
+                            digits[position] |= 1 << (d - 1)
+        found = tuple(digits)
+        self.digit_results[masks] = found
+        return found
+
+    def path_masks(self, masks):
+        """digit_masks from the clue's automaton, or None if it has more
+        than MAX_PATH_STATES states at some position"""
+        masks = tuple(masks)
+        if masks in self.path_results:
+            return self.path_results[masks]
+        found = self.clue.path_masks(masks, MAX_PATH_STATES)
+        found = tuple(found) if found is not None else None
+        self.path_results[masks] = found
+        return found
+
+    def exists(self, masks):
+        """Whether any number fits, without listing them"""
+        masks = tuple(masks)
+        found = self.results.get(masks)
+        if found is not None:
+            return bool(found)
+        exists = self.exists_results.get(masks)
+        if exists is None:
+            index = self._index(len(masks))
+            if index is None:
+                exists = bool(self.cache.candidates(self.clue, masks, limit=1))
+            else:
+                exists = bool(self._selection(index, masks))
+            self.exists_results[masks] = exists
+        return exists
+
+
+def segment_row(lookup, tile_mask, masks, min_length=MIN_RUN_LENGTH):
+    """[(start, end, candidates)] for every run of the row, or None if one fails"""
+    segments = []
+    for start, end in row_runs(tile_mask, len(masks)):
+        if end - start < min_length:
+            return None
+        cands = lookup.candidates(masks[start:end])
+        if not cands:
+            return None
+        segments.append((start, end, cands))
+    return segments
+
+
+def row_possible(lookup, tile_mask, masks, min_length=MIN_RUN_LENGTH):
+    """Whether every run of the row has at least one candidate"""
+    for start, end in row_runs(tile_mask, len(masks)):
+        if end - start < min_length or not lookup.exists(masks[start:end]):
+            return False
+    return True
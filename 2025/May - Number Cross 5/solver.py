@@ -0,0 +1,617 @@
+"""Headless solver for the Number Cross 5 grid edited in puzzle-grid.py.
+
+Rules, as enforced by the editor:
+  * every cell of a region holds the same digit (1-9)
+  * orthogonally adjacent cells in different regions hold different digits
+  * tiles may not touch each other orthogonally, may not sit on yellow
+    cells and need a region
+  * a tile's digit is displaced onto its orthogonal non-yellow, non-tile
+    neighbours as +1 increments, all of it, without pushing a cell past 9
+  * in every row, each maximal run of untiled cells reads as a number of at
+    least two digits that satisfies the row clue
+
+The search walks the grid row by row. Before a row's digits are chosen the
+tiles of the row below it are already fixed, so every cell knows exactly
+which tiles can feed it; that keeps the per-cell digit masks narrow and the
+clue candidate lists short. Between rows only a per-column carry is kept:
+what a tile still has to push down, or what a cell still needs from the
+tile under it. Tools built on the search (countSolutions.py,
+optimizeSum.py) subclass Solver and hook in where they differ: _record
+for a complete fill, _done to stop, _cut to drop a branch as each row is
+entered, or by wrapping _search.
+
+Runs without tkinter:  python solver.py [puzzle_layout.csv] [--limit N] [--no-cache]
+
+On the shipped 11x11 layout the first fill (--limit 1) takes seconds, but
+listing every fill does not: the layout has more than one solution and the
+full search runs for well over 15 minutes. Use --limit, parallelSolve.py,
+or countSolutions.py to tell whether a layout is unique.
+
+Row clues come from a .clues file next to the layout (one label per line,
+as written by layoutGenerator.py); an 11x11 layout without one uses
+DEFAULT_ROW_LABELS.
+"""
+import argparse
+import os
+import sys
+import time
+
+from bitGrid import BitGrid, NO_REGION, TILE, YELLOW, Trail
+from clueCache import ClueCache, default_cache
+from gridGeometry import grid_geometry
+from runSegments import RunCandidates, iter_tile_masks, row_possible, row_runs, segment_row, tile_masks
+from clues import ALL_DIGITS, parse_clue, range_mask
+
+# Rows with more tile patterns than this generate them as the search goes
+MAX_LISTED_TILE_MASKS = 1 << 16
+
+DEFAULT_ROW_LABELS = [
+    "Square",
+    "Product of Digits is 20",
+    "Multiple of 13",
+    "Multiple of 32",
+    "Divisible by Each of its Digits",
+    "Product of Digits is 25",
+    "Divisible by Each of its Digits",
+    "Odd and a Palindrome",
+    "Fibonacci",
+    "Product of Digits is 2025",
+    "Prime"
+]
+
+
+class PuzzleLayout:
+    """Regions, yellow cells and row clues of one puzzle, backed by a BitGrid"""
+
+    def __init__(self, grid, row_labels=None):
+        self.grid = grid
+        self.size = grid.size
+        self.row_labels = list(row_labels if row_labels is not None else DEFAULT_ROW_LABELS)
+        if len(self.row_labels) != self.size:
+            raise ValueError(f"Expected {self.size} row labels, got {len(self.row_labels)}")
+
+    @classmethod
+    def from_csv(cls, filename, row_labels=None, size=None):
+        """Read a layout written by LogicPuzzleGrid.save_layout. Row labels
+        default to those of a clue file next to it, if there is one"""
+        grid = BitGrid.from_csv(filename, size)
+        if row_labels is None:
+            row_labels = read_row_labels(clue_file(filename))
+            if row_labels is None and grid.size != len(DEFAULT_ROW_LABELS):
+                raise ValueError(f"Missing {clue_file(filename)}: the default row labels only fit "
+                                 f"a {len(DEFAULT_ROW_LABELS)}x{len(DEFAULT_ROW_LABELS)} grid")
+        return cls(grid, row_labels)
+
+
+def clue_file(filename):
+    """Where the row labels of a layout CSV live: layout.csv -> layout.clues"""
+    return os.path.splitext(filename)[0] + ".clues"
+
+
+def read_row_labels(filename):
+    """One row label per line, or None if the file does not exist. A blank
+    line is a row without a clue, so every line counts"""
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return [line.strip() for line in f]
+
+
+def write_row_labels(filename, row_labels):
+    with open(filename, 'w') as f:
+        f.write("".join(label + "\n" for label in row_labels))
+
+
+class Solution:
+    """One complete fill of the grid"""
+
+    def __init__(self, values, tiles, digits, moves):
+        self.values = values  # values[row][col] -> final digit, None on tiles
+        self.tiles = tiles    # set of (row, col)
+        self.digits = digits  # region -> digit before tiles were placed
+        self.moves = moves    # list of ((tile_row, tile_col), (row, col), increments)
+
+    def total_sum(self):
+        """Sum of all digits left in the grid, as shown by the editor"""
+        return sum(v for row in self.values for v in row if v is not None)
+
+    def to_grid(self, layout):
+        """The solved state as a BitGrid, tiles and increments included"""
+        grid = layout.grid.copy()
+        size = grid.size
+        received = {}
+        for tile, cell, amount in self.moves:
+            i = cell[0] * size + cell[1]
+            received[i] = received.get(i, 0) + amount
+            grid.contributors.setdefault(i, set()).add(tile[0] * size + tile[1])
+        for row in range(size):
+            for col in range(size):
+                i = row * size + col
+                base = self.digits.get(grid.regions[i])
+                if (row, col) in self.tiles:
+                    grid.flags[i] |= TILE
+                    grid.domains[i] = 0
+                    grid.originals[i] = base
+                    continue
+                grid.flags[i] &= ~TILE
+                grid.set_value(i, self.values[row][col])
+                if received.get(i):
+                    grid.originals[i] = self.values[row][col] - received[i]
+                    grid.increments[i] = received[i]
+        return grid
+
+    def format_grid(self):
+        return "\n".join(
+            " ".join("#" if v is None else str(v) for v in row)
+            for row in self.values
+        )
+
+
+class Solver:
+    """Backtracking search with per-row constraint propagation"""
+
+    def __init__(self, layout, cache=None):
+        self.layout = layout
+        self.size = n = layout.size
+        self.clues = [parse_clue(label) for label in layout.row_labels]
+        grid = layout.grid
+
+        # Per-row views of the flat grid arrays; cells without a region get
+        # a private pseudo-region
+        self.region_of = [
+            [grid.regions[i] if grid.regions[i] != NO_REGION else -(i + 1)
+             for i in range(r * n, r * n + n)]
+            for r in range(n)
+        ]
+        self.yellow = [[bool(grid.flags[i] & YELLOW) for i in range(r * n, r * n + n)] for r in range(n)]
+        self.tileable = [
+            [not grid.flags[i] & YELLOW and grid.regions[i] != NO_REGION for i in range(r * n, r * n + n)]
+            for r in range(n)
+        ]
+        # Digits already entered restrict the final value of untiled cells
+        self.domains = [[grid.domains[i] or ALL_DIGITS for i in range(r * n, r * n + n)] for r in range(n)]
+        self.forced_tiles = [
+            sum(1 << c for c in range(n) if grid.flags[r * n + c] & TILE) for r in range(n)
+        ]
+
+        # Regions that share an edge must get different digits
+        flat_regions = [region for row in self.region_of for region in row]
+        self.region_neighbors = {region: set() for region in flat_regions}
+        for i, j in grid_geometry(n).boundary_edges(flat_regions):
+            self.region_neighbors[flat_regions[i]].add(flat_regions[j])
+            self.region_neighbors[flat_regions[j]].add(flat_regions[i])
+
+        # Regions are given a digit in the row where they first appear
+        seen = set()
+        self.new_regions = []
+        for r in range(n):
+            fresh = []
+            for c in range(n):
+                region = self.region_of[r][c]
+                if region not in seen:
+                    seen.add(region)
+                    fresh.append(region)
+            self.new_regions.append(fresh)
+
+        # The search state is one flat list: the digit of every cell (0 on
+        # tiles and cells not filled yet), then the digit of every region
+        # (0 until assigned). Changes go through a trail so backtracking
+        # only undoes what changed.
+        self.region_slot = {region: n * n + k for k, region in enumerate(self.region_neighbors)}
+        self.slot_of = [[self.region_slot[region] for region in self.region_of[r]] for r in range(n)]
+        self.new_region_slots = [[self.region_slot[region] for region in fresh] for fresh in self.new_regions]
+        self.neighbor_slots = {
+            self.region_slot[region]: [self.region_slot[other] for other in others]
+            for region, others in self.region_neighbors.items()
+        }
+        # Digits each region may take; subclasses can pin them
+        self.digit_choices = {slot: range(1, 10) for slot in self.neighbor_slots}
+
+        self.split_row = None
+        self.every_spread = False  # Keep fills that differ only in how increments were spread
+        self.stop_check = None  # Optional callable polled during long searches
+        # Candidate lists come from the shared clue cache, so they survive
+        # between runs; rows with the same clue share one lookup
+        self.cache = cache if cache is not None else default_cache()
+        lookups = {}
+        self.run_candidates = []
+        for clue in self.clues:
+            if clue.cache_key() not in lookups:
+                lookups[clue.cache_key()] = RunCandidates(clue, self.cache)
+            self.run_candidates.append(lookups[clue.cache_key()])
+        # Tile patterns of each row that respect spacing, yellow cells and
+        # run length; rows with too many to list get theirs as needed
+        self.allowed_tiles = [sum(1 << c for c in range(n) if self.tileable[r][c]) for r in range(n)]
+        self.row_tile_masks = [
+            tile_masks(self.forced_tiles[r], self.allowed_tiles[r], n, MAX_LISTED_TILE_MASKS) for r in range(n)
+        ]
+
+    def _runs(self, mask):
+        """Maximal (start, end) column ranges not covered by tiles"""
+        return row_runs(mask, self.size)
+
+    def _reset(self, limit):
+        n = self.size
+        self.limit = limit
+        self.solutions = []
+        self.seen_fills = set()
+        self.nodes = 0
+        self.stopped = False
+        self.state = [0] * (n * n + len(self.region_slot))
+        self.trail = Trail(self.state, len(self.state))
+        self.tiles = [0] * (n + 1)  # Padding row keeps lookups below the grid simple
+        self.moves = []
+
+    def solve(self, limit=None):
+        """Return every solution (or the first `limit` of them)"""
+        self._reset(limit)
+        start = (0,) * self.size
+        for _ in self._enter_row(0, start):
+            self._search(0, start)
+            if self._done():
+                break
+        self.cache.flush()
+        return self.solutions
+
+    def frontier(self, split_row):
+        """Snapshots of every search state that reaches `split_row`.
+
+        Each snapshot is a plain, picklable dict that solve_subtree() can
+        pick up in another process; together they cover the whole search.
+        """
+        if not 0 <= split_row < self.size:
+            raise ValueError(f"split_row must be between 0 and {self.size - 1}")
+        self.split_row = split_row
+        self.snapshots = []
+        try:
+            self.solve()
+        finally:
+            self.split_row = None
+        return self.snapshots
+
+    def expand(self, snapshot):
+        """Snapshots of the search states one row below a frontier snapshot;
+        together they cover the snapshot's subtree"""
+        row = snapshot['row']
+        if row + 1 >= self.size:
+            raise ValueError("A snapshot on the last row cannot be expanded")
+        self.split_row = row + 1
+        self.snapshots = []
+        try:
+            self.solve_subtree(snapshot)
+        finally:
+            self.split_row = None
+        return self.snapshots
+
+    def solve_subtree(self, snapshot, limit=None):
+        """Continue the search from a frontier snapshot"""
+        self._reset(limit)
+        row = snapshot['row']
+        self.state[:] = snapshot['state']
+        self.tiles[:] = snapshot['tiles']
+        self.moves.extend(snapshot['moves'])
+        self._search(row, snapshot['carry'])
+        self.cache.flush()
+        return self.solutions
+
+    def _snapshot(self, row, carry):
+        self.snapshots.append({
+            'row': row,
+            'carry': carry,
+            'state': list(self.state),
+            'tiles': list(self.tiles),
+            'moves': list(self.moves)
+        })
+
+    def _done(self):
+        return self.stopped or (self.limit is not None and len(self.solutions) >= self.limit)
+
+    def _cut(self, row):
+        """Whether to drop the branch once the regions new in `row` have
+        their digits; subclasses bound the search here"""
+        return False
+
+    def _decide_tiles(self, row):
+        above = self.tiles[row - 1] if row > 0 else 0
+        masks = self.row_tile_masks[row]
+        if masks is None:
+            masks = iter_tile_masks(self.forced_tiles[row], self.allowed_tiles[row] & ~above, self.size)
+        for mask in masks:
+            if mask & above:
+                continue
+            self.tiles[row] = mask
+            yield
+        self.tiles[row] = 0
+
+    def _assign_regions(self, slots, index=0):
+        """Give each new region a digit that differs from its assigned neighbours"""
+        if index == len(slots):
+            yield
+            return
+        slot = slots[index]
+        state = self.state
+        trail = self.trail
+        used = 0
+        for other in self.neighbor_slots[slot]:
+            used |= 1 << state[other]
+        mark = trail.mark()
+        for d in self.digit_choices[slot]:
+            if used >> d & 1:
+                continue
+            trail.set(slot, d)
+            yield from self._assign_regions(slots, index + 1)
+            trail.undo(mark)
+
+    def _search(self, row, carry):
+        """Fill `row`; digits up to `row` and tiles up to `row + 1` are fixed"""
+        n = self.size
+        if row == self.split_row:
+            self._snapshot(row, carry)
+            return
+        for next_carry in self._row_fills(row, carry):
+            self.nodes += 1
+            # Another process may ask us to stop; polling costs a lock, so not every node
+            if self.stop_check is not None and not self.nodes & 1023 and self.stop_check():
+                self.stopped = True
+            if row == n - 1:
+                self._record()
+            else:
+                for _ in self._enter_row(row + 1, next_carry):
+                    self._search(row + 1, next_carry)
+                    if self._done():
+                        break
+            if self._done():
+                return
+
+    def _enter_row(self, row, carry):
+        """Get `row` ready for _search: yields once for every digit choice of
+        the regions new in it and every tile pattern of the row below that
+        leave the row fillable. The tiles of row 0 are chosen here too"""
+        n = self.size
+        for _ in self._assign_regions(self.new_region_slots[row]):
+            if self._cut(row):
+                continue
+            for _ in self._decide_tiles(0) if row == 0 else (None,):
+                # Skip all tile patterns of the row below if this row is hopeless
+                if not self._row_possible(row, carry):
+                    continue
+                if row + 1 < n:
+                    yield from self._decide_tiles(row + 1)
+                else:
+                    yield
+
+    def _record(self):
+        n = self.size
+        state = self.state
+        # Different ways of spreading the same increments give the same fill,
+        # which counts once unless every_spread asks for each spread
+        key = (tuple(self.tiles), tuple(state[:n * n]))
+        if self.every_spread:
+            key += (tuple(sorted(self.moves)),)
+        if key in self.seen_fills:
+            return
+        self.seen_fills.add(key)
+        tiles = {(r, c) for r in range(n) for c in range(n) if self.tiles[r] >> c & 1}
+        values = [[state[r * n + c] or None for c in range(n)] for r in range(n)]
+        digits = {region: state[slot] for region, slot in self.region_slot.items() if region >= 0}
+        self.solutions.append(Solution(values, tiles, digits, list(self.moves)))
+
+    def _row_masks(self, row, carry, relaxed=False):
+        """Digit masks for a row, or None if the carry already breaks it.
+
+        Returns (remaining, base, down_cap, masks). With relaxed=True the
+        tiles of the next row are treated as unknown: any cell above a
+        tileable cell may receive increments from below.
+        """
+        n = self.size
+        above = self.tiles[row - 1] if row > 0 else 0
+        here = self.tiles[row]
+        below = self.tiles[row + 1] if row + 1 < n else 0
+        slot_of = self.slot_of[row]
+        yellow = self.yellow[row]
+        domains = self.domains[row]
+        state = self.state
+
+        # What each tile in this row has left after feeding the cell above it
+        remaining = [0] * n
+        for c in range(n):
+            if here >> c & 1:
+                remaining[c] = state[slot_of[c]] - carry[c]
+                if remaining[c] < 0:
+                    return None
+            elif carry[c] and not above >> c & 1:
+                return None  # The cell above wants increments but no tile is here
+
+        # Base digit and how much each cell could still receive
+        base = [0] * n
+        down_cap = [0] * n
+        masks = [0] * n
+        for c in range(n):
+            if here >> c & 1:
+                continue
+            b = state[slot_of[c]]
+            if above >> c & 1:
+                b += carry[c]
+                if b > 9:
+                    return None
+            base[c] = b
+            if yellow[c]:
+                masks[c] = 1 << (b - 1) & domains[c]
+                if not masks[c]:
+                    return None
+                continue
+            if relaxed:
+                if row + 1 < n and self.tileable[row + 1][c]:
+                    down_cap[c] = 9
+            elif below >> c & 1:
+                down_cap[c] = state[self.slot_of[row + 1][c]] or 9
+            extra = down_cap[c]
+            if c > 0 and here >> (c - 1) & 1:
+                extra += remaining[c - 1]
+            if c + 1 < n and here >> (c + 1) & 1:
+                extra += remaining[c + 1]
+            masks[c] = range_mask(b, min(9, b + extra)) & domains[c]
+            if not masks[c]:
+                return None
+        return remaining, base, down_cap, masks
+
+    def _row_possible(self, row, carry):
+        """Cheap check that some fill of the row exists whatever tiles come below"""
+        prepared = self._row_masks(row, carry, relaxed=True)
+        if prepared is None:
+            return False
+        return row_possible(self.run_candidates[row], self.tiles[row], prepared[3])
+
+    def _row_fills(self, row, carry):
+        """Yield the carry for the next row for every valid fill of this row.
+
+        carry[c] is what the tile at (row-1, c) pushes down, or what the cell
+        at (row-1, c) still needs from a tile at (row, c).
+        """
+        n = self.size
+        prepared = self._row_masks(row, carry)
+        if prepared is None:
+            return
+        remaining, base, down_cap, masks = prepared
+        state = self.state
+        trail = self.trail
+        cell = row * n
+
+        segments = segment_row(self.run_candidates[row], self.tiles[row], masks)
+        if segments is None:
+            return
+        runs = self._runs(self.tiles[row])
+        run_cands = [cands for _, _, cands in segments]
+
+        # A tile may only push increments down onto an existing non-yellow cell
+        if row + 1 < n:
+            next_slot = self.slot_of[row + 1]
+            next_yellow = self.yellow[row + 1]
+            down_room = [0 if next_yellow[c] else 9 - (state[next_slot[c]] or 1) for c in range(n)]
+        else:
+            down_room = [0] * n
+
+        next_carry = [0] * n
+        moves = self.moves
+
+        def push_down(tile_col, amount):
+            # Whatever a tile has not given sideways goes to the cell below
+            if amount > down_room[tile_col]:
+                return False
+            next_carry[tile_col] = amount
+            if amount:
+                moves.append(((row, tile_col), (row + 1, tile_col), amount))
+            return True
+
+        def place(k, left_avail):
+            if k == len(runs):
+                yield tuple(next_carry)
+                return
+            start, end = runs[k]
+            left_tile = start - 1 if start > 0 else None
+            right_tile = end if end < n else None
+            right_avail = remaining[end] if right_tile is not None else 0
+            mark = len(moves)
+            trail_mark = trail.mark()
+            for value in run_cands[k]:
+                digits_str = str(value)
+                trail.undo(trail_mark)
+                ok = True
+                # Interior cells can only be fed from below
+                for i, c in enumerate(range(start, end)):
+                    f = ord(digits_str[i]) - 48
+                    trail.set(cell + c, f)
+                    e = f - base[c]
+                    next_carry[c] = 0
+                    if c != start and c != end - 1:
+                        if e > down_cap[c]:
+                            ok = False
+                            break
+                        next_carry[c] = e
+                if not ok:
+                    continue
+                for x, y, z_first, z_last in self._edge_splits(
+                        state[cell + start] - base[start], state[cell + end - 1] - base[end - 1],
+                        start == end - 1, left_avail if left_tile is not None else 0,
+                        right_avail, down_cap[start], down_cap[end - 1]):
+                    del moves[mark:]
+                    next_carry[start] = z_first
+                    next_carry[end - 1] = z_last if start != end - 1 else z_first
+                    for c in range(start, end):
+                        if next_carry[c]:
+                            moves.append(((row + 1, c), (row, c), next_carry[c]))
+                    if x:
+                        moves.append(((row, left_tile), (row, start), x))
+                    if y:
+                        moves.append(((row, right_tile), (row, end - 1), y))
+                    if left_tile is not None and not push_down(left_tile, left_avail - x):
+                        continue
+                    if right_tile is None:
+                        yield from place(k + 1, None)
+                    elif k + 1 < len(runs) and runs[k + 1][0] == right_tile + 1:
+                        yield from place(k + 1, right_avail - y)
+                    elif push_down(right_tile, right_avail - y):
+                        # Trailing tile at the end of the row
+                        yield from place(k + 1, None)
+                del moves[mark:]
+            trail.undo(trail_mark)
+
+        mark = len(moves)
+        if runs and runs[0][0] > 0:
+            yield from place(0, remaining[runs[0][0] - 1])
+        elif runs:
+            yield from place(0, None)
+        elif self.tiles[row] and push_down(0, remaining[0]):
+            yield tuple(next_carry)
+        del moves[mark:]
+
+    @staticmethod
+    def _edge_splits(e_first, e_last, single, left_avail, right_avail, cap_first, cap_last):
+        """Ways to feed a run's end cells from the side tiles and from below.
+
+        Yields (from_left, from_right, first_from_below, last_from_below).
+        """
+        if single:
+            for x in range(min(e_first, left_avail) + 1):
+                for y in range(min(e_first - x, right_avail) + 1):
+                    z = e_first - x - y
+                    if z <= cap_first:
+                        yield x, y, z, z
+            return
+        for x in range(min(e_first, left_avail) + 1):
+            if e_first - x > cap_first:
+                continue
+            for y in range(min(e_last, right_avail) + 1):
+                if e_last - y > cap_last:
+                    continue
+                yield x, y, e_first - x, e_last - y
+
+
+def solve_layout(filename, row_labels=None, limit=None):
+    layout = PuzzleLayout.from_csv(filename, row_labels)
+    return Solver(layout).solve(limit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a Number Cross 5 layout without the GUI")
+    parser.add_argument("layout", nargs="?", default="puzzle_layout.csv")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many solutions")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the clue candidate cache")
+    args = parser.parse_args(argv)
+
+    layout = PuzzleLayout.from_csv(args.layout)
+    solver = Solver(layout, ClueCache(cache_dir=None) if args.no_cache else None)
+    start = time.perf_counter()
+    solutions = solver.solve(args.limit)
+    elapsed = time.perf_counter() - start
+
+    for i, solution in enumerate(solutions, 1):
+        print(f"Solution {i} (total sum {solution.total_sum()}):")
+        print(solution.format_grid())
+        print()
+    print(f"{len(solutions)} solution(s), {solver.nodes} rows placed, {elapsed:.2f}s")
+    return 0 if solutions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,17 @@
-def is_valid(num):
-    return all(d in '23456' for d in str(num))
+import sys
 
-def generate_valid_squares():
+import clues
+import numpyScreening
+from clues import pattern_masks
+
+# --numpy screens by vectorized enumeration instead of digit DP
+backend = numpyScreening if "--numpy" in sys.argv else clues
+
+def generate_valid_squares(max_digits=9):
+    # Squares made only of the digits 2-6
     result = []
-    n = 1
-    while True:
-        square = n * n
-        if square > 999999999:  # 9 digits max
-            break
-        if is_valid(square):
-            result.append(square)
-        n += 1
+    for length in range(1, max_digits + 1):
+        result += backend.squares(pattern_masks(*['23456'] * length))
     return result
 
 # Run the function and print the results
@@ -0,0 +1,45 @@
+from clues import MILLER_RABIN_LIMIT, SMALL_PRIMES, is_prime
+
+# Strong pseudoprimes to every prime base up to 37 and up to 41: the
+# smallest numbers the first twelve and thirteen prime bases let through
+PSEUDOPRIME_TO_37 = 318665857834031151167461
+PSEUDOPRIME_TO_41 = 3317044064679887385961981
+
+
+def sieve(limit):
+    prime = [True] * limit
+    prime[0] = prime[1] = False
+    for p in range(2, int(limit ** 0.5) + 1):
+        if prime[p]:
+            prime[p * p::p] = [False] * len(prime[p * p::p])
+    return prime
+
+
+def test_is_prime_matches_sieve():
+    prime = sieve(200000)
+    assert [n for n in range(200000) if is_prime(n)] == [n for n in range(200000) if prime[n]]
+
+
+def test_is_prime_rejects_strong_pseudoprimes():
+    assert PSEUDOPRIME_TO_37 % 399165290221 == 0
+    assert not is_prime(PSEUDOPRIME_TO_37)
+    assert PSEUDOPRIME_TO_41 == MILLER_RABIN_LIMIT
+    assert not is_prime(PSEUDOPRIME_TO_41)
+
+
+def test_is_prime_either_side_of_the_limit():
+    # Known primes just below and above the limit, and products of two
+    # primes, through both the Miller-Rabin and the Baillie-PSW paths
+    p = 2 ** 61 - 1
+    q = 2 ** 31 - 1
+    assert is_prime(p)
+    assert not is_prime(p * q)
+    below = [n for n in range(MILLER_RABIN_LIMIT - 200, MILLER_RABIN_LIMIT) if is_prime(n)]
+    above = [n for n in range(MILLER_RABIN_LIMIT, MILLER_RABIN_LIMIT + 200) if is_prime(n)]
+    for n in below + above:
+        assert all(n % small for small in SMALL_PRIMES)
+        assert pow(3, n - 1, n) == 1
+    assert not is_prime((2 ** 89 - 1) * 3)
+    assert is_prime(2 ** 89 - 1)
+    assert not is_prime((2 ** 61 - 1) ** 2)
+
@@ -0,0 +1,60 @@
+import pytest
+
+from clueCache import ClueCache
+from gridFile import GridFile, main, read_layout, received_from_moves, write_grid_file
+from layoutGenerator import generate_layout, write_layout
+from solver import PuzzleLayout, Solver
+
+LABELS = ["Multiple of 3", "", "Odd and a Palindrome", "", "Multiple of 7"]
+
+
+def solved_records():
+    """(grid, received) for a few fills of a small layout, tiles included"""
+    layout = PuzzleLayout(generate_layout(5, 3).grid, LABELS)
+    solutions = Solver(layout, ClueCache(None)).solve(5)
+    assert any(solution.tiles for solution in solutions)
+    return layout, [(s.to_grid(layout), received_from_moves(s.moves, layout.size)) for s in solutions]
+
+
+def test_grid_file_round_trip(tmp_path):
+    layout, records = solved_records()
+    filename = str(tmp_path / "fills.ncg")
+    assert write_grid_file(filename, records, layout.row_labels) == len(records)
+    with GridFile(filename) as grids:
+        assert len(grids) == len(records)
+        assert grids.size == layout.size
+        assert grids.row_labels == layout.row_labels
+        for k, (grid, received) in enumerate(records):
+            assert grids.record(k) == (grid, received)
+        assert list(grids) == [grid for grid, _ in records]
+    assert read_layout(filename).grid == records[0][0]
+
+
+def test_grid_file_rejects_mixed_sizes(tmp_path):
+    grids = [generate_layout(5, 1).grid, generate_layout(6, 1).grid]
+    with pytest.raises(ValueError):
+        write_grid_file(str(tmp_path / "mixed.ncg"), grids)
+
+
+def test_csv_round_trip(tmp_path):
+    layout = generate_layout(7, 2)
+    # Entered digits travel in the CSV; tiles and increments do not
+    layout.grid.set_value(3, 5)
+    filename = str(tmp_path / "layout.csv")
+    write_layout(layout, filename)
+    loaded = PuzzleLayout.from_csv(filename)
+    assert loaded.grid == layout.grid
+    assert loaded.row_labels == layout.row_labels
+
+
+def test_convert_between_formats(tmp_path):
+    layout = generate_layout(6, 4)
+    source = str(tmp_path / "layout.csv")
+    write_layout(layout, source)
+    binary = str(tmp_path / "layout.ncg")
+    back = str(tmp_path / "back.csv")
+    assert main(["convert", source, binary]) == 0
+    assert main(["convert", binary, back]) == 0
+    loaded = read_layout(back)
+    assert loaded.grid == read_layout(source).grid
+    assert loaded.row_labels == layout.row_labels
@@ -0,0 +1,68 @@
+import os
+import random
+
+from clueCache import ClueCache
+from hints import CandidateTracker, Propagator, compute_hints
+from layoutGenerator import generate_layout
+from solver import PuzzleLayout, Solver
+
+PUZZLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "puzzle_layout.csv")
+LABELS = ["Multiple of 3", "", "Odd and a Palindrome", "", "Multiple of 7"]
+
+
+def small_layout():
+    return PuzzleLayout(generate_layout(5, 3).grid, LABELS)
+
+
+def fits(masks, solution, layout):
+    grid = solution.to_grid(layout)
+    return all(grid.is_tile(i) or masks[i] >> (grid.value(i) - 1) & 1 for i in range(grid.size ** 2))
+
+
+def test_empty_puzzle_has_no_contradiction():
+    # No tiles are down yet, so every cell that may take one must be
+    # treated as a possible tile rather than a digit
+    layout = PuzzleLayout.from_csv(PUZZLE)
+    hints = compute_hints(layout.grid.copy(), layout.row_labels, cache=ClueCache(None))
+    assert hints.problem is None
+    assert not hints.forced
+
+
+def test_masks_keep_every_solution():
+    layout = small_layout()
+    solutions = Solver(layout, ClueCache(None)).solve(30)
+    assert solutions
+    hints = compute_hints(layout.grid.copy(), layout.row_labels, cache=ClueCache(None))
+    assert hints.problem is None
+    assert all(fits(hints.masks, solution, layout) for solution in solutions)
+
+
+def test_tracker_matches_fresh_propagation():
+    layout = small_layout()
+    cache = ClueCache(None)
+    target = Solver(layout, cache).solve(1)[0].to_grid(layout)
+    grid = layout.grid.copy()
+    n = grid.size
+    tracker = CandidateTracker(grid.copy(), layout.row_labels, cache=cache)
+    rng = random.Random(7)
+    for _ in range(150):
+        i = rng.randrange(n * n)
+        if rng.random() < 0.7:
+            # Toward the solution: tiles, and base digits with no increments yet
+            grid.flags[i] = target.flags[i]
+            grid.originals[i] = target.originals[i]
+            if target.is_tile(i):
+                grid.domains[i] = 0
+            else:
+                grid.set_value(i, target.value(i) - target.increments[i])
+        else:
+            grid.flags[i] = layout.grid.flags[i]
+            grid.domains[i] = layout.grid.domains[i]
+            grid.originals[i] = layout.grid.originals[i]
+        given = {j: rng.randrange(grid.originals[j] + 1) for j in range(n * n) if grid.is_tile(j)}
+        problem = tracker.load(grid.copy(), given)
+        fresh = Propagator(grid.copy(), layout.row_labels, given, cache)
+        assert problem == fresh.propagate()
+        if problem is None:
+            assert tracker.cell_masks == fresh.cell_masks
+            assert tracker.region_masks == fresh.region_masks
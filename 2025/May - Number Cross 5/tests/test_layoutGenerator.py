@@ -0,0 +1,17 @@
+import pytest
+
+from layoutGenerator import MAX_REGIONS, check_regions, generate_layout
+
+
+@pytest.mark.parametrize("size", [3, 11, 36, 50])
+def test_regions_fit_the_editor(size):
+    grid = generate_layout(size, 1).grid
+    check_regions(grid)
+    regions = {grid.region(i) for i in range(size * size)}
+    assert regions == set(range(1, len(regions) + 1))
+    assert len(regions) <= MAX_REGIONS
+
+
+def test_too_many_regions_is_refused():
+    with pytest.raises(ValueError):
+        generate_layout(50, 1, regions=MAX_REGIONS + 1)
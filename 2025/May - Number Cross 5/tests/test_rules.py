@@ -0,0 +1,64 @@
+import random
+
+from bitGrid import TILE
+from clueCache import ClueCache
+from gridGeometry import grid_geometry
+from layoutGenerator import generate_layout
+from rules import RuleChecker, violations
+from solver import PuzzleLayout, Solver
+
+LABELS = ["Multiple of 3", "", "Odd and a Palindrome", "", "Multiple of 7"]
+
+
+def in_order(found):
+    """Violations in a fixed order, as the checker groups them differently"""
+    return sorted(map(repr, found))
+
+
+def edit(grid, rng, regions):
+    """Change one random thing about one random cell; returns its index"""
+    n = grid.size
+    i = rng.randrange(n * n)
+    kind = rng.randrange(5)
+    if kind == 0:
+        grid.flags[i] &= ~TILE
+        grid.set_value(i, rng.randint(1, 9))
+    elif kind == 1:
+        grid.clear_value(i)
+    elif kind == 2:
+        # Place or lift a tile, keeping the digit it covers
+        if grid.is_tile(i):
+            grid.flags[i] &= ~TILE
+            grid.set_value(i, grid.originals[i] or rng.randint(1, 9))
+            grid.originals[i] = 0
+        else:
+            grid.originals[i] = grid.value(i) or rng.randint(1, 9)
+            grid.flags[i] |= TILE
+            grid.domains[i] = 0
+    elif kind == 3:
+        grid.set_region(i, rng.choice(regions))
+    else:
+        # Increments from a neighbour, tile or not
+        j = rng.choice(grid_geometry(n).neighbors[i])
+        grid.increments[i] = rng.randint(0, 3)
+        if grid.increments[i]:
+            grid.contributors[i] = {j}
+        else:
+            grid.contributors.pop(i, None)
+    return i
+
+
+def test_incremental_matches_full_check():
+    layout = PuzzleLayout(generate_layout(5, 3).grid, LABELS)
+    grid = Solver(layout, ClueCache(None)).solve(1)[0].to_grid(layout)
+    checker = RuleChecker(grid, layout.row_labels)
+    assert checker.violations() == []
+    assert checker.is_solved()
+    regions = sorted(set(grid.regions))
+    rng = random.Random(11)
+    for _ in range(400):
+        checker.update({edit(grid, rng, regions)})
+        expected = violations(grid, layout.row_labels)
+        assert in_order(checker.violations()) == in_order(expected)
+        assert checker.count() == len(expected)
+        assert checker.is_solved() == (not expected)
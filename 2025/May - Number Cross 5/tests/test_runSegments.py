@@ -0,0 +1,41 @@
+import random
+
+from clueCache import ClueCache
+from layoutGenerator import generate_layout
+from runSegments import MIN_RUN_LENGTH, iter_tile_masks, tile_masks
+from solver import PuzzleLayout, Solver
+
+
+def brute_force_masks(required, allowed, size):
+    expected = []
+    for mask in range(1 << size):
+        if mask & required != required or mask & ~allowed or mask & (mask >> 1):
+            continue
+        runs = [len(run) for run in format(mask, f"0{size}b").split("1")]
+        if all(run == 0 or run >= MIN_RUN_LENGTH for run in runs):
+            expected.append(mask)
+    return expected
+
+
+def test_tile_masks_match_brute_force():
+    rng = random.Random(3)
+    for _ in range(500):
+        size = rng.randint(1, 10)
+        allowed = rng.randrange(1 << size)
+        required = allowed & rng.randrange(1 << size)
+        expected = brute_force_masks(required, allowed, size)
+        # Both come out in ascending order, as the solver tries them
+        assert list(iter_tile_masks(required, allowed, size)) == expected
+        assert tile_masks(required, allowed, size) == expected
+        found = tile_masks(required, allowed, size, limit=20)
+        if len(expected) > 20:
+            assert found is None
+        else:
+            assert found == expected
+
+
+def test_wide_rows_are_not_listed():
+    # 2^50 bitmasks per row: the masks must come from the DP, not a scan
+    layout = PuzzleLayout(generate_layout(50, 7).grid, [""] * 50)
+    solver = Solver(layout, ClueCache(None))
+    assert any(masks is None for masks in solver.row_tile_masks)
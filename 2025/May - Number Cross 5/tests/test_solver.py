@@ -0,0 +1,125 @@
+import itertools
+from functools import lru_cache
+
+import pytest
+
+from bitGrid import YELLOW
+from clueCache import ClueCache
+from clues import parse_clue
+from countSolutions import SolutionCounter
+from gridGeometry import grid_geometry
+from layoutGenerator import generate_layout
+from optimizeSum import SumOptimizer
+from rules import violations
+from runSegments import MIN_RUN_LENGTH, row_runs
+from solver import PuzzleLayout, Solver
+
+LABELS = ["", "Multiple of 3", ""]
+SEEDS = (1, 2, 3)
+
+
+def tiny_layout(seed):
+    return PuzzleLayout(generate_layout(3, seed, regions=3).grid, LABELS)
+
+
+def splits(total, parts):
+    """Every way of handing out `total` increments to `parts` cells"""
+    if parts == 0:
+        if total == 0:
+            yield ()
+        return
+    if parts == 1:
+        yield (total,)
+        return
+    for first in range(total + 1):
+        for rest in splits(total - first, parts - 1):
+            yield (first,) + rest
+
+
+def spread(values, tiles):
+    """Final digits for every way the tiles, as (digit, cells fed), can hand
+    out their digits without taking a cell past 9"""
+    if not tiles:
+        yield values
+        return
+    digit, fed = tiles[0]
+    for split in splits(digit, len(fed)):
+        given = list(values)
+        for j, amount in zip(fed, split):
+            given[j] += amount
+        if all(given[j] <= 9 for j in fed):
+            yield from spread(given, tiles[1:])
+
+
+@lru_cache(maxsize=None)
+def brute_force_fills(seed):
+    """Every fill of the tiny layout as (tile mask per row, final digits),
+    found by trying every tile set, region digit and increment split"""
+    layout = tiny_layout(seed)
+    grid = layout.grid
+    n = grid.size
+    neighbors = grid_geometry(n).neighbors
+    clues = [parse_clue(label) for label in layout.row_labels]
+    regions = sorted(set(grid.regions))
+    yellow = [bool(grid.flags[i] & YELLOW) for i in range(n * n)]
+    fills = set()
+    cells = [i for i in range(n * n) if not yellow[i]]
+    for count in range(len(cells) + 1):
+        for tiles in map(set, itertools.combinations(cells, count)):
+            if any(j in tiles for t in tiles for j in neighbors[t]):
+                continue
+            masks = tuple(sum(1 << c for c in range(n) if r * n + c in tiles) for r in range(n))
+            runs = [row_runs(mask, n) for mask in masks]
+            if any(end - start < MIN_RUN_LENGTH for row in runs for start, end in row):
+                continue
+            order = sorted(tiles)
+            fed = {t: [j for j in neighbors[t] if j not in tiles and not yellow[j]] for t in order}
+            for digits in itertools.product(range(1, 10), repeat=len(regions)):
+                digit = dict(zip(regions, digits))
+                base = [digit[grid.regions[i]] for i in range(n * n)]
+                if any(base[i] == base[j] and grid.regions[i] != grid.regions[j]
+                       for i in range(n * n) for j in neighbors[i]):
+                    continue
+                untouched = [0 if i in tiles else base[i] for i in range(n * n)]
+                for final in spread(untouched, [(base[t], fed[t]) for t in order]):
+                    if all(clues[r].matches(int("".join(str(final[r * n + c]) for c in range(start, end))))
+                           for r in range(n) for start, end in runs[r]):
+                        fills.add((masks, tuple(final)))
+    return fills
+
+
+def fill_key(solution, n):
+    masks = tuple(sum(1 << c for c in range(n) if (r, c) in solution.tiles) for r in range(n))
+    return masks, tuple(solution.values[r][c] or 0 for r in range(n) for c in range(n))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_solver_finds_every_fill(seed):
+    layout = tiny_layout(seed)
+    solutions = Solver(layout, ClueCache(None)).solve()
+    keys = [fill_key(solution, layout.size) for solution in solutions]
+    assert len(keys) == len(set(keys))
+    assert set(keys) == brute_force_fills(seed)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_solutions_break_no_rule(seed):
+    layout = tiny_layout(seed)
+    for solution in Solver(layout, ClueCache(None)).solve(200):
+        assert violations(solution.to_grid(layout), layout.row_labels) == []
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_counter_matches_enumeration(seed):
+    layout = tiny_layout(seed)
+    total = len(brute_force_fills(seed))
+    assert SolutionCounter(layout, ClueCache(None)).count(cap=total + 1) == total
+    assert SolutionCounter(layout, ClueCache(None)).count(cap=2) == min(total, 2)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_optimizer_matches_enumeration(seed):
+    layout = tiny_layout(seed)
+    sums = [sum(values) for _, values in brute_force_fills(seed)]
+    assert SumOptimizer(layout, ClueCache(None)).optimize(maximize=True).total_sum() == max(sums)
+    assert SumOptimizer(layout, ClueCache(None)).optimize(maximize=False).total_sum() == min(sums)
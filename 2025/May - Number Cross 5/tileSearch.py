@@ -0,0 +1,89 @@
+"""Find the tiles for a grid whose digits are already filled in.
+
+    python tileSearch.py filled_layout.csv [--limit N] [--every-spread]
+
+The editor leaves tile placement to the user: pick a cell, press T, then
+hand out the displaced digit one + click at a time. TileSearch does it
+automatically. Every region keeps the digit it holds in the grid; the
+search then enumerates non-adjacent tile sets and every way to spread each
+tile's digit over its eligible neighbours without passing 9, row by row,
+dropping a branch as soon as a row's runs can no longer satisfy its clue.
+
+By default fills that differ only in how the increments were spread count
+once; --every-spread lists each spread separately.
+"""
+import argparse
+import sys
+import time
+
+from bitGrid import TILE
+from solver import PuzzleLayout, Solver
+
+
+class TileSearch(Solver):
+    """Solver with every region digit read off a filled grid"""
+
+    def __init__(self, layout, cache=None, every_spread=False):
+        grid = layout.grid.copy()
+        n = grid.size
+
+        # A cell's digit before tiles: what a tile displaced, what an
+        # incremented cell started from, or simply its value
+        base = [grid.originals[i] or grid.value(i) for i in range(n * n)]
+        for i in range(n * n):
+            if not base[i]:
+                raise ValueError(f"Cell {grid.coords(i)} has no digit")
+            # Tiles are searched from scratch and placed values are not final
+            grid.flags[i] &= ~TILE
+            grid.originals[i] = 0
+            grid.increments[i] = 0
+            grid.clear_value(i)
+        grid.contributors = {}
+
+        super().__init__(PuzzleLayout(grid, layout.row_labels), cache)
+        self.every_spread = every_spread
+
+        digits = {}
+        for i in range(n * n):
+            region = self.region_of[i // n][i % n]
+            if digits.setdefault(region, base[i]) != base[i]:
+                raise ValueError(f"Region {region} holds more than one digit")
+        for region, digit in digits.items():
+            self.digit_choices[self.region_slot[region]] = (digit,)
+
+
+def find_tiles(filename, row_labels=None, limit=None, every_spread=False):
+    layout = PuzzleLayout.from_csv(filename, row_labels)
+    return TileSearch(layout, every_spread=every_spread).solve(limit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Place tiles on a filled-in Number Cross 5 grid")
+    parser.add_argument("layout", nargs="?", default="puzzle_layout.csv")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many placements")
+    parser.add_argument("--every-spread", action="store_true",
+                        help="list every way of spreading the increments, not one per fill")
+    args = parser.parse_args(argv)
+
+    layout = PuzzleLayout.from_csv(args.layout)
+    try:
+        search = TileSearch(layout, every_spread=args.every_spread)
+    except ValueError as e:
+        print(f"Not a filled grid: {e}", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    solutions = search.solve(args.limit)
+    elapsed = time.perf_counter() - start
+
+    for i, solution in enumerate(solutions, 1):
+        print(f"Placement {i} (total sum {solution.total_sum()}):")
+        print(solution.format_grid())
+        for tile, cell, amount in sorted(solution.moves):
+            print(f"  tile {tile} -> {cell}: +{amount}")
+        print()
+    print(f"{len(solutions)} placement(s), {search.nodes} rows placed, {elapsed:.2f}s")
+    return 0 if solutions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())